@@ -3,21 +3,23 @@ Django Admin configuration for User model
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from picu.admin_mixins import LargeTableAdmin
 from .models import User
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdmin, BaseUserAdmin):
     """Custom admin for User model"""
     
     list_display = ('email', 'full_name', 'role', 'is_active', 'created_at')
     list_filter = ('role', 'is_active', 'is_staff')
     search_fields = ('email', 'full_name', 'phone')
+    search_help_text = 'Email, nama atau no. WhatsApp'
     ordering = ('-created_at',)
     
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
-        ('Informasi Pribadi', {'fields': ('full_name', 'phone', 'instagram')}),
+        ('Informasi Pribadi', {'fields': ('full_name', 'display_name', 'phone', 'instagram')}),
         ('Informasi Bank', {'fields': ('bank_name', 'bank_number', 'bank_holder')}),
         ('Role & Permissions', {'fields': ('role', 'is_active', 'is_staff', 'is_superuser')}),
     )
@@ -0,0 +1,44 @@
+"""
+Authentication backends that resolve the session user from the cache
+"""
+from allauth.account.auth_backends import AuthenticationBackend
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id) -> str:
+    return f'accounts:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Drop a cached user; called whenever the User row changes"""
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedUserMixin:
+    """
+    Serve get_user() from the cache so AuthenticationMiddleware does not
+    query the User table on every request
+    """
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0)
+        if not timeout:
+            return super().get_user(user_id)
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, timeout)
+        return user
+
+
+class CachedModelBackend(CachedUserMixin, ModelBackend):
+    """Django's ModelBackend with cached user resolution"""
+
+
+class CachedAuthenticationBackend(CachedUserMixin, AuthenticationBackend):
+    """AllAuth's email backend with cached user resolution"""
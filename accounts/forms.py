@@ -54,11 +54,14 @@ class ProfileForm(forms.ModelForm):
     
     class Meta:
         model = User
-        fields = ['full_name', 'email', 'phone', 'instagram']
+        fields = ['full_name', 'display_name', 'email', 'phone', 'instagram']
         widgets = {
             'full_name': forms.TextInput(attrs={
                 'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500',
             }),
+            'display_name': forms.TextInput(attrs={
+                'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500',
+            }),
             'email': forms.EmailInput(attrs={
                 'class': 'w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-primary-500',
                 'readonly': 'readonly',
@@ -73,6 +76,7 @@ class ProfileForm(forms.ModelForm):
         }
         labels = {
             'full_name': 'Nama Lengkap',
+            'display_name': 'Nama Tampilan',
             'email': 'Email',
             'phone': 'No. WhatsApp',
             'instagram': 'Link Instagram',
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:48
+
+from django.db import migrations, models
+
+
+# Admin search uses icontains (ILIKE '%term%'), which only trigram indexes
+# can serve. PostgreSQL only; other databases skip these.
+TRIGRAM_INDEXES = [
+    ('accounts_user_email_trgm', 'accounts_user', 'email'),
+    ('accounts_user_full_name_trgm', 'accounts_user', 'full_name'),
+    ('accounts_user_phone_trgm', 'accounts_user', 'phone'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at'], name='accounts_user_created'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='display_name',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Nama Tampilan'),
+        ),
+    ]
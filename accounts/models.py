@@ -42,6 +42,8 @@ class User(AbstractUser):
     full_name = models.CharField('Nama Lengkap', max_length=100)
     phone = models.CharField('No. WhatsApp', max_length=20)
     instagram = models.CharField('Link Instagram', max_length=100, blank=True, null=True)
+    # Public name on the partner catalog; creators without one are listed anonymously
+    display_name = models.CharField('Nama Tampilan', max_length=50, blank=True)
     
     # Bank information for payouts
     bank_name = models.CharField('Nama Bank', max_length=50, blank=True, null=True)
@@ -64,6 +66,9 @@ class User(AbstractUser):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='accounts_user_created'),
+        ]
     
     def __str__(self):
         return self.email
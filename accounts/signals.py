@@ -0,0 +1,18 @@
+"""
+Signal handlers for accounts app
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidate_cached_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Profile, bank info and role edits must not be served stale"""
+    invalidate_cached_user(instance.pk)
+    # A concurrent request may re-cache the old row before the write commits
+    transaction.on_commit(lambda: invalidate_cached_user(instance.pk))
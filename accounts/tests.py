@@ -1,3 +1,40 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from .backends import CachedModelBackend
+from .models import User
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=300)
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.backend = CachedModelBackend()
+        self.user = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+
+    def test_second_lookup_is_served_from_cache(self):
+        self.backend.get_user(self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.backend.get_user(self.user.pk).email, 'creator@picu.test')
+        self.assertEqual(len(queries), 0)
+
+    def test_save_and_role_change_invalidate(self):
+        self.backend.get_user(self.user.pk)
+        self.user.full_name = 'Renamed'
+        self.user.role = 'admin'
+        self.user.save()
+
+        cached = self.backend.get_user(self.user.pk)
+        self.assertEqual(cached.full_name, 'Renamed')
+        self.assertTrue(cached.is_admin)
+
+    def test_delete_invalidates(self):
+        self.backend.get_user(self.user.pk)
+        pk = self.user.pk
+        self.user.delete()
+        self.assertIsNone(self.backend.get_user(pk))
@@ -1,3 +1,24 @@
 from django.contrib import admin
 
-# Register your models here.
+from picu.admin_mixins import LargeTableAdmin
+from .models import DailyDesignStats, RollupCursor
+
+
+@admin.register(DailyDesignStats)
+class DailyDesignStatsAdmin(LargeTableAdmin):
+    """Read-only view of the daily rollups"""
+    list_display = ('day', 'creator', 'uploaded', 'approved', 'rejected', 'deleted', 'reviews', 'median_review_hours')
+    list_filter = ('day',)
+    list_select_related = ('creator',)
+    autocomplete_fields = ('creator',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RollupCursor)
+class RollupCursorAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_event_id', 'updated_at')
@@ -0,0 +1,205 @@
+"""
+Management command to benchmark every dashboard, designs and accounts view
+"""
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from designs.models import Design
+
+
+# (name, user, method, url name, needs design pk, form data, mutates)
+SCENARIOS = [
+    ('dashboard:index', None, 'get', 'dashboard:index', False, None, False),
+    ('dashboard:dashboard', 'creator', 'get', 'dashboard:dashboard', False, None, False),
+    ('dashboard:admin_dashboard', 'admin', 'get', 'dashboard:admin_dashboard', False, None, False),
+    ('designs:list [creator]', 'creator', 'get', 'designs:list', False, None, False),
+    ('designs:list [admin]', 'admin', 'get', 'designs:list', False, None, False),
+    ('designs:list [admin, pending]', 'admin', 'get', 'designs:list?status=pending', False, None, False),
+    ('designs:upload', 'creator', 'get', 'designs:upload', False, None, False),
+    ('designs:detail [creator]', 'creator', 'get', 'designs:detail', True, None, False),
+    ('designs:detail [admin]', 'admin', 'get', 'designs:detail', True, None, False),
+    ('designs:approve', 'admin', 'get', 'designs:approve', True, None, True),
+    ('designs:reject', 'admin', 'post', 'designs:reject', True, {'reject_reason': 'Benchmark'}, True),
+    ('designs:approve [htmx]', 'admin', 'post', 'designs:approve', True, None, True),
+    ('designs:reject [htmx]', 'admin', 'post', 'designs:reject', True, {'reject_reason': 'Benchmark'}, True),
+    ('designs:delete', 'creator', 'get', 'designs:delete', True, None, False),
+    ('designs:delete [htmx]', 'creator', 'post', 'designs:delete', True, None, True),
+    ('accounts:profile', 'creator', 'get', 'accounts:profile', False, None, False),
+    ('accounts:profile [post]', 'creator', 'post', 'accounts:profile', False, 'profile', True),
+    ('accounts:bank_info', 'creator', 'get', 'accounts:bank_info', False, None, False),
+    ('accounts:bank_info [post]', 'creator', 'post', 'accounts:bank_info', False, 'bank', True),
+    ('catalog_designs', None, 'get', 'catalog_designs', False, None, False),
+    ('catalog_designs [title,image]', None, 'get', 'catalog_designs?fields=title,image', False, None, False),
+]
+
+# HTMX scenarios: (element the request targets, page it is sent from)
+HTMX_REQUESTS = {
+    'designs:approve [htmx]': ('review-panel', 'designs:detail'),
+    'designs:reject [htmx]': ('review-panel', 'designs:detail'),
+    'designs:delete [htmx]': ('design-card-{pk}', 'designs:list'),
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark all views through the test client and report latency and queries as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Measured requests per view')
+        parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per view')
+        parser.add_argument('--only', default='', help='Run only views whose name contains this text')
+        parser.add_argument('--output', default='', help='Write JSON to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        creator, design = self._pick_creator()
+        admin = User.objects.filter(role='admin').first()
+        if admin is None:
+            raise CommandError('No admin found. Run create_admin or seed_scale first.')
+
+        clients = {None: Client(HTTP_HOST='localhost')}
+        for role, user in (('creator', creator), ('admin', admin)):
+            clients[role] = Client(HTTP_HOST='localhost')
+            clients[role].force_login(user)
+
+        post_data = {
+            'profile': {
+                'full_name': creator.full_name,
+                'email': creator.email,
+                'phone': creator.phone,
+                'instagram': creator.instagram or '',
+            },
+            'bank': {
+                'bank_name': creator.bank_name or 'BCA',
+                'bank_number': creator.bank_number or '1234567890',
+                'bank_holder': creator.bank_holder or creator.full_name,
+            },
+        }
+
+        results = {}
+        for name, role, method, url_name, with_pk, data, mutates in SCENARIOS:
+            if options['only'] and options['only'] not in name:
+                continue
+
+            url_name, _, query = url_name.partition('?')
+            url = reverse(url_name, kwargs={'pk': design.pk} if with_pk else None)
+            if query:
+                url = f'{url}?{query}'
+            if isinstance(data, str):
+                data = post_data[data]
+            headers = {}
+            if name in HTMX_REQUESTS:
+                target, page = HTMX_REQUESTS[name]
+                page_kwargs = {'pk': design.pk} if page == 'designs:detail' else None
+                headers = {
+                    'HX-Request': 'true',
+                    'HX-Target': target.format(pk=design.pk),
+                    'HX-Current-URL': f'http://localhost{reverse(page, kwargs=page_kwargs)}',
+                }
+
+            client = clients[role]
+            request = getattr(client, method)
+
+            for _ in range(options['warmup']):
+                self._run(request, url, data, mutates, headers)
+
+            timings = []
+            queries = []
+            status = None
+            for _ in range(options['iterations']):
+                elapsed, query_count, status, size = self._run(request, url, data, mutates, headers)
+                timings.append(elapsed * 1000)
+                queries.append(query_count)
+
+            results[name] = {
+                'url': url,
+                'method': method.upper(),
+                'status': status,
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'queries': max(queries),
+                'bytes': size,
+            }
+            self.stderr.write(
+                f'{name}: p50={results[name]["p50_ms"]}ms queries={results[name]["queries"]} bytes={size}'
+            )
+
+        report = {
+            'meta': {
+                'commit': self._git_commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'users': User.objects.count(),
+                'designs': Design.objects.count(),
+            },
+            'results': results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Wrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def _run(self, request, url, data, mutates, headers):
+        """Time one request; roll back anything a mutating view writes"""
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with transaction.atomic() if mutates else nullcontext():
+            with connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                response = request(url, data, headers=headers) if data else request(url, headers=headers)
+                elapsed = time.perf_counter() - start
+            if mutates:
+                transaction.set_rollback(True)
+        return elapsed, queries[0], response.status_code, len(response.content)
+
+    def _pick_creator(self):
+        """The creator with the most designs, and one of their designs"""
+        top = (
+            Design.objects.values('creator')
+            .annotate(n=Count('id'))
+            .order_by('-n')
+            .first()
+        )
+        if top is None:
+            raise CommandError('No designs found. Run seed_scale first.')
+        creator = User.objects.get(pk=top['creator'])
+        design = Design.objects.filter(creator=creator).first()
+        return creator, design
+
+    def _git_commit(self):
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+            ).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
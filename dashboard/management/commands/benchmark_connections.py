@@ -0,0 +1,75 @@
+"""
+Management command to compare database connection strategies
+"""
+import json
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import ConnectionHandler
+
+from dashboard.management.commands.benchmark import percentile
+from picu.db import CONNECTION_MODES, database_config
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request connection cost of each DB_CONNECTION_MODE against DATABASE_URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Simulated requests per mode')
+        parser.add_argument('--modes', default=','.join(CONNECTION_MODES), help='Comma-separated modes')
+        parser.add_argument('--output', default='', help='Write JSON to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        url = os.getenv('DATABASE_URL')
+        if not url or not url.startswith(('postgres://', 'postgresql://')):
+            raise CommandError('Set DATABASE_URL to a PostgreSQL database to benchmark connections.')
+
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip()]
+        results = {}
+        for mode in modes:
+            alias = f'benchmark_{mode}'
+            config = database_config(url, mode)
+            # ConnectionHandler insists on a 'default' entry; it is never opened
+            handler = ConnectionHandler({'default': config, alias: config})
+            conn = handler[alias]
+            try:
+                timings = self._simulate_requests(conn, options['iterations'])
+            finally:
+                conn.close()
+                if conn.pool:
+                    conn.close_pool()
+
+            results[mode] = {
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'first_ms': round(timings[0], 3),
+            }
+            self.stderr.write(f'{mode}: p50={results[mode]["p50_ms"]}ms first={results[mode]["first_ms"]}ms')
+
+        output = json.dumps({'iterations': options['iterations'], 'results': results}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Wrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def _simulate_requests(self, conn, iterations):
+        """
+        Time the DB part of a request: connect (or reuse), one query, then
+        the request_finished cleanup Django runs after every response
+        """
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            timings.append((time.perf_counter() - start) * 1000)
+            # What close_old_connections() does on request_started/finished
+            conn.close_if_unusable_or_obsolete()
+        return timings
@@ -0,0 +1,79 @@
+"""
+Management command to measure order ingestion throughput from a JSON Lines file
+"""
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from designs.models import DesignProduct
+from payouts.ingest import BATCH_SIZE, ingest_events, read_jsonl, rebuild_design_sales
+from payouts.models import RoyaltyEntry
+
+# Events per second on one core that order ingestion is expected to reach
+TARGET_EVENTS_PER_SECOND = 50_000
+
+
+class Command(BaseCommand):
+    help = 'Write synthetic order events to a file, ingest them, report events per second as JSON and clean up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=200_000, help='Order events to ingest')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Events per batch')
+        parser.add_argument('--keep', action='store_true', help='Leave the ledger entries in place')
+        parser.add_argument('--output', default='', help='Write JSON to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['events'] <= 0 or options['batch_size'] <= 0:
+            raise CommandError('--events and --batch-size must be positive.')
+        skus = list(DesignProduct.objects.values_list('sku', flat=True)[:10_000])
+        if not skus:
+            raise CommandError('No design products; run manage.py seed_scale first.')
+
+        prefix = f'benchmark-{uuid.uuid4().hex[:8]}-'
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                for i in range(options['events']):
+                    fh.write(json.dumps({
+                        'id': f'{prefix}{i}', 'sku': random.choice(skus), 'quantity': 1,
+                        'amount': '125000.00', 'occurred_at': '2026-09-01T10:00:00+07:00',
+                    }) + '\n')
+
+            with open(path) as fh:
+                start = time.perf_counter()
+                stats = ingest_events(read_jsonl(fh), batch_size=options['batch_size'])
+                seconds = time.perf_counter() - start
+        finally:
+            os.remove(path)
+            if not options['keep']:
+                RoyaltyEntry.objects.filter(reference__startswith=prefix).delete()
+                rebuild_design_sales()
+
+        rate = options['events'] / seconds
+        result = {
+            'database': connection.vendor,
+            'events': options['events'],
+            'batch_size': options['batch_size'],
+            'skus': len(skus),
+            'created': stats['created'],
+            'seconds': round(seconds, 3),
+            'events_per_second': round(rate),
+            'target_events_per_second': TARGET_EVENTS_PER_SECOND,
+            'meets_target': rate >= TARGET_EVENTS_PER_SECOND,
+        }
+        self.stderr.write(f'{connection.vendor}: {result["events_per_second"]:,} events/s '
+                          f'(target {TARGET_EVENTS_PER_SECOND:,})')
+
+        output = json.dumps(result, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Wrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
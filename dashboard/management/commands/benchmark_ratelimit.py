@@ -0,0 +1,66 @@
+"""
+Management command to measure the rate limiter's overhead per request
+"""
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from accounts.models import User
+from dashboard.management.commands.benchmark import percentile
+from picu.ratelimit import check
+
+
+class Command(BaseCommand):
+    help = 'Time rate limit checks against the configured cache and report latency as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Measured checks')
+        parser.add_argument('--users', type=int, default=100, help='Distinct users (buckets) to spread checks over')
+        parser.add_argument('--output', default='', help='Write JSON to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = []
+        for i in range(options['users']):
+            request = factory.post('/designs/upload/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}')
+            # Unsaved users: the limiter only reads pk, role and is_authenticated
+            request.user = User(pk=f'00000000-0000-0000-0000-{i:012d}', role='creator')
+            requests.append(request)
+
+        # Large buckets so every check takes the full path through both buckets
+        limits = {'benchmark': {'creator': (10**9, 3600), 'ip': (10**9, 3600)}}
+        with override_settings(RATE_LIMITS=limits):
+            for request in requests:
+                check(request, 'benchmark')  # Warm up connections and keys
+            timings = []
+            for i in range(options['iterations']):
+                request = requests[i % len(requests)]
+                start = time.perf_counter()
+                check(request, 'benchmark')
+                timings.append((time.perf_counter() - start) * 1000)
+
+        cache = caches['default']
+        result = {
+            'cache_backend': f'{cache.__class__.__module__}.{cache.__class__.__name__}',
+            'iterations': options['iterations'],
+            'buckets_per_check': 2,
+            'p50_ms': round(percentile(timings, 50), 4),
+            'p95_ms': round(percentile(timings, 95), 4),
+            'p99_ms': round(percentile(timings, 99), 4),
+            'mean_ms': round(statistics.fmean(timings), 4),
+            'limits': settings.RATE_LIMITS,
+        }
+        self.stderr.write(f'{result["cache_backend"]}: p50={result["p50_ms"]}ms p99={result["p99_ms"]}ms per check')
+
+        output = json.dumps(result, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Wrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,85 @@
+"""
+Management command to measure batch SKU resolution at different batch sizes
+"""
+import json
+import random
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.management.commands.benchmark import percentile
+from designs.models import DesignProduct
+from designs.skus import invalidate_skus, resolve_skus
+
+
+class Command(BaseCommand):
+    help = 'Time resolve_skus() cold (database) and warm (cache) for batch sizes from 1 to 10k, as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,10,100,1000,10000', help='Comma-separated batch sizes')
+        parser.add_argument('--iterations', type=int, default=20, help='Measured lookups per size and mode')
+        parser.add_argument('--output', default='', help='Write JSON to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError(f'Invalid --sizes {options["sizes"]!r}.')
+
+        skus = list(DesignProduct.objects.values_list('sku', flat=True))
+        if not skus:
+            raise CommandError('No design products; run manage.py seed_scale first.')
+        if max(sizes) > len(skus):
+            self.stderr.write(self.style.WARNING(f'Only {len(skus)} SKUs exist; larger batches are capped.'))
+
+        rows = []
+        # Force caching on, even with the per-process LocMemCache used in development
+        with override_settings(SKU_CACHE_TIMEOUT=600):
+            for size in sizes:
+                size = min(size, len(skus))
+                cold, warm, queries = [], [], 0
+                for _ in range(options['iterations']):
+                    batch = random.sample(skus, size)
+                    invalidate_skus(batch)
+                    with CaptureQueriesContext(connection) as captured:
+                        start = time.perf_counter()
+                        resolve_skus(batch)
+                        cold.append((time.perf_counter() - start) * 1000)
+                    queries = max(queries, len(captured))
+                    start = time.perf_counter()
+                    resolve_skus(batch)
+                    warm.append((time.perf_counter() - start) * 1000)
+                rows.append({
+                    'batch_size': size,
+                    'queries': queries,
+                    'cold_p50_ms': round(percentile(cold, 50), 3),
+                    'cold_p95_ms': round(percentile(cold, 95), 3),
+                    'warm_p50_ms': round(percentile(warm, 50), 3),
+                    'warm_p95_ms': round(percentile(warm, 95), 3),
+                    'cold_us_per_sku': round(percentile(cold, 50) * 1000 / size, 2),
+                    'warm_us_per_sku': round(percentile(warm, 50) * 1000 / size, 2),
+                })
+                self.stderr.write(
+                    f'{size:>6} SKUs: cold p50={rows[-1]["cold_p50_ms"]}ms ({rows[-1]["queries"]} queries), '
+                    f'warm p50={rows[-1]["warm_p50_ms"]}ms'
+                )
+
+        backend = caches['default']
+        result = {
+            'database': connection.vendor,
+            'cache_backend': f'{backend.__class__.__module__}.{backend.__class__.__name__}',
+            'skus_available': len(skus),
+            'iterations': options['iterations'],
+            'sizes': rows,
+        }
+        output = json.dumps(result, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Wrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,96 @@
+"""
+Management command to measure peak memory of the design upload path
+"""
+import json
+import os
+import tracemalloc
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from picu import supabase_storage
+
+
+def _drain_transport():
+    """Mock Supabase that consumes the body chunk by chunk, like a socket write"""
+    import httpx
+
+    class DrainTransport(httpx.BaseTransport):
+        # httpx.MockTransport reads the whole body first, which would hide the difference
+        def handle_request(self, request):
+            received = 0
+            for chunk in request.stream:
+                received += len(chunk)
+            return httpx.Response(200, json={'Key': request.url.path, 'size': received})
+
+    return DrainTransport()
+
+
+def _make_upload(size):
+    """A spooled-to-disk upload like Django creates for large files"""
+    upload = TemporaryUploadedFile('bench.png', 'image/png', size, None)
+    block = os.urandom(1024 * 1024)
+    remaining = size
+    while remaining > 0:
+        upload.write(block[:min(len(block), remaining)])
+        remaining -= len(block)
+    upload.seek(0)
+    return upload
+
+
+class Command(BaseCommand):
+    help = 'Compare peak memory of streaming vs whole-file uploads to a mock Supabase'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,5,20', help='Comma-separated file sizes in MB')
+        parser.add_argument('--output', default='', help='Write JSON to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        import httpx
+
+        client = httpx.Client(transport=_drain_transport())
+        previous_client = supabase_storage._http_client
+        supabase_storage._http_client = client
+
+        results = {}
+        try:
+            with override_settings(SUPABASE_URL='https://bench.supabase.co', SUPABASE_KEY='bench'):
+                for size_mb in [int(s) for s in options['sizes'].split(',') if s.strip()]:
+                    size = size_mb * 1024 * 1024
+                    results[f'{size_mb}MB'] = {
+                        'streaming_peak_kb': self._measure(size, self._streaming),
+                        'whole_file_peak_kb': self._measure(size, lambda f: self._whole_file(client, f)),
+                    }
+                    self.stderr.write(f'{size_mb}MB: {results[f"{size_mb}MB"]}')
+        finally:
+            supabase_storage._http_client = previous_client
+            client.close()
+
+        output = json.dumps({'chunk_size': supabase_storage.UPLOAD_CHUNK_SIZE, 'results': results}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Wrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def _measure(self, size, upload):
+        upload_file = _make_upload(size)
+        try:
+            tracemalloc.start()
+            upload(upload_file)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            upload_file.close()
+        return round(peak / 1024, 1)
+
+    def _streaming(self, upload_file):
+        supabase_storage.upload_design_image(upload_file, 'benchmark')
+
+    def _whole_file(self, client, upload_file):
+        """The previous implementation: one bytes object per upload"""
+        upload_file.seek(0)
+        content = upload_file.read()
+        client.post('https://bench.supabase.co/storage/v1/object/designs/benchmark/bench.png', content=content)
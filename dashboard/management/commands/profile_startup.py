@@ -0,0 +1,112 @@
+"""
+Management command to profile what a cold process imports before serving its first request
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a fresh WSGI worker does before it can route a request
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': sorted(sys.modules)}))
+"""
+
+
+def measure_startup(importtime=False):
+    """
+    Run django.setup() plus URLconf loading in a fresh interpreter
+
+    Returns:
+        Tuple of (seconds, imported module names, -X importtime lines)
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'picu.settings')}
+    result = subprocess.run(
+        command + ['-c', PROBE], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    lines = [line for line in result.stderr.splitlines() if line.startswith('import time:')]
+    return report['seconds'], report['modules'], lines
+
+
+def parse_importtime(lines):
+    """
+    Parse -X importtime output
+
+    Returns:
+        List of dicts with module, self_us, cumulative_us and depth
+    """
+    modules = []
+    for line in lines:
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # The header line
+        modules.append({
+            'module': name.strip(),
+            'self_us': self_us,
+            'cumulative_us': cumulative_us,
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Report per-module import costs of django.setup() plus URLconf loading in a fresh process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=30, help='Modules to list, by cumulative time')
+        parser.add_argument('--prefix', default='', help='Only modules starting with this (e.g. picu or designs)')
+        parser.add_argument('--output', default='', help='Write JSON to this file instead of a table')
+
+    def handle(self, *args, **options):
+        # A run without -X importtime gives the real wall time; tracing adds overhead
+        try:
+            seconds, modules, _ = measure_startup()
+            _, _, lines = measure_startup(importtime=True)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        costs = parse_importtime(lines)
+        if options['prefix']:
+            costs = [c for c in costs if c['module'].startswith(options['prefix'])]
+        costs.sort(key=lambda c: c['cumulative_us'], reverse=True)
+        top = costs[:options['top']]
+
+        budget = settings.STARTUP_BUDGET_SECONDS
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({
+                    'seconds': round(seconds, 4),
+                    'budget_seconds': budget,
+                    'modules_loaded': len(modules),
+                    'top': top,
+                }, fh, indent=2)
+                fh.write('\n')
+            self.stderr.write(self.style.SUCCESS(f'✅ Wrote {options["output"]}'))
+        else:
+            self.stdout.write(f'{"cumulative ms":>14} {"self ms":>9}  module')
+            for cost in top:
+                self.stdout.write(
+                    f'{cost["cumulative_us"] / 1000:>14.1f} {cost["self_us"] / 1000:>9.1f}  '
+                    f'{"  " * cost["depth"]}{cost["module"]}'
+                )
+
+        summary = f'Startup {seconds * 1000:.0f} ms (budget {budget * 1000:.0f} ms), {len(modules)} modules'
+        style = self.style.SUCCESS if seconds <= budget else self.style.ERROR
+        self.stderr.write(style(summary))
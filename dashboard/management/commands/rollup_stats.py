@@ -0,0 +1,114 @@
+"""
+Management command to fold new design status events into daily rollups
+"""
+import bisect
+from collections import defaultdict
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.models import REVIEW_BUCKETS, DailyDesignStats, RollupCursor
+from designs.models import DesignStatusEvent
+
+CURSOR_NAME = 'design_status_events'
+STATS_TIMEZONE = ZoneInfo('Asia/Jakarta')
+COUNTED_EVENTS = ('uploaded', 'approved', 'rejected', 'deleted')
+
+# Events younger than this are left for the next run: a transaction that
+# took a lower id may still be committing, and its event must not be skipped
+SAFETY_LAG = timedelta(minutes=5)
+
+
+def _empty():
+    return {
+        'uploaded': 0, 'approved': 0, 'rejected': 0, 'deleted': 0,
+        'reviews': 0, 'review_seconds': 0,
+        'review_histogram': [0] * (len(REVIEW_BUCKETS) + 1),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Aggregate new design status events into daily per-creator and global stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Events per transaction')
+        parser.add_argument('--rebuild', action='store_true', help='Drop all rollups and start from the first event')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                DailyDesignStats.objects.all().delete()
+                RollupCursor.objects.filter(name=CURSOR_NAME).delete()
+
+        cutoff = timezone.now() - SAFETY_LAG
+        total = 0
+        while True:
+            folded = self._fold_batch(options['batch_size'], cutoff)
+            total += folded
+            if folded < options['batch_size']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Done! Folded {total} events.'))
+
+    @transaction.atomic
+    def _fold_batch(self, batch_size, cutoff):
+        """Aggregate one batch and advance the cursor in the same transaction"""
+        cursor, _ = RollupCursor.objects.select_for_update().get_or_create(name=CURSOR_NAME)
+
+        events = list(
+            DesignStatusEvent.objects.filter(id__gt=cursor.last_event_id, created_at__lt=cutoff)
+            .order_by('id')
+            .values_list('id', 'created_at', 'creator_id', 'event', 'review_seconds')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        totals = defaultdict(_empty)
+        for _, created_at, creator_id, event, review_seconds in events:
+            if event not in COUNTED_EVENTS:
+                continue
+            day = timezone.localtime(created_at, STATS_TIMEZONE).date()
+            for key in ((day, creator_id), (day, None)):
+                row = totals[key]
+                row[event] += 1
+                if review_seconds is not None:
+                    row['reviews'] += 1
+                    row['review_seconds'] += review_seconds
+                    row['review_histogram'][bisect.bisect_left(REVIEW_BUCKETS, review_seconds)] += 1
+
+        self._merge(totals)
+
+        cursor.last_event_id = events[-1][0]
+        cursor.save(update_fields=['last_event_id', 'updated_at'])
+        return len(events)
+
+    def _merge(self, totals):
+        """Add batch totals to existing rows; one read, one bulk update, one bulk insert"""
+        days = {day for day, _ in totals}
+        existing = {
+            (row.day, row.creator_id): row
+            for row in DailyDesignStats.objects.select_for_update().filter(day__in=days)
+            if (row.day, row.creator_id) in totals
+        }
+
+        to_update, to_create = [], []
+        for (day, creator_id), values in totals.items():
+            row = existing.get((day, creator_id))
+            if row is None:
+                to_create.append(DailyDesignStats(day=day, creator_id=creator_id, **values))
+                continue
+            for field in ('uploaded', 'approved', 'rejected', 'deleted', 'reviews', 'review_seconds'):
+                setattr(row, field, getattr(row, field) + values[field])
+            histogram = row.review_histogram or [0] * len(values['review_histogram'])
+            row.review_histogram = [a + b for a, b in zip(histogram, values['review_histogram'])]
+            to_update.append(row)
+
+        DailyDesignStats.objects.bulk_update(
+            to_update,
+            ['uploaded', 'approved', 'rejected', 'deleted', 'reviews', 'review_seconds', 'review_histogram'],
+            batch_size=500,
+        )
+        DailyDesignStats.objects.bulk_create(to_create, batch_size=500)
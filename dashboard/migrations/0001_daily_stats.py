@@ -0,0 +1,46 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCursor',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyDesignStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Tanggal')),
+                ('uploaded', models.PositiveIntegerField(default=0)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('deleted', models.PositiveIntegerField(default=0)),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('review_seconds', models.BigIntegerField(default=0)),
+                ('review_histogram', models.JSONField(default=list)),
+                ('creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Creator')),
+            ],
+            options={
+                'verbose_name': 'Daily Design Stats',
+                'verbose_name_plural': 'Daily Design Stats',
+                'ordering': ['-day'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'creator'), name='dashboard_daily_stats_creator_day'), models.UniqueConstraint(condition=models.Q(('creator__isnull', True)), fields=('day',), name='dashboard_daily_stats_global_day')],
+            },
+        ),
+    ]
@@ -1,3 +1,80 @@
+"""
+Reporting models for PICU Creator Dashboard
+Daily rollups of DesignStatusEvent, maintained by `manage.py rollup_stats`
+"""
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+# Upper bounds in seconds for time-to-review buckets; the last bucket is open-ended
+REVIEW_BUCKETS = [3600, 6 * 3600, 12 * 3600, 24 * 3600, 48 * 3600, 72 * 3600, 7 * 86400]
+
+
+class DailyDesignStats(models.Model):
+    """
+    Design activity for one day in Asia/Jakarta
+    One row per creator per day, plus a global row with creator empty.
+    """
+    day = models.DateField('Tanggal')
+    creator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Creator'
+    )
+    uploaded = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    
+    # Time-to-review: count and sum for the mean, histogram over
+    # REVIEW_BUCKETS (plus overflow) for the median
+    reviews = models.PositiveIntegerField(default=0)
+    review_seconds = models.BigIntegerField(default=0)
+    review_histogram = models.JSONField(default=list)
+    
+    class Meta:
+        verbose_name = 'Daily Design Stats'
+        verbose_name_plural = 'Daily Design Stats'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'creator'], name='dashboard_daily_stats_creator_day'),
+            models.UniqueConstraint(
+                fields=['day'], condition=Q(creator__isnull=True), name='dashboard_daily_stats_global_day'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.creator_id or 'global'}"
+    
+    @property
+    def median_review_hours(self):
+        """Upper bound of the bucket holding the median, in hours"""
+        return median_review_hours(self.review_histogram)
+
+
+def median_review_hours(histogram):
+    """Median time-to-review from a REVIEW_BUCKETS histogram, rounded up to its bucket"""
+    total = sum(histogram)
+    if not total:
+        return None
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen * 2 >= total:
+            if index < len(REVIEW_BUCKETS):
+                return REVIEW_BUCKETS[index] / 3600
+            return None  # Beyond the last bucket
+    return None
+
+
+class RollupCursor(models.Model):
+    """Last event folded into the rollups, so each run only reads new events"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.last_event_id}"
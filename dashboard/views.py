@@ -1,11 +1,16 @@
 """
 Views for dashboard app
 """
+from datetime import timedelta
+
+from django.conf import settings
 from django.shortcuts import render, redirect
+from django.utils import timezone
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden
 from designs.models import Design, Product
 from accounts.models import User
+from .models import DailyDesignStats, median_review_hours
 
 
 def index(request):
@@ -28,13 +33,7 @@ def dashboard(request):
     
     # Get design statistics for this user
     designs = Design.objects.filter(creator=user)
-    
-    stats = {
-        'total': designs.count(),
-        'approved': designs.filter(status='approved').count(),
-        'pending': designs.filter(status='pending').count(),
-        'rejected': designs.filter(status='rejected').count(),
-    }
+    stats = counters(user)
     
     # Get recent designs
     recent_designs = designs[:5]
@@ -57,15 +56,13 @@ def admin_dashboard(request):
     
     # Get all designs
     all_designs = Design.objects.all()
-    pending_designs = all_designs.filter(status='pending').order_by('-created_at')
+    pending_designs = all_designs.filter(status='pending').select_related('creator').order_by('-created_at')
     
     # Quick stats
     stats = {
         'total_creators': User.objects.filter(role='creator').count(),
-        'total_designs': all_designs.count(),
         'total_products': Product.objects.filter(is_active=True).count(),
-        'pending_reviews': pending_designs.count(),
-        'approved_designs': all_designs.filter(status='approved').count(),
+        **counters(user),
     }
     
     # Recent activity (last 10 designs)
@@ -75,6 +72,50 @@ def admin_dashboard(request):
         'stats': stats,
         'pending_designs': pending_designs[:10],
         'recent_designs': recent_designs,
+        'history': _review_history(settings.STATS_CHART_DAYS),
     }
     
     return render(request, 'dashboard/admin_dashboard.html', context)
+
+
+def counters(user):
+    """
+    Design counters shown on the user's dashboard
+    
+    Keys match the data-stat attributes in the dashboard templates, so
+    HTMX responses can swap them out-of-band after a design changes.
+    """
+    if user.is_admin:
+        counts = Design.status_counts()
+        return {
+            'total_designs': counts['total'],
+            'pending_reviews': counts['pending'],
+            'approved_designs': counts['approved'],
+        }
+    return Design.status_counts(creator=user)
+
+
+def _review_history(days):
+    """Daily global rollups for the chart; one row per day, filled in by rollup_stats"""
+    start = timezone.localdate() - timedelta(days=days - 1)
+    stored = {row.day: row for row in DailyDesignStats.objects.filter(creator__isnull=True, day__gte=start)}
+    if not stored:
+        return None
+    # Days without events have no row; show them as empty bars
+    rows = [stored.get(start + timedelta(days=i)) or DailyDesignStats(day=start + timedelta(days=i)) for i in range(days)]
+    
+    peak = max(max(row.uploaded, row.approved + row.rejected) for row in rows) or 1
+    for row in rows:
+        row.uploaded_pct = round(row.uploaded * 100 / peak)
+        row.reviewed_pct = round((row.approved + row.rejected) * 100 / peak)
+    
+    histogram = [sum(bucket) for bucket in zip(*(row.review_histogram for row in rows if row.review_histogram))]
+    reviews = sum(row.reviews for row in rows)
+    return {
+        'days': rows,
+        'uploaded': sum(row.uploaded for row in rows),
+        'approved': sum(row.approved for row in rows),
+        'rejected': sum(row.rejected for row in rows),
+        'mean_review_hours': sum(row.review_seconds for row in rows) / reviews / 3600 if reviews else None,
+        'median_review_hours': median_review_hours(histogram),
+    }
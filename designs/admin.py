@@ -1,18 +1,29 @@
 """
 Django Admin configuration for Design models
 """
-from django.contrib import admin
+import logging
+import math
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Product, Design, DesignProduct
+from picu.admin_mixins import LargeTableAdmin
+from .models import Product, Design, DesignProduct, DesignStatusEvent, ArchivedDesign, StorageUsage
+
+logger = logging.getLogger(__name__)
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     """Admin for Product model"""
-    list_display = ('name', 'category', 'base_cost', 'is_active')
+    list_display = ('name', 'category', 'base_cost', 'is_active', 'mockup_version')
     list_filter = ('category', 'is_active')
     search_fields = ('name',)
     ordering = ('name',)
+    readonly_fields = ('mockup_version',)
 
 
 class DesignProductInline(admin.TabularInline):
@@ -20,20 +31,59 @@ class DesignProductInline(admin.TabularInline):
     model = DesignProduct
     extra = 0
     readonly_fields = ('sku',)
+    autocomplete_fields = ('product',)
+
+
+class PrintResolutionFilter(admin.SimpleListFilter):
+    """Designs on a product whose pixels fall short of its print area at the print DPI"""
+    title = 'Resolusi cetak'
+    parameter_name = 'print_dpi_below'
+    
+    def lookups(self, request, model_admin):
+        from .print_files import print_spec
+        
+        choices = [('unknown', 'Belum diketahui')]
+        for product in Product.objects.filter(is_active=True).only('id', 'name', 'category'):
+            choices.append((str(product.pk), f"Di bawah {print_spec(product)['dpi']} DPI untuk {product.name}"))
+        return choices
+    
+    def queryset(self, request, queryset):
+        from .print_files import print_spec
+        
+        if self.value() is None:
+            return queryset
+        if self.value() == 'unknown':
+            return queryset.filter(image_width__isnull=True)
+        product = Product.objects.filter(pk=self.value()).first()
+        if product is None:
+            return queryset.none()
+        spec = print_spec(product)
+        # The artwork is scaled to fit the print area, so it only prints below
+        # the spec DPI when it is smaller than the area on both axes
+        return queryset.filter(
+            products=product,
+            image_width__lt=math.ceil(spec['width_mm'] / 25.4 * spec['dpi']),
+            image_height__lt=math.ceil(spec['height_mm'] / 25.4 * spec['dpi']),
+        )
 
 
 @admin.register(Design)
-class DesignAdmin(admin.ModelAdmin):
+class DesignAdmin(LargeTableAdmin):
     """Admin for Design model"""
-    list_display = ('title', 'creator_name', 'status_badge', 'created_at')
-    list_filter = ('status', 'created_at')
+    list_display = ('title', 'creator_name', 'status_badge', 'resolution', 'created_at')
+    list_filter = ('status', PrintResolutionFilter, 'image_mode', 'image_has_alpha', 'created_at')
+    list_select_related = ('creator',)
     search_fields = ('title', 'creator__full_name', 'creator__email')
+    search_help_text = 'Judul desain, nama atau email kreator'
+    autocomplete_fields = ('creator',)
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', *Design.IMAGE_METADATA_FIELDS)
     inlines = [DesignProductInline]
+    actions = ['generate_print_files']
     
     fieldsets = (
         ('Info Desain', {'fields': ('title', 'description', 'image', 'creator')}),
+        ('Gambar', {'fields': Design.IMAGE_METADATA_FIELDS}),
         ('Status', {'fields': ('status', 'reject_reason')}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
@@ -42,6 +92,13 @@ class DesignAdmin(admin.ModelAdmin):
         return obj.creator.full_name
     creator_name.short_description = 'Creator'
     
+    def resolution(self, obj):
+        if obj.image_width is None:
+            return '-'
+        dpi = f" @ {obj.image_dpi} DPI" if obj.image_dpi else ''
+        return f"{obj.image_width}×{obj.image_height}{dpi}"
+    resolution.short_description = 'Resolusi'
+    
     def status_badge(self, obj):
         colors = {
             'pending': '#FCD34D',
@@ -54,12 +111,140 @@ class DesignAdmin(admin.ModelAdmin):
             obj.get_status_display()
         )
     status_badge.short_description = 'Status'
+    
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            DesignStatusEvent.record(obj, 'uploaded', actor=request.user)
+            return
+        
+        previous_status = form.initial.get('status', obj.status)
+        super().save_model(request, obj, form, change)
+        if 'status' in form.changed_data and obj.status in ('approved', 'rejected'):
+            event = obj.status
+        else:
+            event = 'edited'
+        DesignStatusEvent.record(obj, event, actor=request.user, from_status=previous_status)
+    
+    def delete_model(self, request, obj):
+        from .print_files import delete_print_files
+        
+        DesignStatusEvent.record(obj, 'deleted', actor=request.user, from_status=obj.status)
+        delete_print_files([obj])
+        super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        from .print_files import delete_print_files
+        
+        for design in queryset.only('id', 'creator_id', 'status', 'created_at'):
+            DesignStatusEvent.record(design, 'deleted', actor=request.user, from_status=design.status)
+        delete_print_files(queryset)
+        super().delete_queryset(request, queryset)
+    
+    @admin.action(description='Generate print files (ZIP)')
+    def generate_print_files(self, request, queryset):
+        """Render print files for the selected approved designs and download them"""
+        from .print_files import generate_print_files, stream_zip
+        
+        design_products = DesignProduct.objects.filter(design__in=queryset)
+        response = StreamingHttpResponse(
+            stream_zip(generate_print_files(design_products)),
+            content_type='application/zip',
+        )
+        filename = f"print-files-{timezone.localtime():%Y%m%d-%H%M}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
 
 @admin.register(DesignProduct)
-class DesignProductAdmin(admin.ModelAdmin):
+class DesignProductAdmin(LargeTableAdmin):
     """Admin for DesignProduct model"""
-    list_display = ('sku', 'design', 'product', 'created_at')
+    list_display = ('sku', 'design', 'product', 'print_file_generated_at', 'created_at')
     list_filter = ('product',)
+    list_select_related = ('design__creator', 'product')  # Design.__str__ reads the creator
     search_fields = ('sku', 'design__title')
-    readonly_fields = ('sku',)
+    search_help_text = 'SKU atau judul desain'
+    autocomplete_fields = ('design', 'product')
+    readonly_fields = ('sku', 'print_file_key', 'print_file_generated_at')
+
+
+@admin.register(DesignStatusEvent)
+class DesignStatusEventAdmin(LargeTableAdmin):
+    """Read-only admin for the design status history"""
+    list_display = ('created_at', 'event', 'design', 'creator', 'actor', 'from_status', 'to_status', 'review_seconds')
+    list_filter = ('event', 'to_status', 'created_at')
+    list_select_related = ('design__creator', 'creator', 'actor')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedDesign)
+class ArchivedDesignAdmin(LargeTableAdmin):
+    """Read-only admin for designs moved out by the retention job, with a restore action"""
+    list_display = ('title', 'creator', 'status', 'image_archived', 'image_attempts', 'updated_at', 'archived_at')
+    list_filter = ('status', 'archived_at')
+    list_select_related = ('creator',)
+    search_fields = ('=id', 'title', 'creator__email')
+    search_help_text = 'ID atau judul desain, email kreator'
+    actions = ['restore']
+    
+    def image_archived(self, obj):
+        return obj.image_archived
+    image_archived.boolean = True
+    image_archived.short_description = 'Image archived'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    @admin.action(description='Restore selected designs')
+    def restore(self, request, queryset):
+        from picu.circuit_breaker import CircuitOpenError
+        from .retention import restore_design
+        
+        restored = 0
+        for archived in queryset:
+            try:
+                restore_design(archived)
+            except CircuitOpenError as e:
+                self.message_user(request, f'Storage unavailable, try again later: {e}', messages.ERROR)
+                break
+            except Exception as e:
+                logger.error(f"Restoring archived design {archived.pk} failed: {type(e).__name__}: {e}")
+                self.message_user(request, f'{archived.title} ({archived.pk}) not restored: {e}', messages.ERROR)
+                continue
+            restored += 1
+        self.message_user(request, f'{restored} designs restored')
+
+
+@admin.register(StorageUsage)
+class StorageUsageAdmin(admin.ModelAdmin):
+    """Storage per creator, largest first; only the quota is editable"""
+    list_display = ('creator', 'used', 'files', 'quota', 'reconciled_at')
+    list_select_related = ('creator',)
+    search_fields = ('creator__email', 'creator__full_name')
+    search_help_text = 'Nama atau email kreator'
+    fields = ('creator', 'bytes', 'files', 'quota_bytes', 'reconciled_at', 'updated_at')
+    readonly_fields = ('creator', 'bytes', 'files', 'reconciled_at', 'updated_at')
+    
+    def used(self, obj):
+        return filesizeformat(obj.bytes)
+    used.short_description = 'Terpakai'
+    used.admin_order_field = 'bytes'
+    
+    def quota(self, obj):
+        quota = settings.STORAGE_QUOTA_BYTES if obj.quota_bytes is None else obj.quota_bytes
+        return filesizeformat(quota) if quota else 'Tanpa batas'
+    quota.short_description = 'Kuota'
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,126 @@
+"""
+Public catalog of approved designs for partners (GET /api/v1/catalog/designs)
+
+Pages are keyset-paginated on (created_at, id), newest first, so reading
+page 1000 costs the same index range scan as page 1. Rows come straight
+from values() queries: one for the page of designs and, only when products
+are requested, one for their SKUs.
+"""
+import base64
+import uuid
+from datetime import datetime
+
+from django.db.models import Q
+
+from .skus import image_path_template
+
+# Public field name -> column read for it (None: derived from other columns)
+FIELDS = {
+    'title': 'title',
+    'description': 'description',
+    'creator': 'creator__display_name',  # Opt-in public name, never the legal one
+    'created_at': 'created_at',
+    'image': None,
+    'products': None,
+}
+
+
+class CatalogError(ValueError):
+    """Bad fields, cursor or limit in a catalog request"""
+
+
+def encode_cursor(created_at, pk) -> str:
+    """Opaque cursor pointing just after a design"""
+    return base64.urlsafe_b64encode(f'{created_at.isoformat()}|{pk}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Raises:
+        CatalogError: The cursor was not made by encode_cursor()
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.split('|')
+        return datetime.fromisoformat(created_at), uuid.UUID(pk)
+    except ValueError:
+        raise CatalogError('Invalid cursor')
+
+
+def parse_fields(value: str):
+    """
+    Fields requested with ?fields=a,b (all when empty); id is always included
+
+    Raises:
+        CatalogError: An unknown field was requested
+    """
+    if not value:
+        return list(FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = sorted(set(fields) - FIELDS.keys() - {'id'})
+    if unknown:
+        raise CatalogError(f"Unknown fields: {', '.join(unknown)}")
+    return [field for field in FIELDS if field in fields]
+
+
+def _products(design_ids):
+    """{design id: [{sku, product, category}]} for active products, from one query"""
+    from .models import DesignProduct
+
+    products = {}
+    rows = (
+        DesignProduct.objects.filter(design_id__in=design_ids, product__is_active=True)
+        .order_by('product__name')
+        .values_list('design_id', 'sku', 'product__name', 'product__category')
+    )
+    for design_id, sku, name, category in rows:
+        products.setdefault(design_id, []).append({'sku': sku, 'product': name, 'category': category})
+    return products
+
+
+def catalog_page(fields, cursor=None, limit=50, origin=''):
+    """
+    One page of approved designs, newest first
+
+    Args:
+        fields: Public field names from parse_fields()
+        cursor: Value of a previous page's next cursor
+        limit: Designs per page
+        origin: Scheme and host prepended to image URLs
+
+    Returns:
+        Tuple of (list of design dicts, cursor of the next page or None)
+    """
+    from .models import Design
+
+    columns = {'id', 'created_at', *(FIELDS[field] for field in fields if FIELDS[field])}
+    designs = Design.objects.filter(status='approved').order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        # The <= bound is what the index range scan uses; the OR only breaks ties
+        designs = designs.filter(created_at__lte=created_at).filter(Q(created_at__lt=created_at) | Q(id__lt=pk))
+    rows = list(designs.values(*columns)[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    products = _products([row['id'] for row in rows]) if 'products' in fields else {}
+    image_path = origin + image_path_template() if 'image' in fields else ''
+    items = []
+    for row in rows:
+        item = {'id': str(row['id'])}
+        for field in fields:
+            if field == 'image':
+                item['image'] = image_path.format(row['id'])
+            elif field == 'products':
+                item['products'] = products.get(row['id'], [])
+            elif field == 'created_at':
+                item['created_at'] = row['created_at'].isoformat()
+            elif field == 'creator':
+                item['creator'] = row['creator__display_name'] or None
+            else:
+                item[field] = row[FIELDS[field]]
+        items.append(item)
+    return items, next_cursor
@@ -0,0 +1,11 @@
+"""
+Template context processors for designs app
+"""
+from django.conf import settings
+
+
+def live_updates(request):
+    """Whether pages connect to the event stream or poll for status changes"""
+    from .live import sse_enabled
+
+    return {'live_sse': sse_enabled(request), 'live_poll_seconds': settings.LIVE_FALLBACK_POLL_SECONDS}
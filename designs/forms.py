@@ -2,13 +2,18 @@
 Forms for designs app
 """
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+from picu.uploads import ImageHeaderError, read_image_metadata, sniff_image
 from .models import Design, Product
 
 
 class DesignUploadForm(forms.ModelForm):
     """Form for uploading a new design"""
     
-    image_file = forms.ImageField(
+    # A plain FileField: ImageField would decode the whole image with Pillow.
+    # clean_image_file() validates from the header instead.
+    image_file = forms.FileField(
         label='File Desain',
         help_text='PNG atau JPG, maksimal 20MB',
         widget=forms.FileInput(attrs={
@@ -25,6 +30,56 @@ class DesignUploadForm(forms.ModelForm):
         help_text='Pilih satu atau lebih produk untuk desain ini',
     )
     
+    def __init__(self, *args, creator=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.creator = creator
+    
+    def clean_image_file(self):
+        """Enforce size, format and pixel limits without decoding the image"""
+        image_file = self.cleaned_data['image_file']
+        max_size = settings.UPLOAD_MAX_FILE_SIZE
+
+        if getattr(image_file, 'too_large', False) or image_file.size > max_size:
+            raise forms.ValidationError(
+                f'Ukuran file maksimal {max_size // (1024 * 1024)}MB.'
+            )
+
+        try:
+            image_format, width, height = sniff_image(image_file)
+        except ImageHeaderError:
+            raise forms.ValidationError('File harus berupa gambar PNG atau JPG yang valid.')
+
+        max_pixels = settings.UPLOAD_MAX_IMAGE_PIXELS
+        if width == 0 or height == 0 or width * height > max_pixels:
+            raise forms.ValidationError(
+                f'Resolusi gambar terlalu besar ({width}x{height}). '
+                f'Maksimal {max_pixels // 1_000_000} megapiksel.'
+            )
+
+        # Trust the header, not the browser-supplied content type
+        image_file.content_type = 'image/png' if image_format == 'PNG' else 'image/jpeg'
+        image_file.image_format = image_format
+        image_file.image_width = width
+        image_file.image_height = height
+
+        # Before any bytes go to storage; concurrent uploads may overshoot by one file
+        if self.creator is not None:
+            from .storage_usage import usage_and_quota
+
+            used, quota = usage_and_quota(self.creator.pk)
+            if quota is not None and used + image_file.size > quota:
+                raise forms.ValidationError(
+                    f'Kuota penyimpanan Anda tidak cukup: terpakai {filesizeformat(used)} '
+                    f'dari {filesizeformat(quota)}. Hapus desain lama untuk mengosongkan ruang.'
+                )
+
+        # Header values only; stored on the design for reviewers and print checks
+        try:
+            image_file.image_metadata = {**read_image_metadata(image_file), 'image_bytes': image_file.size}
+        except ImageHeaderError:
+            raise forms.ValidationError('File harus berupa gambar PNG atau JPG yang valid.')
+        return image_file
+    
     class Meta:
         model = Design
         fields = ['title', 'description']
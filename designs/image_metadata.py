@@ -0,0 +1,147 @@
+"""
+Backfill image metadata for designs uploaded before it was recorded
+
+New uploads get their dimensions, DPI, colour mode, alpha and byte size
+from the form (picu.uploads.read_image_metadata). Older designs are filled
+in here by reading only the head of each image: a ranged GET of
+IMAGE_METADATA_HEAD_BYTES is enough for Pillow to parse the header, and
+Content-Range carries the full object size. Only images whose header runs
+past that range (large EXIF or ICC blocks) are downloaded in full.
+Progress lives in the designs table, so an interrupted run resumes.
+"""
+import io
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from django.conf import settings
+
+from picu import images
+from picu.circuit_breaker import CircuitOpenError
+from picu.uploads import ImageHeaderError, read_image_metadata
+
+logger = logging.getLogger(__name__)
+
+
+def _read_head(image_url: str, limit=None):
+    """
+    First `limit` bytes of a remote image (all of it when None) and its total size
+
+    Returns:
+        Tuple of (bytes, total size in bytes)
+    """
+    from picu.supabase_storage import get_http_client, get_storage_breaker
+
+    from_storage = bool(settings.SUPABASE_URL) and image_url.startswith(settings.SUPABASE_URL)
+    headers = {'Range': f'bytes=0-{limit - 1}'} if limit else {}
+    head = bytearray()
+    size = 0
+    with get_storage_breaker().guard() if from_storage else nullcontext():
+        with get_http_client().stream('GET', image_url, headers=headers) as response:
+            response.raise_for_status()
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            if total.isdigit():
+                size = int(total)
+            elif response.status_code == 200 and response.headers.get('Content-Length', '').isdigit():
+                size = int(response.headers['Content-Length'])  # Range ignored; the body is the whole file
+            for chunk in response.iter_bytes():
+                head += chunk
+                if limit and size and len(head) >= limit:
+                    break
+                if len(head) > settings.UPLOAD_MAX_FILE_SIZE:
+                    raise ValueError(f"Image larger than {settings.UPLOAD_MAX_FILE_SIZE} bytes: {image_url}")
+    return bytes(head[:limit] if limit else head), size or len(head)
+
+
+def fetch_image_metadata(image_url: str) -> dict:
+    """
+    Metadata of one stored design image, named like the Design columns
+
+    Runs in a worker thread and touches no Django models.
+
+    Raises:
+        ImageHeaderError: The image header cannot be read
+        CircuitOpenError: Supabase is failing; no request was made
+    """
+    if image_url.startswith('/media/'):
+        path = images.media_path(image_url)
+        with open(path, 'rb') as fh:
+            return {**read_image_metadata(fh), 'image_bytes': os.path.getsize(path)}
+
+    head, size = _read_head(image_url, settings.IMAGE_METADATA_HEAD_BYTES)
+    try:
+        metadata = read_image_metadata(io.BytesIO(head))
+    except ImageHeaderError:
+        if len(head) >= size:
+            raise
+        head, size = _read_head(image_url)
+        metadata = read_image_metadata(io.BytesIO(head))
+    return {**metadata, 'image_bytes': size}
+
+
+def _missing(batch_size):
+    """Keyset-paginate (id, image) of designs without metadata"""
+    from .models import Design
+
+    queryset = Design.objects.filter(image_bytes__isnull=True).order_by('pk').values_list('pk', 'image')
+    last_pk = None
+    while True:
+        batch = list((queryset.filter(pk__gt=last_pk) if last_pk else queryset)[:batch_size])
+        if not batch:
+            return
+        yield from batch
+        last_pk = batch[-1][0]
+
+
+def backfill_image_metadata(workers=8, batch_size=200):
+    """
+    Record metadata for every design that has none, `workers` images at a time
+
+    Images that fail stay without metadata for the next pass; while the
+    storage circuit breaker is open, the pass stops early.
+
+    Yields:
+        Dicts with 'design', 'status' ('indexed', 'changed', 'deferred',
+        'missing', 'failed') and 'error'
+    """
+    from .models import Design
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='picu-metadata')
+    in_flight = {}
+    breaker_open = False
+
+    def finish(future):
+        nonlocal breaker_open
+        design_id, image_url = in_flight.pop(future)
+        result = {'design': str(design_id), 'error': ''}
+        try:
+            metadata = future.result()
+        except CircuitOpenError as e:
+            breaker_open = True
+            return {**result, 'status': 'deferred', 'error': str(e)}
+        except FileNotFoundError:
+            return {**result, 'status': 'missing', 'error': 'file not found'}
+        except Exception as e:
+            logger.error(f"Reading metadata of {image_url} failed: {type(e).__name__}: {e}")
+            return {**result, 'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+        # Skip designs whose image was replaced while we read the old one
+        updated = Design.objects.filter(pk=design_id, image=image_url).update(**metadata)
+        return {**result, 'status': 'indexed' if updated else 'changed'}
+
+    try:
+        for design_id, image_url in _missing(batch_size):
+            if breaker_open:
+                break
+            while len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield finish(future)
+            in_flight[pool.submit(fetch_image_metadata, image_url)] = (design_id, image_url)
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(future)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,261 @@
+"""
+Live design status updates for PICU Creator Dashboard
+
+DesignStatusEvent rows are the source of truth. On PostgreSQL each event
+also sends a NOTIFY on CHANNEL inside the writing transaction, and one
+listener thread per process receives them; on other databases the thread
+polls the event table instead. The Broadcaster fans events out to the
+server-sent event streams connected to this process.
+
+A stream holds a sync WSGI worker for as long as it is open, so streams are
+only offered over ASGI or with LIVE_SSE_ENABLED; elsewhere pages poll
+updates_since() every LIVE_FALLBACK_POLL_SECONDS instead.
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'picu_design_status'
+SUBSCRIBER_QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+
+
+def sse_enabled(request) -> bool:
+    from django.core.handlers.asgi import ASGIRequest
+
+    return settings.LIVE_SSE_ENABLED or isinstance(request, ASGIRequest)
+
+
+def updates_since(user, after=None, since=None, limit=500):
+    """
+    Latest status per design from the events after event id `after` (or
+    created at or after `since`), limited to the user's designs unless admin
+
+    Returns:
+        Tuple of ({design id: status}, id of the last event read or None)
+    """
+    from .models import DesignStatusEvent
+
+    events = DesignStatusEvent.objects.order_by('id')
+    if not user.is_admin:
+        events = events.filter(creator=user)
+    if after is not None:
+        events = events.filter(id__gt=after)
+    else:
+        events = events.filter(created_at__gte=since)
+    rows = list(events.values_list('id', 'design_id', 'to_status')[:limit])
+    statuses = {design_id: status for _, design_id, status in rows if design_id and status}
+    return statuses, rows[-1][0] if rows else after
+
+
+def notify(event):
+    """Send a status event to listeners; delivered when the transaction commits"""
+    if connection.vendor != 'postgresql':
+        return  # The polling listener reads the event table itself
+    payload = json.dumps({
+        'id': event.id,
+        'design': str(event.design_id) if event.design_id else None,
+        'creator': str(event.creator_id),
+        'event': event.event,
+        'status': event.to_status,
+    })
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+
+class Subscription:
+    """One connected stream; fed from the listener thread"""
+
+    def __init__(self, user_id, is_admin):
+        self.user_id = str(user_id)
+        self.is_admin = is_admin
+        self.loop = None
+        self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def bind_loop(self, loop):
+        """Deliver on an event loop instead of to a blocking thread"""
+        self.loop = loop
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+
+    def wants(self, event) -> bool:
+        return self.is_admin or event['creator'] == self.user_id
+
+    def put(self, message):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._put_nowait, message)
+        else:
+            self._put_nowait(message)
+
+    def _put_nowait(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except (queue.Full, asyncio.QueueFull):
+            # A client this far behind reconnects and renders fresh state
+            self.overflowed = True
+
+
+class Broadcaster:
+    """Process-wide fan-out of status events to subscriptions"""
+
+    def __init__(self):
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.active_since = None
+
+    def subscribe(self, subscription):
+        from django.utils import timezone
+
+        with self.lock:
+            if not self.subscriptions:
+                self.active_since = timezone.now()
+            self.subscriptions.add(subscription)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='picu-live', daemon=True)
+                self.thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def dispatch(self, events):
+        """Render each event once and hand it to the subscriptions that want it"""
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        if not subscriptions or not events:
+            return
+
+        messages = []
+        for event in events:
+            if event['design'] and event['status']:
+                html = render_to_string('designs/partials/status_badge.html', {'status': event['status']})
+                messages.append((event, f"design-{event['design']}", html))
+
+        pending_count = None
+        if any(s.is_admin for s in subscriptions):
+            from .models import Design
+            pending_count = str(Design.objects.filter(status='pending').count())
+
+        for subscription in subscriptions:
+            for event, name, html in messages:
+                if subscription.wants(event):
+                    subscription.put((name, html))
+            if subscription.is_admin:
+                subscription.put(('pending-count', pending_count))
+
+    def _run(self):
+        while True:
+            try:
+                if connections['default'].vendor == 'postgresql':
+                    self._listen()
+                else:
+                    self._poll()
+            except Exception as e:
+                logger.error(f"Live listener failed, restarting: {type(e).__name__}: {e}")
+                time.sleep(settings.LIVE_POLL_INTERVAL)
+            finally:
+                close_old_connections()
+
+    def _listen(self):
+        """Receive NOTIFY payloads on a dedicated autocommit connection"""
+        import psycopg
+
+        url = getattr(settings, 'LIVE_DATABASE_URL', '')
+        if url:
+            # LISTEN needs a session; transaction-mode poolers cannot hold one
+            conn = psycopg.connect(url, autocommit=True)
+        else:
+            conn = psycopg.connect(**connections['default'].get_connection_params(), autocommit=True)
+        with conn:
+            conn.execute(f'LISTEN {CHANNEL}')
+            logger.info(f"Listening on {CHANNEL}")
+            while True:
+                batch = [json.loads(n.payload) for n in conn.notifies(timeout=HEARTBEAT_SECONDS, stop_after=100)]
+                self.dispatch(batch)
+
+    def _poll(self):
+        """Stand-in for LISTEN/NOTIFY: read new rows from the event table"""
+        from .models import DesignStatusEvent
+
+        last_id = None
+        while True:
+            time.sleep(settings.LIVE_POLL_INTERVAL)
+            with self.lock:
+                idle = not self.subscriptions
+            if idle:
+                last_id = None  # Nobody to tell about what happens meanwhile
+                continue
+            if last_id is None:
+                # Start from the first event since somebody subscribed
+                last_id = DesignStatusEvent.objects.filter(
+                    created_at__lt=self.active_since
+                ).order_by('-id').values_list('id', flat=True).first() or 0
+            rows = list(
+                DesignStatusEvent.objects.filter(id__gt=last_id).order_by('id')
+                .values('id', 'design_id', 'creator_id', 'event', 'to_status')[:500]
+            )
+            close_old_connections()
+            if not rows:
+                continue
+            last_id = rows[-1]['id']
+            self.dispatch([{
+                'id': row['id'],
+                'design': str(row['design_id']) if row['design_id'] else None,
+                'creator': str(row['creator_id']),
+                'event': row['event'],
+                'status': row['to_status'],
+            } for row in rows])
+
+
+broadcaster = Broadcaster()
+
+
+def _format(name, data) -> str:
+    lines = ''.join(f'data: {line}\n' for line in data.splitlines() or [''])
+    return f'event: {name}\n{lines}\n'
+
+
+def stream(subscription, max_seconds):
+    """Threaded fallback: one worker thread per client, closed after max_seconds"""
+    deadline = time.monotonic() + max_seconds
+    broadcaster.subscribe(subscription)
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MS}\n\n'
+        while time.monotonic() < deadline and not subscription.overflowed:
+            try:
+                name, data = subscription.queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            yield _format(name, data)
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+async def astream(subscription, max_seconds):
+    """ASGI stream: waits on the event loop without holding a thread"""
+    deadline = time.monotonic() + max_seconds
+    subscription.bind_loop(asyncio.get_running_loop())
+    broadcaster.subscribe(subscription)
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MS}\n\n'
+        while time.monotonic() < deadline and not subscription.overflowed:
+            try:
+                name, data = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+            yield _format(name, data)
+    finally:
+        broadcaster.unsubscribe(subscription)
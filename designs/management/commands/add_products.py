@@ -16,42 +16,49 @@ class Command(BaseCommand):
                 'description': 'Kaos premium bahan Cotton Combed 30s, lembut dan nyaman',
                 'category': 'apparel',
                 'base_cost': Decimal('45000'),
+                'print_area': {'x': 0.3, 'y': 0.25, 'width': 0.4, 'height': 0.45},
             },
             {
                 'name': 'Kaos Cotton Combed 24s',
                 'description': 'Kaos standar bahan Cotton Combed 24s, tebal dan kuat',
                 'category': 'apparel',
                 'base_cost': Decimal('40000'),
+                'print_area': {'x': 0.3, 'y': 0.25, 'width': 0.4, 'height': 0.45},
             },
             {
                 'name': 'Hoodie',
                 'description': 'Hoodie pullover bahan fleece tebal',
                 'category': 'apparel',
                 'base_cost': Decimal('85000'),
+                'print_area': {'x': 0.3, 'y': 0.32, 'width': 0.4, 'height': 0.3},
             },
             {
                 'name': 'Hoodie Zipper',
                 'description': 'Hoodie dengan zipper depan bahan fleece',
                 'category': 'apparel',
                 'base_cost': Decimal('95000'),
+                'print_area': {'x': 0.55, 'y': 0.28, 'width': 0.15, 'height': 0.15},
             },
             {
                 'name': 'Crewneck',
                 'description': 'Sweater crewneck bahan fleece premium',
                 'category': 'apparel',
                 'base_cost': Decimal('80000'),
+                'print_area': {'x': 0.3, 'y': 0.28, 'width': 0.4, 'height': 0.4},
             },
             {
                 'name': 'Mug Ceramic',
                 'description': 'Mug keramik 11oz untuk sublimasi',
                 'category': 'merchandise',
                 'base_cost': Decimal('25000'),
+                'print_area': {'x': 0.2, 'y': 0.3, 'width': 0.45, 'height': 0.4},
             },
             {
                 'name': 'Keychain Acrylic',
                 'description': 'Gantungan kunci akrilik custom print',
                 'category': 'merchandise',
                 'base_cost': Decimal('15000'),
+                'print_area': {'x': 0.3, 'y': 0.3, 'width': 0.4, 'height': 0.4},
             },
         ]
 
@@ -0,0 +1,73 @@
+"""
+Management command to archive designs past retention and move their images to cold storage
+"""
+import uuid
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from designs.models import ArchivedDesign
+from designs.retention import archivable, archive_designs, archive_images, restore_design
+from picu.circuit_breaker import CircuitOpenError
+
+
+class Command(BaseCommand):
+    help = 'Move designs matching DESIGN_RETENTION_DAYS to the archive in batches, then their images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Designs archived per transaction')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to wait between batches')
+        parser.add_argument('--images-limit', type=int, default=1000, help='Most images moved in this run')
+        parser.add_argument('--skip-images', action='store_true', help='Only archive rows; move images on a later run')
+        parser.add_argument('--dry-run', action='store_true', help='Count the designs due for archiving and stop')
+        parser.add_argument('--restore', nargs='+', metavar='ID', help='Restore these archived designs instead')
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            return self.restore(options['restore'])
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        if options['dry_run']:
+            self.stdout.write(f'{archivable().count()} designs due for archiving')
+            return
+
+        archived = 0
+        for count in archive_designs(options['batch_size'], options['max_batches'], options['pause']):
+            archived += count
+            self.stdout.write(f'Archived {count} designs ({archived} so far)')
+
+        counts = Counter()
+        if not options['skip_images']:
+            for result in archive_images(options['images_limit']):
+                counts[result['status']] += 1
+                if result['error']:
+                    self.stderr.write(self.style.ERROR(f"{result['design']}: {result['error']}"))
+
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items()))
+        self.stderr.write(self.style.SUCCESS(
+            f'✅ Archived {archived} designs. Images {summary or "up to date"}'
+        ))
+
+    def restore(self, ids):
+        try:
+            ids = [str(uuid.UUID(i)) for i in ids]
+        except ValueError:
+            raise CommandError('Archived design ids must be UUIDs.')
+        archived = list(ArchivedDesign.objects.filter(pk__in=ids))
+        missing = set(ids) - {str(design.pk) for design in archived}
+        if missing:
+            raise CommandError(f"Not in the archive: {', '.join(sorted(missing))}")
+        restored = 0
+        for design in archived:
+            try:
+                restore_design(design)
+            except CircuitOpenError as e:
+                raise CommandError(f'{design.pk}: {e}')
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f'{design.pk}: {type(e).__name__}: {e}'))
+                continue
+            restored += 1
+            self.stdout.write(f'Restored {design.pk} ({design.title})')
+        self.stderr.write(self.style.SUCCESS(f'✅ Restored {restored} of {len(archived)} designs'))
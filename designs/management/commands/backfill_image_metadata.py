@@ -0,0 +1,31 @@
+"""
+Management command to record image metadata for designs uploaded before it was stored
+"""
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from designs.image_metadata import backfill_image_metadata
+
+
+class Command(BaseCommand):
+    help = 'Read dimensions, DPI, colour mode, alpha and size from the header of each design image without them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Images read concurrently')
+        parser.add_argument('--batch-size', type=int, default=200, help='Designs read per query')
+
+    def handle(self, *args, **options):
+        if options['workers'] <= 0:
+            raise CommandError('--workers must be positive.')
+
+        counts = Counter()
+        for result in backfill_image_metadata(options['workers'], options['batch_size']):
+            counts[result['status']] += 1
+            if result['error']:
+                self.stderr.write(self.style.ERROR(f"{result['design']}: {result['error']}"))
+            if sum(counts.values()) % 1000 == 0:
+                self.stdout.write(f'{sum(counts.values())} designs read')
+
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items()))
+        self.stderr.write(self.style.SUCCESS(f'✅ Backfill done. {summary or "every design has metadata"}'))
@@ -0,0 +1,47 @@
+"""
+Management command to generate print-ready files for approved SKUs
+"""
+import csv
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from designs.models import DesignProduct
+from designs.print_files import MANIFEST_FIELDS, generate_print_files, stream_zip
+
+
+class Command(BaseCommand):
+    help = 'Generate print-ready files for approved designs, skipping SKUs that are up to date'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sku', action='append', default=[], help='Only this SKU (repeatable)')
+        parser.add_argument('--workers', type=int, default=0, help='Process pool size (default PRINT_FILE_WORKERS)')
+        parser.add_argument('--force', action='store_true', help='Regenerate files that are up to date')
+        parser.add_argument('--zip', default='', help='Also write the files and manifest.csv to this ZIP')
+
+    def handle(self, *args, **options):
+        queryset = DesignProduct.objects.all()
+        if options['sku']:
+            queryset = queryset.filter(sku__in=options['sku'])
+
+        results = self._report(generate_print_files(queryset, options['workers'] or None, options['force']))
+
+        if options['zip']:
+            with open(options['zip'], 'wb') as fh:
+                for chunk in stream_zip(results):
+                    fh.write(chunk)
+        else:
+            writer = csv.DictWriter(self.stdout, fieldnames=MANIFEST_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(results)
+
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(self.counts.items()))
+        self.stderr.write(self.style.SUCCESS(f'\n✅ Done! {summary or "no approved SKUs"}'))
+
+    def _report(self, results):
+        self.counts = Counter()
+        for result in results:
+            self.counts[result['status']] += 1
+            if result['status'] == 'failed':
+                self.stderr.write(self.style.ERROR(f"{result['sku']}: {result['error']}"))
+            yield result
@@ -0,0 +1,44 @@
+"""
+Management command to move locally saved design images into Supabase Storage
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from designs.storage_migration import migrate_local_images
+
+
+class Command(BaseCommand):
+    help = 'Upload design images stored on local media to Supabase and point the designs at them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent uploads')
+        parser.add_argument('--rate', type=float, default=5.0, help='Max uploads per second, shared by all migrators')
+        parser.add_argument('--batch-size', type=int, default=200, help='Designs read per query')
+        parser.add_argument('--loop', action='store_true', help='Keep running, starting a new pass every --interval')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+            raise CommandError('SUPABASE_URL and SUPABASE_KEY must be set to migrate local media.')
+        if options['rate'] <= 0:
+            raise CommandError('--rate must be positive.')
+
+        while True:
+            counts = Counter()
+            for result in migrate_local_images(options['workers'], options['rate'], options['batch_size']):
+                counts[result['status']] += 1
+                if result['status'] == 'migrated':
+                    self.stdout.write(f"{result['design']}: {result['local']} -> {result['url']}")
+                elif result['error']:
+                    self.stderr.write(self.style.ERROR(f"{result['design']}: {result['error']}"))
+
+            summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items()))
+            self.stderr.write(self.style.SUCCESS(f'✅ Pass done. {summary or "nothing on local media"}'))
+            if not options['loop']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,39 @@
+"""
+Management command to recompute per-creator storage usage from the bucket listing
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.template.defaultfilters import filesizeformat
+
+from designs.storage_usage import reconcile_storage
+from picu.circuit_breaker import CircuitOpenError
+
+
+class Command(BaseCommand):
+    help = 'List the bucket and local media, one folder per worker, and correct every creator\'s storage total'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Folders listed concurrently')
+        parser.add_argument('--dry-run', action='store_true', help='Report the differences without writing them')
+        parser.add_argument('--show-unattributed', action='store_true', help='Print objects that belong to no creator')
+
+    def handle(self, *args, **options):
+        if options['workers'] <= 0:
+            raise CommandError('--workers must be positive.')
+
+        try:
+            result = reconcile_storage(options['workers'], dry_run=options['dry_run'])
+        except CircuitOpenError as e:
+            raise CommandError(f'Storage unavailable, nothing changed: {e}')
+
+        for creator_id, (before, listed) in sorted(result['creators'].items(), key=lambda item: str(item[0])):
+            self.stdout.write(f'{creator_id}: {filesizeformat(before)} -> {filesizeformat(listed)}')
+        if options['show_unattributed']:
+            for name in result['unattributed']:
+                self.stdout.write(f'unattributed: {name}')
+
+        verb = 'Would correct' if options['dry_run'] else 'Corrected'
+        self.stderr.write(self.style.SUCCESS(
+            f"✅ {result['objects']} objects, {filesizeformat(result['bytes'])}. "
+            f"{verb} {len(result['creators'])} creators; {len(result['unattributed'])} objects unattributed; "
+            f"{result['deleted']} pending deletes done"
+        ))
@@ -0,0 +1,165 @@
+"""
+Management command to seed synthetic data at production scale
+"""
+import io
+import itertools
+import random
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from designs.models import Design, DesignProduct, Product
+
+
+PLACEHOLDER_COLORS = [
+    (249, 115, 22),
+    (52, 211, 153),
+    (252, 211, 77),
+    (248, 113, 113),
+    (96, 165, 250),
+    (167, 139, 250),
+    (31, 41, 55),
+    (229, 231, 235),
+]
+
+
+class Command(BaseCommand):
+    help = 'Seed creators, designs and design products in bulk for scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--creators', type=int, default=1000, help='Number of creators')
+        parser.add_argument('--admins', type=int, default=3, help='Number of admins')
+        parser.add_argument('--designs', type=int, default=20000, help='Total number of designs')
+        parser.add_argument('--max-products', type=int, default=4,
+                            help='Maximum products per design (minimum is 1)')
+        parser.add_argument('--approved', type=float, default=0.6, help='Share of approved designs')
+        parser.add_argument('--rejected', type=float, default=0.15, help='Share of rejected designs')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk_create')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+        parser.add_argument('--password', default='picu12345', help='Password for every seeded user')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        tag = uuid.uuid4().hex[:8]  # keeps emails unique across runs with the same --seed
+
+        if options['approved'] + options['rejected'] > 1:
+            self.stderr.write(self.style.ERROR('--approved + --rejected must not exceed 1'))
+            return
+
+        if not Product.objects.filter(is_active=True).exists():
+            call_command('add_products', stdout=io.StringIO())
+        products = list(Product.objects.filter(is_active=True))
+
+        images = self._write_placeholder_images()
+
+        # Hash once; PBKDF2 per user would dominate the run time
+        password = make_password(options['password'])
+
+        with transaction.atomic():
+            users = [
+                User(
+                    email=f'admin-{tag}-{i}@seed.picu.test',
+                    full_name=f'Admin Seed {i}',
+                    phone='08123456789',
+                    role='admin',
+                    is_staff=True,
+                    password=password,
+                )
+                for i in range(options['admins'])
+            ]
+            User.objects.bulk_create(users, batch_size=batch_size)
+
+            creators = [
+                User(
+                    email=f'creator-{tag}-{i}@seed.picu.test',
+                    full_name=f'Creator Seed {i}',
+                    phone=f'08{rng.randrange(10**9, 10**10)}',
+                    role='creator',
+                    password=password,
+                )
+                for i in range(options['creators'])
+            ]
+            User.objects.bulk_create(creators, batch_size=batch_size)
+        self.stdout.write(f'Created {len(users)} admins and {len(creators)} creators')
+
+        if not creators:
+            return
+
+        # A few prolific creators own most designs, like in production
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(creators))))
+        approved_cut = options['approved']
+        rejected_cut = approved_cut + options['rejected']
+
+        design_count = 0
+        sku_count = 0
+        remaining = options['designs']
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            owners = rng.choices(creators, cum_weights=cum_weights, k=size)
+            designs = []
+            for i, owner in enumerate(owners):
+                roll = rng.random()
+                if roll < approved_cut:
+                    status, reason = 'approved', None
+                elif roll < rejected_cut:
+                    status, reason = 'rejected', 'Resolusi gambar terlalu rendah'
+                else:
+                    status, reason = 'pending', None
+                designs.append(Design(
+                    creator=owner,
+                    title=f'Seed Design {design_count + i}',
+                    description='Desain sintetis untuk pengujian skala',
+                    image=rng.choice(images),
+                    status=status,
+                    reject_reason=reason,
+                ))
+
+            design_products = []
+            for design in designs:
+                count = rng.randint(1, min(options['max_products'], len(products)))
+                for product in rng.sample(products, count):
+                    # DesignProduct.save() is skipped by bulk_create, so build the
+                    # SKU here with a longer design segment to stay unique at scale
+                    design_products.append(DesignProduct(
+                        design=design,
+                        product=product,
+                        sku=f'PICU-{design.id.hex[:12].upper()}-{str(product.id)[:4].upper()}',
+                    ))
+
+            with transaction.atomic():
+                Design.objects.bulk_create(designs, batch_size=batch_size)
+                DesignProduct.objects.bulk_create(design_products, batch_size=batch_size)
+
+            design_count += size
+            sku_count += len(design_products)
+            remaining -= size
+            self.stdout.write(f'  {design_count} designs, {sku_count} SKUs')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✅ Done! Seeded {len(creators)} creators, {design_count} designs '
+                f'and {sku_count} design products (tag: {tag}).'
+            )
+        )
+        self.stdout.write(f'   Password for all seeded users: {options["password"]}')
+
+    def _write_placeholder_images(self):
+        """Write tiny PNGs once and return their media URLs"""
+        from PIL import Image
+
+        urls = []
+        for i, color in enumerate(PLACEHOLDER_COLORS):
+            path = f'designs/seed/placeholder-{i}.png'
+            if not default_storage.exists(path):
+                buffer = io.BytesIO()
+                Image.new('RGB', (8, 8), color).save(buffer, format='PNG')
+                path = default_storage.save(path, ContentFile(buffer.getvalue()))
+            urls.append(f'/media/{path}')
+        return urls
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='design',
+            name='image_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Image SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='mockup_template',
+            field=models.CharField(blank=True, max_length=500, verbose_name='Mockup Template URL'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='mockup_version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Mockup Version'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='print_area',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Print Area'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0002_product_mockups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='designproduct',
+            name='print_file',
+            field=models.URLField(blank=True, max_length=500, verbose_name='Print File URL'),
+        ),
+        migrations.AddField(
+            model_name='designproduct',
+            name='print_file_generated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Print File Generated'),
+        ),
+        migrations.AddField(
+            model_name='designproduct',
+            name='print_file_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Print File Key'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0003_designproduct_print_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('uploaded', 'Uploaded'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('edited', 'Edited'), ('deleted', 'Deleted')], max_length=10, verbose_name='Event')),
+                ('from_status', models.CharField(blank=True, max_length=10, verbose_name='From Status')),
+                ('to_status', models.CharField(blank=True, max_length=10, verbose_name='To Status')),
+                ('review_seconds', models.PositiveIntegerField(blank=True, null=True, verbose_name='Review Time (s)')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Actor')),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Creator')),
+                ('design', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='status_events', to='designs.design', verbose_name='Design')),
+            ],
+            options={
+                'verbose_name': 'Design Status Event',
+                'verbose_name_plural': 'Design Status Events',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['design', 'to_status', '-id'], name='designs_event_design_status')],
+            },
+        ),
+    ]
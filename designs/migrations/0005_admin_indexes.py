@@ -0,0 +1,49 @@
+# Generated by Django 5.2.10 on 2026-10-18 23:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Admin search uses icontains (ILIKE '%term%'), which only trigram indexes
+# can serve. PostgreSQL only; other databases skip these.
+TRIGRAM_INDEXES = [
+    ('designs_design_title_trgm', 'designs_design', 'title'),
+    ('designs_designproduct_sku_trgm', 'designs_designproduct', 'sku'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0004_design_status_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['-created_at'], name='designs_design_created'),
+        ),
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['status', '-created_at'], name='designs_design_status_created'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:05
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0005_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='design',
+            name='royalty_rate',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True, verbose_name='Rate Royalti'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='royalty_rate',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.1000'), max_digits=5, verbose_name='Rate Royalti'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0006_royalty_rate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # The new index leads with the same columns, so it is built before the
+    # old one is dropped and status filters never lose their index
+    operations = [
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='designs_status_created_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='design',
+            name='designs_design_status_created',
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0007_catalog_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDesign',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100, verbose_name='Judul Desain')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Deskripsi')),
+                ('image', models.URLField(max_length=500, verbose_name='Image URL')),
+                ('original_image', models.URLField(max_length=500, verbose_name='Original Image URL')),
+                ('image_sha256', models.CharField(blank=True, max_length=64, verbose_name='Image SHA-256')),
+                ('status', models.CharField(choices=[('pending', 'Pending Review'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=10, verbose_name='Status')),
+                ('reject_reason', models.TextField(blank=True, null=True, verbose_name='Alasan Penolakan')),
+                ('royalty_rate', models.DecimalField(blank=True, decimal_places=4, max_digits=5, null=True, verbose_name='Rate Royalti')),
+                ('products', models.JSONField(default=list, verbose_name='Products')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_designs', to=settings.AUTH_USER_MODEL, verbose_name='Creator')),
+            ],
+            options={
+                'verbose_name': 'Archived Design',
+                'verbose_name_plural': 'Archived Designs',
+                'ordering': ['-archived_at'],
+                'indexes': [models.Index(condition=models.Q(('image', models.F('original_image'))), fields=['archived_at'], name='designs_archive_image_pending')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0008_archived_design'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archiveddesign',
+            name='image_metadata',
+            field=models.JSONField(default=dict, verbose_name='Image Metadata'),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='image_bytes',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Ukuran File'),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='image_dpi',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='DPI'),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='image_has_alpha',
+            field=models.BooleanField(blank=True, editable=False, null=True, verbose_name='Transparan'),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Tinggi (px)'),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='image_mode',
+            field=models.CharField(blank=True, editable=False, max_length=10, verbose_name='Mode Warna'),
+        ),
+        migrations.AddField(
+            model_name='design',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Lebar (px)'),
+        ),
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['image_width', 'image_height'], name='designs_image_size'),
+        ),
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['image_dpi'], name='designs_image_dpi'),
+        ),
+        migrations.AddIndex(
+            model_name='design',
+            index=models.Index(fields=['image_mode'], name='designs_image_mode'),
+        ),
+    ]
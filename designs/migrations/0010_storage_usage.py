@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_admin_indexes'),
+        ('designs', '0009_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('creator', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='storage_usage', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Creator')),
+                ('bytes', models.BigIntegerField(default=0, verbose_name='Terpakai')),
+                ('files', models.IntegerField(default=0, verbose_name='Jumlah File')),
+                ('quota_bytes', models.BigIntegerField(blank=True, null=True, verbose_name='Kuota (bytes)')),
+                ('reconciled_at', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Terakhir Direkonsiliasi')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Storage Usage',
+                'verbose_name_plural': 'Storage Usage',
+                'ordering': ['-bytes'],
+            },
+        ),
+        migrations.AddField(
+            model_name='designproduct',
+            name='print_file_bytes',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True, verbose_name='Print File Size'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0010_storage_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archiveddesign',
+            name='status_events',
+            field=models.JSONField(default=list, verbose_name='Status Events'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0011_archived_status_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='archiveddesign',
+            name='designs_archive_image_pending',
+        ),
+        migrations.AddField(
+            model_name='archiveddesign',
+            name='image_attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Image Move Attempts'),
+        ),
+        migrations.AddIndex(
+            model_name='archiveddesign',
+            index=models.Index(condition=models.Q(('image', models.F('original_image'))), fields=['image_attempts', 'archived_at'], name='designs_archive_image_pending'),
+        ),
+    ]
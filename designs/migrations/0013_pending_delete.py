@@ -0,0 +1,26 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0012_archived_image_attempts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingDelete',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True, verbose_name='URL')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Pending Delete',
+                'verbose_name_plural': 'Pending Deletes',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,185 @@
+"""
+Product mockups for PICU Creator Dashboard
+Composites a design onto each product's template photo. Compositing runs in
+a process pool so it never holds a web worker's GIL; results live in the
+image cache keyed by design image hash and product mockup version. A failed
+render is not retried until a backoff has passed, so the page stops polling
+and shows the mockup as unavailable instead of queueing it again and again.
+"""
+import hashlib
+import io
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import cache
+
+from picu import images
+
+logger = logging.getLogger(__name__)
+
+# Used when a product has no print area configured
+DEFAULT_PRINT_AREA = {'x': 0.25, 'y': 0.2, 'width': 0.5, 'height': 0.5}
+TEMPLATE_BACKGROUND = (243, 244, 246)
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the compositing pool (singleton)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Forking a threaded web worker can copy locks held by other
+                # threads into the child; spawned workers start clean
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.MOCKUP_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+    return _pool
+
+
+def _reset_pool():
+    """Replace a pool whose worker crashed (e.g. killed for memory)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def mockup_key(design, product) -> str:
+    """Cache key of a design's mockup on a product; also used as its ETag"""
+    raw = f'{design.image_hash}|{product.pk}|{product.mockup_version}|{settings.MOCKUP_SIZE}'
+    return 'mockup-' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _failure_key(key: str) -> str:
+    return f'designs:{key}:failed'
+
+
+def _record_failure(key: str):
+    """Back off exponentially, from MOCKUP_RETRY_SECONDS up to MOCKUP_RETRY_MAX_SECONDS"""
+    failures = (cache.get(_failure_key(key)) or {}).get('count', 0) + 1
+    delay = min(settings.MOCKUP_RETRY_SECONDS * 2 ** (failures - 1), settings.MOCKUP_RETRY_MAX_SECONDS)
+    cache.set(_failure_key(key), {'count': failures, 'retry_at': time.time() + delay},
+              settings.MOCKUP_RETRY_MAX_SECONDS * 2)
+
+
+def failed_mockups(design, products) -> set:
+    """Primary keys of the products whose mockup failed and is still backing off"""
+    keys = {_failure_key(mockup_key(design, product)): product.pk for product in products}
+    now = time.time()
+    return {keys[key] for key, failure in cache.get_many(list(keys)).items() if failure['retry_at'] > now}
+
+
+def cached_mockup(design, product):
+    """Path of the rendered mockup, or None if it has not been rendered yet"""
+    return images.get_cache().get(mockup_key(design, product))
+
+
+def render_mockup(design_path, template_path, print_area, size, quality) -> bytes:
+    """
+    Composite a design into the print area of a product template
+
+    Runs in a pool process, so it takes plain values and touches no Django state.
+
+    Args:
+        design_path: Local path of the design image
+        template_path: Local path of the template, or None for a plain background
+        print_area: Dict of x, y, width, height as fractions of the template
+        size: Longest side of the output in pixels
+        quality: WebP quality
+
+    Returns:
+        WebP bytes
+    """
+    from PIL import Image, ImageOps
+
+    if template_path:
+        with Image.open(template_path) as template:
+            canvas = ImageOps.exif_transpose(template).convert('RGBA')
+        canvas.thumbnail((size, size), Image.LANCZOS)
+    else:
+        canvas = Image.new('RGBA', (size, size), TEMPLATE_BACKGROUND + (255,))
+
+    area = {**DEFAULT_PRINT_AREA, **(print_area or {})}
+    box_x = round(area['x'] * canvas.width)
+    box_y = round(area['y'] * canvas.height)
+    box_width = max(1, round(area['width'] * canvas.width))
+    box_height = max(1, round(area['height'] * canvas.height))
+
+    with Image.open(design_path) as design:
+        design.draft('RGB', (box_width, box_height))
+        artwork = ImageOps.exif_transpose(design).convert('RGBA')
+    # Fit inside the print area, centred horizontally and aligned to its top
+    artwork = ImageOps.contain(artwork, (box_width, box_height), Image.LANCZOS)
+    offset = (box_x + (box_width - artwork.width) // 2, box_y)
+    canvas.alpha_composite(artwork, offset)
+
+    output = io.BytesIO()
+    canvas.convert('RGB').save(output, format='WEBP', quality=quality)
+    return output.getvalue()
+
+
+def _render(key, image_url, template_url, print_area):
+    """Fetch inputs, composite in the process pool and store the result"""
+    image_cache = images.get_cache()
+    try:
+        with images.FileLock(image_cache, key):
+            if image_cache.get(key):
+                return  # Another process rendered it meanwhile
+            design_path = images.source_path(image_url)
+            template_path = images.source_path(template_url) if template_url else None
+            future = get_process_pool().submit(
+                render_mockup, design_path, template_path, print_area,
+                settings.MOCKUP_SIZE, settings.MOCKUP_QUALITY,
+            )
+            data = future.result(timeout=settings.MOCKUP_TIMEOUT)
+            image_cache.put(key, data)
+            cache.delete(_failure_key(key))
+            logger.info(f"Rendered mockup {key} ({len(data)} bytes)")
+    except BrokenProcessPool as e:
+        logger.error(f"Mockup pool died, starting a new one: {e}")
+        _reset_pool()
+        _record_failure(key)
+    except Exception as e:
+        logger.error(f"Mockup render failed for {image_url}: {type(e).__name__}: {e}")
+        _record_failure(key)
+    finally:
+        with _pending_lock:
+            _pending.discard(key)
+
+
+def enqueue_missing(design, products) -> int:
+    """
+    Queue rendering of every mockup of the design that is not cached yet
+
+    Returns:
+        Number of mockups still missing (queued now or earlier)
+    """
+    if not design.image:
+        return 0
+
+    missing = 0
+    for product in products:
+        key = mockup_key(design, product)
+        if images.get_cache().get(key):
+            continue
+        missing += 1
+        with _pending_lock:
+            if key in _pending:
+                continue
+            _pending.add(key)
+        images.get_executor().submit(
+            _render, key, design.image, product.mockup_template, product.print_area,
+        )
+    return missing
@@ -1,9 +1,12 @@
 """
 Design and Product models for PICU Creator Dashboard
 """
+import hashlib
 import uuid
+from decimal import Decimal
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Product(models.Model):
@@ -20,7 +23,15 @@ class Product(models.Model):
     description = models.TextField('Deskripsi', blank=True, null=True)
     category = models.CharField('Kategori', max_length=20, choices=CATEGORY_CHOICES, default='apparel')
     base_cost = models.DecimalField('Base Cost', max_digits=12, decimal_places=2)
+    royalty_rate = models.DecimalField('Rate Royalti', max_digits=5, decimal_places=4, default=Decimal('0.1000'))
     is_active = models.BooleanField('Aktif', default=True)
+    
+    # Mockup rendering: photo of the blank product and where the design goes.
+    # print_area is {"x", "y", "width", "height"} as fractions of the template.
+    mockup_template = models.CharField('Mockup Template URL', max_length=500, blank=True)
+    print_area = models.JSONField('Print Area', default=dict, blank=True)
+    mockup_version = models.PositiveIntegerField('Mockup Version', default=1, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -30,6 +41,19 @@ class Product(models.Model):
     
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        # A new template or print area invalidates every cached mockup
+        if not self._state.adding:
+            previous = Product.objects.filter(pk=self.pk).values('mockup_template', 'print_area').first()
+            if previous and (
+                previous['mockup_template'] != self.mockup_template
+                or previous['print_area'] != self.print_area
+            ):
+                self.mockup_version += 1
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'mockup_version'}
+        super().save(*args, **kwargs)
 
 
 class Design(models.Model):
@@ -55,11 +79,24 @@ class Design(models.Model):
     # Image will be stored in Supabase Storage
     # This field stores the URL/path to the image
     image = models.URLField('Image URL', max_length=500)
+    image_sha256 = models.CharField('Image SHA-256', max_length=64, blank=True, editable=False)
+    
+    # Read from the image header at upload (manage.py backfill_image_metadata for
+    # older designs); null until known
+    image_width = models.PositiveIntegerField('Lebar (px)', null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField('Tinggi (px)', null=True, blank=True, editable=False)
+    image_dpi = models.PositiveIntegerField('DPI', null=True, blank=True, editable=False)
+    image_mode = models.CharField('Mode Warna', max_length=10, blank=True, editable=False)
+    image_has_alpha = models.BooleanField('Transparan', null=True, blank=True, editable=False)
+    image_bytes = models.PositiveBigIntegerField('Ukuran File', null=True, blank=True, editable=False)
     
     # Status tracking
     status = models.CharField('Status', max_length=10, choices=STATUS_CHOICES, default='pending')
     reject_reason = models.TextField('Alasan Penolakan', blank=True, null=True)
     
+    # Overrides the product's royalty rate for every SKU of this design
+    royalty_rate = models.DecimalField('Rate Royalti', max_digits=5, decimal_places=4, null=True, blank=True)
+    
     # Products this design is applied to
     products = models.ManyToManyField(
         Product,
@@ -76,10 +113,37 @@ class Design(models.Model):
         verbose_name = 'Design'
         verbose_name_plural = 'Designs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='designs_design_created'),
+            # Also the keyset order of the public catalog, id breaking ties
+            models.Index(fields=['status', '-created_at', '-id'], name='designs_status_created_id'),
+            # Print resolution checks (admin filters) compare pixel sizes, not decoded images
+            models.Index(fields=['image_width', 'image_height'], name='designs_image_size'),
+            models.Index(fields=['image_dpi'], name='designs_image_dpi'),
+            models.Index(fields=['image_mode'], name='designs_image_mode'),
+        ]
+    
+    IMAGE_METADATA_FIELDS = ('image_width', 'image_height', 'image_dpi', 'image_mode', 'image_has_alpha', 'image_bytes')
     
     def __str__(self):
         return f"{self.title} by {self.creator.full_name}"
     
+    @classmethod
+    def status_counts(cls, creator=None):
+        """Total and per-status design counts in one query, optionally for one creator"""
+        designs = cls.objects.filter(creator=creator) if creator else cls.objects.all()
+        return designs.aggregate(
+            total=models.Count('id'),
+            pending=models.Count('id', filter=models.Q(status='pending')),
+            approved=models.Count('id', filter=models.Q(status='approved')),
+            rejected=models.Count('id', filter=models.Q(status='rejected')),
+        )
+    
+    @property
+    def image_hash(self):
+        """Content hash of the image; designs uploaded before hashing fall back to the URL"""
+        return self.image_sha256 or hashlib.sha256(self.image.encode()).hexdigest()
+    
     @property
     def is_pending(self):
         return self.status == 'pending'
@@ -120,6 +184,13 @@ class DesignProduct(models.Model):
     design = models.ForeignKey(Design, on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     sku = models.CharField('SKU', max_length=30, unique=True, blank=True)
+    
+    # Print-ready file for production; key identifies the inputs it was made from
+    print_file = models.URLField('Print File URL', max_length=500, blank=True)
+    print_file_key = models.CharField('Print File Key', max_length=64, blank=True, editable=False)
+    print_file_generated_at = models.DateTimeField('Print File Generated', null=True, blank=True, editable=False)
+    print_file_bytes = models.PositiveBigIntegerField('Print File Size', null=True, blank=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -137,3 +208,199 @@ class DesignProduct(models.Model):
     
     def __str__(self):
         return f"{self.sku}: {self.design.title} - {self.product.name}"
+
+
+class DesignStatusEvent(models.Model):
+    """
+    Append-only history of design status changes
+    Rows are never updated; deleted designs keep their events. Archiving a
+    design unlinks them too, and restoring it links them again.
+    """
+    EVENT_CHOICES = [
+        ('uploaded', 'Uploaded'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+        ('edited', 'Edited'),
+        ('deleted', 'Deleted'),
+    ]
+    
+    design = models.ForeignKey(
+        Design,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='status_events',
+        verbose_name='Design'
+    )
+    creator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Creator'
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Actor'
+    )
+    event = models.CharField('Event', max_length=10, choices=EVENT_CHOICES)
+    from_status = models.CharField('From Status', max_length=10, blank=True)
+    to_status = models.CharField('To Status', max_length=10, blank=True)
+    # Seconds the design waited in pending, set on approve/reject
+    review_seconds = models.PositiveIntegerField('Review Time (s)', null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name = 'Design Status Event'
+        verbose_name_plural = 'Design Status Events'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['design', 'to_status', '-id'], name='designs_event_design_status'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event}: {self.from_status or '-'} → {self.to_status or '-'}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("DesignStatusEvent is append-only")
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def record(cls, design, event, actor=None, from_status=''):
+        """
+        Append an event for a design's current state
+        
+        Args:
+            design: Design after the change
+            event: One of EVENT_CHOICES
+            actor: User who made the change
+            from_status: Status before the change
+        """
+        now = timezone.now()
+        review_seconds = None
+        if event in ('approved', 'rejected') and from_status == 'pending':
+            # Waiting started at the last move back to pending, or at upload
+            pending_since = cls.objects.filter(
+                design=design, to_status='pending'
+            ).order_by('-id').values_list('created_at', flat=True).first() or design.created_at
+            review_seconds = max(0, int((now - pending_since).total_seconds()))
+        
+        from .live import notify
+        
+        event = cls.objects.create(
+            design=design,
+            creator_id=design.creator_id,
+            actor=actor if actor is not None and actor.is_authenticated else None,
+            event=event,
+            from_status=from_status,
+            to_status=design.status if event != 'deleted' else '',
+            review_seconds=review_seconds,
+            created_at=now,
+        )
+        notify(event)
+        return event
+
+
+class ArchivedDesign(models.Model):
+    """
+    Design moved out of the live table by the retention job (designs.retention)
+    Keeps the original id, so restore_design() can put it back unchanged.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    creator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_designs',
+        verbose_name='Creator'
+    )
+    title = models.CharField('Judul Desain', max_length=100)
+    description = models.TextField('Deskripsi', blank=True, null=True)
+    # Where the image is now; original_image is where it lived while live
+    image = models.URLField('Image URL', max_length=500)
+    original_image = models.URLField('Original Image URL', max_length=500)
+    image_sha256 = models.CharField('Image SHA-256', max_length=64, blank=True)
+    status = models.CharField('Status', max_length=10, choices=Design.STATUS_CHOICES)
+    reject_reason = models.TextField('Alasan Penolakan', blank=True, null=True)
+    royalty_rate = models.DecimalField('Rate Royalti', max_digits=5, decimal_places=4, null=True, blank=True)
+    # [{"product": id, "sku": ..., "print_file": ..., "print_file_key": ...}]
+    products = models.JSONField('Products', default=list)
+    # Design.IMAGE_METADATA_FIELDS, restored with the design
+    image_metadata = models.JSONField('Image Metadata', default=dict)
+    # Ids of the design's DesignStatusEvents, relinked on restore
+    status_events = models.JSONField('Status Events', default=list)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # Runs of archive_images that could not move the image; at
+    # ARCHIVE_IMAGE_MAX_ATTEMPTS the row is no longer picked up
+    image_attempts = models.PositiveSmallIntegerField('Image Move Attempts', default=0)
+    
+    class Meta:
+        verbose_name = 'Archived Design'
+        verbose_name_plural = 'Archived Designs'
+        ordering = ['-archived_at']
+        indexes = [
+            # Rows whose image still has to go to cold storage
+            models.Index(
+                fields=['image_attempts', 'archived_at'],
+                condition=models.Q(image=models.F('original_image')),
+                name='designs_archive_image_pending',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} (archived)"
+    
+    @property
+    def image_archived(self):
+        return self.image != self.original_image
+
+
+class StorageUsage(models.Model):
+    """
+    Bytes a creator has in storage: design images and their print files
+    Kept as a running total by designs.storage_usage; manage.py
+    reconcile_storage recomputes it from the bucket.
+    """
+    creator = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='storage_usage',
+        verbose_name='Creator'
+    )
+    bytes = models.BigIntegerField('Terpakai', default=0)
+    files = models.IntegerField('Jumlah File', default=0)
+    # Overrides STORAGE_QUOTA_MB for this creator; 0 means unlimited
+    quota_bytes = models.BigIntegerField('Kuota (bytes)', null=True, blank=True)
+    reconciled_at = models.DateTimeField('Terakhir Direkonsiliasi', null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Storage Usage'
+        verbose_name_plural = 'Storage Usage'
+        ordering = ['-bytes']
+    
+    def __str__(self):
+        return f"{self.creator_id}: {self.bytes} bytes"
+
+
+class PendingDelete(models.Model):
+    """
+    Stored object whose delete was put off while storage was failing
+    (designs.storage_usage.delete_or_defer); manage.py reconcile_storage
+    deletes it before listing the bucket.
+    """
+    url = models.URLField('URL', max_length=500, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Pending Delete'
+        verbose_name_plural = 'Pending Deletes'
+        ordering = ['created_at']
+    
+    def __str__(self):
+        return self.url
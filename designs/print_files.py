@@ -0,0 +1,285 @@
+"""
+Print-ready files for PICU Creator Dashboard
+Renders each approved DesignProduct at its category's print size and DPI,
+flattened to RGB, in a process pool. Only a bounded number of files are in
+flight at once and every file passes through disk, so memory stays flat no
+matter how many SKUs a batch covers.
+"""
+import csv
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from picu import images
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FIELDS = ['sku', 'design', 'product', 'status', 'url', 'width', 'height', 'dpi', 'bytes', 'error']
+ZIP_CHUNK_SIZE = 256 * 1024
+
+
+def print_spec(product) -> dict:
+    """Print size and DPI for a product's category"""
+    specs = settings.PRINT_FILE_SPECS
+    return specs.get(product.category, specs['apparel'])
+
+
+def print_file_key(design, product) -> str:
+    """Identifies the inputs of a print file; unchanged key means up to date"""
+    spec = json.dumps(print_spec(product), sort_keys=True)
+    return hashlib.sha256(f'{design.image_hash}|{spec}'.encode()).hexdigest()
+
+
+def render_print_file(source_path, spec, output_path):
+    """
+    Fit a design into the print area and write it as a flattened PNG
+
+    Runs in a pool process, so it takes plain values and touches no Django state.
+
+    Returns:
+        Tuple of (width, height, bytes written)
+    """
+    from PIL import Image, ImageOps
+
+    dpi = spec['dpi']
+    width = round(spec['width_mm'] / 25.4 * dpi)
+    height = round(spec['height_mm'] / 25.4 * dpi)
+
+    with Image.open(source_path) as img:
+        artwork = ImageOps.exif_transpose(img).convert('RGBA')
+    artwork = ImageOps.contain(artwork, (width, height), Image.LANCZOS)
+
+    # Flatten onto white; printers take RGB without transparency
+    canvas = Image.new('RGB', (width, height), (255, 255, 255))
+    canvas.paste(artwork, ((width - artwork.width) // 2, 0), artwork)
+    canvas.save(output_path, format='PNG', dpi=(dpi, dpi), compress_level=6)
+    return width, height, os.path.getsize(output_path)
+
+
+def _store(local_path, object_path) -> str:
+    """Upload a rendered file to Supabase Storage, or media storage when not configured"""
+    from picu.metrics import STORAGE_FAILURES, STORAGE_LATENCY
+    from picu.supabase_storage import HashingFile, save_file_locally, stream_to_supabase
+
+    with open(local_path, 'rb') as fh:
+        file = HashingFile(File(fh, os.path.basename(object_path)))
+        if not getattr(settings, 'SUPABASE_URL', '') or not getattr(settings, 'SUPABASE_KEY', ''):
+            return save_file_locally(file, object_path)
+
+        start = time.perf_counter()
+        try:
+            return stream_to_supabase(file, object_path, 'image/png')
+        except Exception:
+            STORAGE_FAILURES.inc(operation='print_upload')
+            raise
+        finally:
+            STORAGE_LATENCY.observe(time.perf_counter() - start, operation='print_upload')
+
+
+def _delete_stored(url) -> bool:
+    """Delete a stored print file; True when it is gone"""
+    from .storage_usage import delete_or_defer
+
+    if not url.startswith('/media/'):
+        return delete_or_defer(url)
+    try:
+        os.remove(images.media_path(url))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not delete print file {url}: {e}")
+        return False
+    return True
+
+
+def delete_print_files(designs):
+    """
+    Delete the stored print files of designs that are being deleted
+
+    Call before deleting the rows; the files go once the delete commits.
+    """
+    from .models import DesignProduct
+
+    urls = list(
+        DesignProduct.objects.filter(design__in=designs).exclude(print_file='').values_list('print_file', flat=True)
+    )
+
+    def delete():
+        for url in urls:
+            _delete_stored(url)
+
+    if urls:
+        transaction.on_commit(delete)
+
+
+def _entry(dp, status, **extra) -> dict:
+    return {
+        'sku': dp.sku,
+        'design': dp.design.title,
+        'product': dp.product.name,
+        'status': status,
+        'url': dp.print_file,
+        **extra,
+    }
+
+
+def _batches(queryset, size=500):
+    """Keyset-paginate by SKU; rows are updated while the batch runs"""
+    last_sku = ''
+    while True:
+        batch = list(queryset.filter(sku__gt=last_sku)[:size])
+        if not batch:
+            return
+        yield from batch
+        last_sku = batch[-1].sku
+
+
+def generate_print_files(queryset, workers=None, force=False):
+    """
+    Generate print files for the given DesignProducts
+
+    Results are yielded as files finish, in completion order. Up-to-date
+    SKUs are yielded with status 'skipped' and not rendered again. Generated
+    results carry the rendered file's local 'path', which is deleted as soon
+    as the next result is requested.
+
+    Args:
+        queryset: DesignProduct queryset; only approved designs are processed
+        workers: Size of the process pool (default PRINT_FILE_WORKERS)
+        force: Render even if the stored file is up to date
+
+    Yields:
+        Manifest dicts with the MANIFEST_FIELDS keys
+    """
+    from .models import DesignProduct
+    from .storage_usage import add_usage
+
+    workers = workers or settings.PRINT_FILE_WORKERS
+    queryset = queryset.filter(design__status='approved').select_related('design', 'product').only(
+        'id', 'sku', 'print_file', 'print_file_key', 'print_file_bytes',
+        'design__creator', 'design__title', 'design__image', 'design__image_sha256',
+        'product__name', 'product__category',
+    ).order_by('sku')
+
+    work_dir = tempfile.mkdtemp(prefix='picu-print-')
+    in_flight = {}
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def finish(future):
+        dp, key, spec, output_path = in_flight.pop(future)
+        try:
+            width, height, size = future.result()
+            url = _store(output_path, f"print/{dp.sku}-{key[:12]}.png")
+            DesignProduct.objects.filter(pk=dp.pk).update(
+                print_file=url, print_file_key=key, print_file_generated_at=timezone.now(), print_file_bytes=size,
+            )
+            # A new key is a new object; the one it supersedes is deleted and
+            # stops counting toward the creator's storage
+            if url == dp.print_file or (dp.print_file and _delete_stored(dp.print_file)):
+                add_usage(dp.design.creator_id, size - (dp.print_file_bytes or 0))
+            else:
+                add_usage(dp.design.creator_id, size, 1)
+            dp.print_file = url
+            return _entry(dp, 'generated', width=width, height=height, dpi=spec['dpi'], bytes=size, path=output_path)
+        except Exception as e:
+            logger.error(f"Print file failed for {dp.sku}: {type(e).__name__}: {e}")
+            return _entry(dp, 'failed', error=f'{type(e).__name__}: {e}')
+
+    def drain(done):
+        for future in done:
+            result = finish(future)
+            yield result
+            output_path = os.path.join(work_dir, f'{result["sku"]}.png')
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+    try:
+        for dp in _batches(queryset):
+            key = print_file_key(dp.design, dp.product)
+            if not force and dp.print_file and dp.print_file_key == key:
+                yield _entry(dp, 'skipped')
+                continue
+            try:
+                source = images.source_path(dp.design.image)
+            except Exception as e:
+                logger.error(f"Source fetch failed for {dp.sku}: {type(e).__name__}: {e}")
+                yield _entry(dp, 'failed', error=f'{type(e).__name__}: {e}')
+                continue
+
+            # Keep the pool busy without queueing the whole batch in memory
+            while len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from drain(done)
+
+            spec = print_spec(dp.product)
+            output_path = os.path.join(work_dir, f'{dp.sku}.png')
+            future = pool.submit(render_print_file, source, spec, output_path)
+            in_flight[future] = (dp, key, spec, output_path)
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            yield from drain(done)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class _ZipStream:
+    """Write-only file object whose contents are collected by the zip generator"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def stream_zip(results):
+    """
+    Stream a ZIP of rendered print files plus manifest.csv
+
+    Takes results from generate_print_files; each rendered file is copied
+    into the archive in chunks before the next result is requested.
+
+    Yields:
+        Chunks of the ZIP archive
+    """
+    stream = _ZipStream()
+    manifest = io.StringIO()
+    writer = csv.DictWriter(manifest, fieldnames=MANIFEST_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for result in results:
+            writer.writerow(result)
+            if not result.get('path'):
+                continue
+            # PNG is already compressed; store it as is
+            with open(result['path'], 'rb') as src, archive.open(f"{result['sku']}.png", 'w', force_zip64=True) as dst:
+                while chunk := src.read(ZIP_CHUNK_SIZE):
+                    dst.write(chunk)
+                    yield stream.drain()
+        archive.writestr('manifest.csv', manifest.getvalue())
+    yield stream.drain()
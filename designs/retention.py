@@ -0,0 +1,264 @@
+"""
+Retention for designs nobody will look at again
+
+Designs matching DESIGN_RETENTION_DAYS (e.g. rejected and untouched for
+90 days) are moved to ArchivedDesign in short batches. Each batch is its
+own transaction that locks only the rows it moves, skipping rows another
+request holds. Their images and print files are then moved under
+ARCHIVE_STORAGE_PREFIX, a separate step that a storage outage only
+postpones. Designs whose SKUs have royalty entries are never archived, so
+sales history stays linked; the ids of their status events are kept so
+restore_design() can link the moderation history again when it reverses
+both steps.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from picu.circuit_breaker import CircuitOpenError
+from picu.supabase_storage import move_design_image
+
+from .models import ArchivedDesign, Design, DesignProduct, DesignStatusEvent, Product
+from .skus import invalidate_skus
+from .storage_usage import add_usage
+
+logger = logging.getLogger(__name__)
+
+LIVE_PREFIXES = ('/media/designs/', '/storage/v1/object/public/')
+
+
+def retention_filter(now=None) -> Q:
+    """Designs the retention policy says to archive; matches nothing without a policy"""
+    now = now or timezone.now()
+    policy = Q(pk__in=[])
+    for status, days in settings.DESIGN_RETENTION_DAYS.items():
+        policy |= Q(status=status, updated_at__lt=now - timedelta(days=days))
+    return policy
+
+
+def archivable(now=None):
+    """Designs due for archiving, minus any with sales on the ledger"""
+    from payouts.models import RoyaltyEntry
+
+    sold = RoyaltyEntry.objects.filter(design_product__design=OuterRef('pk'))
+    return Design.objects.filter(retention_filter(now)).exclude(Exists(sold))
+
+
+def _relative(url: str) -> str:
+    """Path of a stored file within media storage or our bucket"""
+    if url.startswith('/media/'):
+        return url[len('/media/'):]
+    return url.split(f"/public/{settings.SUPABASE_BUCKET}/", 1)[-1].split('?')[0]
+
+
+def archive_path(image_url: str) -> str:
+    """Cold-storage path for a live image: the same layout under ARCHIVE_STORAGE_PREFIX"""
+    return f"{settings.ARCHIVE_STORAGE_PREFIX.strip('/')}/{_relative(image_url)}"
+
+
+def live_path(archived_url: str) -> str:
+    """Path an archived image moves back to on restore"""
+    prefix = f"{settings.ARCHIVE_STORAGE_PREFIX.strip('/')}/"
+    relative = _relative(archived_url)
+    return relative[len(prefix):] if relative.startswith(prefix) else relative
+
+
+def is_archived(url: str) -> bool:
+    return _relative(url).startswith(f"{settings.ARCHIVE_STORAGE_PREFIX.strip('/')}/")
+
+
+def _archive_batch(ids, now):
+    """Move one batch of designs to the archive in a single short transaction"""
+    with transaction.atomic():
+        # Re-check the policy under the lock: a design may have been edited
+        # or sold since the candidates were read
+        designs = list(
+            archivable(now).filter(pk__in=ids)
+            .select_for_update(skip_locked=True)
+            .values('id', 'creator_id', 'title', 'description', 'image', 'image_sha256', 'status',
+                    'reject_reason', 'royalty_rate', 'created_at', 'updated_at', *Design.IMAGE_METADATA_FIELDS)
+        )
+        if not designs:
+            return 0
+        locked = [design['id'] for design in designs]
+
+        products = {}
+        for design_id, product_id, sku, print_file, print_file_key, print_file_bytes in DesignProduct.objects.filter(
+            design_id__in=locked
+        ).values_list('design_id', 'product_id', 'sku', 'print_file', 'print_file_key', 'print_file_bytes'):
+            products.setdefault(design_id, []).append({
+                'product': str(product_id), 'sku': sku, 'print_file': print_file, 'print_file_key': print_file_key,
+                'print_file_bytes': print_file_bytes,
+            })
+
+        events = {}
+        for design_id, event_id in DesignStatusEvent.objects.filter(design_id__in=locked).values_list('design_id', 'id'):
+            events.setdefault(design_id, []).append(event_id)
+
+        archived = []
+        for design in designs:
+            metadata = {field: design.pop(field) for field in Design.IMAGE_METADATA_FIELDS}
+            archived.append(ArchivedDesign(
+                original_image=design['image'], products=products.get(design['id'], []),
+                image_metadata=metadata, status_events=events.get(design['id'], []), **design,
+            ))
+        ArchivedDesign.objects.bulk_create(archived)
+        # Cascades to the SKUs, whose delete signals drop their cached lookups;
+        # the images and print files stop counting toward the creator's storage,
+        # and the status events are unlinked (SET_NULL)
+        Design.objects.filter(pk__in=locked).delete()
+    return len(designs)
+
+
+def archive_designs(batch_size=500, max_batches=None, pause=0.0, now=None):
+    """
+    Archive every design the policy matches, one batch at a time
+
+    Args:
+        batch_size: Designs per transaction
+        max_batches: Stop after this many batches (None: until done)
+        pause: Seconds to sleep between batches, to leave the database room
+
+    Yields:
+        Number of designs archived by each batch
+    """
+    now = now or timezone.now()
+    candidates = archivable(now).order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list((candidates.filter(pk__gt=last_pk) if last_pk else candidates)[:batch_size])
+        if not ids:
+            return
+        last_pk = ids[-1]
+        yield _archive_batch(ids, now)
+        batches += 1
+        if pause:
+            time.sleep(pause)
+
+
+def _move_print_files(design_id, products, to_archive, skus=None):
+    """
+    Move the print files listed in an archived design's products (of `skus` only, if given)
+
+    Progress is saved even when a move fails, so a retry picks up the rest.
+
+    Raises:
+        CircuitOpenError: Storage is failing
+    """
+    moved = 0
+    try:
+        for product in products:
+            url = product.get('print_file')
+            if not url or is_archived(url) == to_archive or (skus is not None and product['sku'] not in skus):
+                continue
+            product['print_file'] = move_design_image(url, archive_path(url) if to_archive else live_path(url))
+            moved += 1
+    finally:
+        if moved:
+            ArchivedDesign.objects.filter(pk=design_id).update(products=products)
+
+
+def archive_images(limit=1000):
+    """
+    Move up to `limit` archived designs' images and print files to cold storage
+
+    Stops early while the storage circuit breaker is open; the remaining
+    rows are picked up by the next run. Rows that are shared or fail go
+    behind untried ones and are given up after ARCHIVE_IMAGE_MAX_ATTEMPTS
+    runs; images hosted elsewhere are given up at once.
+
+    Yields:
+        Dicts with 'design', 'status' ('moved', 'shared', 'skipped', 'deferred', 'failed') and 'error'
+    """
+    max_attempts = settings.ARCHIVE_IMAGE_MAX_ATTEMPTS
+    pending = ArchivedDesign.objects.filter(
+        image=F('original_image'), image_attempts__lt=max_attempts,
+    ).order_by('image_attempts', 'archived_at')
+    for design_id, image, products in list(pending.values_list('pk', 'image', 'products')[:limit]):
+        result = {'design': str(design_id), 'error': ''}
+        attempted = ArchivedDesign.objects.filter(pk=design_id)
+        if not any(marker in image for marker in LIVE_PREFIXES):
+            attempted.update(image_attempts=max_attempts)
+            yield {**result, 'status': 'skipped'}  # Hosted elsewhere; nothing of ours to move
+            continue
+        if Design.objects.filter(image=image).exists():
+            attempted.update(image_attempts=F('image_attempts') + 1)
+            yield {**result, 'status': 'shared'}  # Still used by a live design
+            continue
+        try:
+            # Print files first: the image moving is what marks the row done
+            _move_print_files(design_id, products, to_archive=True)
+            moved = move_design_image(image, archive_path(image))
+        except CircuitOpenError as e:
+            yield {**result, 'status': 'deferred', 'error': str(e)}
+            return
+        except Exception as e:
+            logger.error(f"Archiving image of design {design_id} failed: {type(e).__name__}: {e}")
+            attempted.update(image_attempts=F('image_attempts') + 1)
+            yield {**result, 'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+            continue
+        ArchivedDesign.objects.filter(pk=design_id, image=image).update(image=moved)
+        yield {**result, 'status': 'moved'}
+
+
+def restore_design(archived: ArchivedDesign) -> Design:
+    """
+    Put an archived design back in the live table with its image, SKUs,
+    print files and status events
+
+    SKUs another design took in the meantime, and products that no longer
+    exist, are left out; their print files stay in cold storage.
+
+    Raises:
+        CircuitOpenError: Storage is failing; nothing was restored
+    """
+    existing_products = {
+        str(pk) for pk in
+        Product.objects.filter(pk__in=[p['product'] for p in archived.products]).values_list('pk', flat=True)
+    }
+    taken = set(
+        DesignProduct.objects.filter(sku__in=[p['sku'] for p in archived.products]).values_list('sku', flat=True)
+    )
+    products = [p for p in archived.products if p['sku'] not in taken and p['product'] in existing_products]
+
+    # Record each move first, so a failed restore can simply be retried
+    _move_print_files(archived.pk, archived.products, to_archive=False, skus={p['sku'] for p in products})
+    image = archived.image
+    if archived.image_archived:
+        image = move_design_image(archived.image, live_path(archived.image))
+        ArchivedDesign.objects.filter(pk=archived.pk).update(image=image, original_image=image)
+
+    with transaction.atomic():
+        design = Design.objects.create(
+            id=archived.id, creator_id=archived.creator_id, title=archived.title,
+            description=archived.description, image=image, image_sha256=archived.image_sha256,
+            status=archived.status, reject_reason=archived.reject_reason, royalty_rate=archived.royalty_rate,
+            **{field: value for field, value in archived.image_metadata.items() if field in Design.IMAGE_METADATA_FIELDS},
+        )
+        # auto_now_add stamps the restore time; updated_at does restart, which
+        # keeps the design out of the next retention run
+        Design.objects.filter(pk=design.pk).update(created_at=archived.created_at)
+        DesignStatusEvent.objects.filter(pk__in=archived.status_events, design__isnull=True).update(design=design)
+
+        restored = [
+            DesignProduct(
+                design=design, product_id=p['product'], sku=p['sku'],
+                print_file=p['print_file'], print_file_key=p['print_file_key'],
+                print_file_bytes=p.get('print_file_bytes'),
+            )
+            for p in products
+        ]
+        DesignProduct.objects.bulk_create(restored)
+        # The design's own image was counted by its post_save signal
+        print_files = [dp.print_file_bytes for dp in restored if dp.print_file_bytes]
+        add_usage(archived.creator_id, sum(print_files), len(print_files))
+        archived.delete()
+        skus = [dp.sku for dp in restored]
+        transaction.on_commit(lambda: invalidate_skus(skus))
+    return design
@@ -0,0 +1,60 @@
+"""
+Signal handlers for designs app
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Design, DesignProduct, Product
+from .skus import invalidate_skus
+from .storage_usage import add_usage
+
+
+def _invalidate_on_commit(skus):
+    invalidate_skus(skus)
+    # A concurrent lookup may re-cache the old row before the write commits
+    transaction.on_commit(lambda: invalidate_skus(skus))
+
+
+@receiver(post_save, sender=Design)
+def design_saved(sender, instance, created, **kwargs):
+    """Title and status edits change every SKU of the design"""
+    if not created:
+        _invalidate_on_commit(list(DesignProduct.objects.filter(design=instance).values_list('sku', flat=True)))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    """Name and base cost edits change every SKU of the product"""
+    if not created:
+        _invalidate_on_commit(list(DesignProduct.objects.filter(product=instance).values_list('sku', flat=True)))
+
+
+@receiver(post_save, sender=DesignProduct)
+@receiver(post_delete, sender=DesignProduct)
+def design_product_changed(sender, instance, **kwargs):
+    """A new SKU replaces its cached 'unknown'; a deleted one must stop resolving"""
+    _invalidate_on_commit([instance.sku])
+
+
+@receiver(post_save, sender=Design)
+def design_stored(sender, instance, created, **kwargs):
+    """An uploaded (or restored) image counts toward its creator's storage"""
+    if created and instance.image_bytes:
+        add_usage(instance.creator_id, instance.image_bytes, 1)
+
+
+@receiver(post_delete, sender=Design)
+def design_removed(sender, instance, **kwargs):
+    """Deleted and archived designs stop counting"""
+    if instance.image_bytes:
+        add_usage(instance.creator_id, -instance.image_bytes, -1)
+
+
+@receiver(post_delete, sender=DesignProduct)
+def print_file_removed(sender, instance, **kwargs):
+    if instance.print_file_bytes:
+        # Runs before a cascading design delete removes the design row
+        creator_id = Design.objects.filter(pk=instance.design_id).values_list('creator_id', flat=True).first()
+        if creator_id:
+            add_usage(creator_id, -instance.print_file_bytes, -1)
@@ -0,0 +1,93 @@
+"""
+Batch SKU resolution for storefront integrations
+
+resolve_skus() answers a whole batch from the cache with one get_many and
+loads whatever is missing with one IN query on the unique sku index. Each
+SKU has its own cache entry, unknown SKUs included, and signal handlers
+drop exactly the entries a Design, Product or DesignProduct change affects.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+MISSING = False  # Cached for SKUs that do not exist; None cannot be told apart from a miss
+INVALIDATE_CHUNK = 1000
+
+
+def sku_cache_key(sku: str) -> str:
+    return f'designs:sku:{sku}'
+
+
+def invalidate_skus(skus):
+    """Drop cached lookups for these SKUs"""
+    keys = [sku_cache_key(sku) for sku in skus]
+    for i in range(0, len(keys), INVALIDATE_CHUNK):
+        cache.delete_many(keys[i:i + INVALIDATE_CHUNK])
+
+
+def image_path_template() -> str:
+    """Path of the catalog image variant with {} for the design id; one reverse() per batch, not per row"""
+    placeholder = uuid.UUID(int=0)
+    path = reverse('design_image', args=[placeholder, settings.CATALOG_IMAGE_WIDTH, 'webp'])
+    return path.replace(str(placeholder), '{}')
+
+
+def _load(skus):
+    """{sku: payload} for the SKUs that exist, from one query"""
+    from .models import DesignProduct
+
+    rows = DesignProduct.objects.filter(sku__in=skus).values_list(
+        'sku', 'design_id', 'design__title', 'design__status', 'product_id', 'product__name', 'product__base_cost',
+    )
+    image_path = image_path_template()
+    return {
+        sku: {
+            'sku': sku,
+            'design': str(design_id),
+            'title': title,
+            'status': status,
+            'product': str(product_id),
+            'product_name': product_name,
+            'base_cost': str(base_cost),
+            # Unapproved designs are never shown on a storefront
+            'image': image_path.format(design_id) if status == 'approved' else None,
+        }
+        for sku, design_id, title, status, product_id, product_name, base_cost in rows
+    }
+
+
+def resolve_skus(skus):
+    """
+    Look up many SKUs at once
+
+    Args:
+        skus: Iterable of SKU strings; duplicates are fine
+
+    Returns:
+        Dict of SKU -> payload dict, or None for unknown SKUs. Image paths
+        are relative to the site root.
+    """
+    skus = list(dict.fromkeys(skus))
+    timeout = settings.SKU_CACHE_TIMEOUT
+    if not timeout:
+        found = _load(skus)
+        return {sku: found.get(sku) for sku in skus}
+
+    cached = cache.get_many([sku_cache_key(sku) for sku in skus])
+    results = {}
+    missed = []
+    for sku in skus:
+        value = cached.get(sku_cache_key(sku))
+        if value is None:
+            missed.append(sku)
+        else:
+            results[sku] = value or None
+
+    if missed:
+        found = _load(missed)
+        cache.set_many({sku_cache_key(sku): found.get(sku, MISSING) for sku in missed}, timeout)
+        for sku in missed:
+            results[sku] = found.get(sku)
+    return {sku: results[sku] for sku in skus}
@@ -0,0 +1,145 @@
+"""
+Move design images saved to local media into Supabase Storage
+
+Uploads that hit the local fallback are stored under MEDIA_ROOT with a
+/media/ URL, which does not survive a redeploy on ephemeral hosts. Each
+such file is uploaded to the object path a direct upload would have used,
+then Design.image is swapped with a compare-and-set update, and only then
+is the local copy deleted. Progress lives in the designs table itself, so
+an interrupted run simply picks up what is still on /media/.
+"""
+import logging
+import math
+import mimetypes
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.files import File
+
+from picu import images, ratelimit
+from picu.circuit_breaker import CircuitOpenError
+from picu.metrics import STORAGE_FAILURES, STORAGE_LATENCY
+from picu.supabase_storage import HashingFile, stream_to_supabase
+
+from .storage_usage import delete_or_defer
+
+logger = logging.getLogger(__name__)
+
+LOCAL_PREFIX = '/media/designs/'
+
+
+def object_path(image_url: str) -> str:
+    """Bucket path for a local design image: the same creator/name layout upload_design_image uses"""
+    return image_url[len(LOCAL_PREFIX):]
+
+
+def upload_local_image(image_url: str) -> str:
+    """
+    Upload one local design image to Supabase Storage
+
+    Runs in a worker thread and touches no Django models. Uploads upsert,
+    so repeating one after an interrupted run is harmless.
+
+    Returns:
+        Public URL of the uploaded file
+    """
+    path = images.media_path(image_url)
+    content_type = mimetypes.guess_type(path)[0] or 'image/png'
+    start = time.perf_counter()
+    try:
+        with open(path, 'rb') as fh:
+            file = HashingFile(File(fh, os.path.basename(path)))
+            return stream_to_supabase(file, object_path(image_url), content_type)
+    except (CircuitOpenError, FileNotFoundError):
+        raise
+    except Exception:
+        STORAGE_FAILURES.inc(operation='migrate')
+        raise
+    finally:
+        STORAGE_LATENCY.observe(time.perf_counter() - start, operation='migrate')
+
+
+def _swap(design_id, local_url, remote_url) -> str:
+    """Point the design at the uploaded copy unless its image changed meanwhile"""
+    from .models import Design
+
+    swapped = Design.objects.filter(pk=design_id, image=local_url).update(image=remote_url)
+    if not swapped:
+        # Deleted or re-uploaded while we worked; the uploaded copy is unused
+        delete_or_defer(remote_url)
+        return 'changed'
+
+    if not Design.objects.filter(image=local_url).exists():
+        try:
+            os.remove(images.media_path(local_url))
+        except OSError as e:
+            logger.warning(f"Migrated {local_url} but could not delete it: {e}")
+    return 'migrated'
+
+
+def _local_designs(batch_size):
+    """Keyset-paginate (id, image) of designs still on local media"""
+    from .models import Design
+
+    queryset = Design.objects.filter(image__startswith=LOCAL_PREFIX).order_by('pk').values_list('pk', 'image')
+    last_pk = None
+    while True:
+        batch = list((queryset.filter(pk__gt=last_pk) if last_pk else queryset)[:batch_size])
+        if not batch:
+            return
+        yield from batch
+        last_pk = batch[-1][0]
+
+
+def migrate_local_images(workers=4, rate=5.0, batch_size=200):
+    """
+    Upload every local design image once, at most `rate` uploads per second
+
+    The rate is a token bucket in the default cache, so concurrent migrators
+    share it. Files that fail stay on /media/ for the next pass; while the
+    storage circuit breaker is open, the pass stops early.
+
+    Yields:
+        Dicts with 'design', 'local', 'url', 'status' and 'error'
+    """
+    burst = math.ceil(rate)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='picu-migrate')
+    in_flight = {}
+    breaker_open = False
+
+    def finish(future):
+        nonlocal breaker_open
+        design_id, local_url = in_flight.pop(future)
+        result = {'design': str(design_id), 'local': local_url, 'url': '', 'error': ''}
+        try:
+            result['url'] = future.result()
+        except CircuitOpenError as e:
+            breaker_open = True
+            return {**result, 'status': 'deferred', 'error': str(e)}
+        except FileNotFoundError:
+            logger.error(f"Local image is gone, cannot migrate design {design_id}: {local_url}")
+            return {**result, 'status': 'missing', 'error': 'file not found'}
+        except Exception as e:
+            logger.error(f"Migrating {local_url} failed: {type(e).__name__}: {e}")
+            return {**result, 'status': 'failed', 'error': f'{type(e).__name__}: {e}'}
+        return {**result, 'status': _swap(design_id, local_url, result['url'])}
+
+    try:
+        for design_id, local_url in _local_designs(batch_size):
+            if breaker_open:
+                break
+            while len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield finish(future)
+            while retry_after := ratelimit.hit('storage_migration', burst, burst / rate):
+                time.sleep(retry_after)
+            in_flight[pool.submit(upload_local_image, local_url)] = (design_id, local_url)
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(future)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
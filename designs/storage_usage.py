@@ -0,0 +1,278 @@
+"""
+Per-creator storage accounting and quotas
+
+Design images are stored under {creator id}/ in the bucket (designs/{creator
+id}/ on local media) and their print files under print/{sku}-{key}.png.
+StorageUsage keeps a running total per creator, moved by one UPDATE ...
+SET bytes = bytes + n whenever a design is uploaded, deleted, archived or
+restored and whenever a print file is written. Showing usage or checking a
+quota therefore reads one row instead of listing the bucket.
+
+reconcile_storage() recomputes the totals from the bucket listing, one
+folder per worker, to correct drift such as files removed by hand. Objects
+whose delete was refused while storage was failing are deleted first.
+"""
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LIST_PAGE_SIZE = 1000
+PRINT_FOLDER = 'print'
+ID_CHUNK = 500
+
+
+def add_usage(creator_id, size, files=0):
+    """Add to (or, negative, subtract from) a creator's running total"""
+    from .models import StorageUsage
+
+    if not size and not files:
+        return
+    delta = {'bytes': F('bytes') + size, 'files': F('files') + files, 'updated_at': timezone.now()}
+    if StorageUsage.objects.filter(creator_id=creator_id).update(**delta) or size <= 0:
+        return
+    try:
+        with transaction.atomic():
+            StorageUsage.objects.create(creator_id=creator_id, bytes=size, files=files)
+    except IntegrityError:
+        # Another upload created the row first
+        StorageUsage.objects.filter(creator_id=creator_id).update(**delta)
+
+
+def delete_or_defer(url) -> bool:
+    """
+    Delete a stored design image or print file; while storage is failing,
+    record it for retry_deletes() instead
+
+    Returns:
+        True when the object is gone
+    """
+    from picu.circuit_breaker import CircuitOpenError
+    from picu.supabase_storage import delete_design_image
+
+    from .models import PendingDelete
+
+    try:
+        return delete_design_image(url)
+    except CircuitOpenError:
+        PendingDelete.objects.get_or_create(url=url)
+        logger.warning(f"Storage circuit open, deleting {url} later")
+        return False
+
+
+def retry_deletes():
+    """
+    Delete the objects delete_or_defer() put off
+
+    Returns:
+        Number of objects deleted
+
+    Raises:
+        CircuitOpenError: Storage is still failing; the rest stay pending
+    """
+    from picu.supabase_storage import delete_design_image
+
+    from .models import PendingDelete
+
+    deleted = 0
+    for pk, url in list(PendingDelete.objects.values_list('pk', 'url')):
+        if delete_design_image(url):
+            PendingDelete.objects.filter(pk=pk).delete()
+            deleted += 1
+    return deleted
+
+
+def usage_and_quota(creator_id):
+    """
+    Returns:
+        Tuple of (bytes used, quota in bytes or None when unlimited)
+    """
+    from .models import StorageUsage
+
+    row = StorageUsage.objects.filter(creator_id=creator_id).values_list('bytes', 'quota_bytes').first()
+    used, quota = row or (0, None)
+    quota = settings.STORAGE_QUOTA_BYTES if quota is None else quota
+    return used, quota or None
+
+
+def _list_folder(prefix):
+    """Every entry of one bucket folder as (name, size; None for sub-folders); runs in a worker thread"""
+    from picu.supabase_storage import list_objects
+
+    entries = []
+    offset = 0
+    while True:
+        page = list_objects(prefix, LIST_PAGE_SIZE, offset)
+        entries += [(entry['name'], entry['size']) for entry in page]
+        if len(page) < LIST_PAGE_SIZE:
+            return entries
+        offset += len(page)
+
+
+def bucket_listing(workers=8):
+    """
+    {folder: [(name, size)]} of the bucket, each top-level folder listed by its own worker
+
+    Archived images are left out: they no longer count toward anyone's usage.
+    """
+    root = _list_folder('')
+    archive = settings.ARCHIVE_STORAGE_PREFIX.strip('/')
+    folders = [name for name, size in root if size is None and name != archive]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='picu-reconcile') as pool:
+        listing = {
+            folder: [(name, size) for name, size in entries if size is not None]
+            for folder, entries in zip(folders, pool.map(_list_folder, folders))
+        }
+    listing[''] = [(name, size) for name, size in root if size is not None]
+    return listing
+
+
+def local_listing():
+    """{folder: [(name, size)]} of design images and print files on local media"""
+    listing = {}
+    for base, folders in (
+        (os.path.join(settings.MEDIA_ROOT, 'designs'), None),
+        (settings.MEDIA_ROOT, {PRINT_FOLDER}),
+    ):
+        if not os.path.isdir(base):
+            continue
+        for folder in os.scandir(base):
+            if not folder.is_dir() or (folders is not None and folder.name not in folders):
+                continue
+            listing.setdefault(folder.name, []).extend(
+                (entry.name, entry.stat().st_size) for entry in os.scandir(folder.path) if entry.is_file()
+            )
+    return listing
+
+
+def _creator_of_skus(skus):
+    """{sku: creator id} from chunked IN queries"""
+    from .models import DesignProduct
+
+    skus = list(skus)
+    creators = {}
+    for i in range(0, len(skus), ID_CHUNK):
+        creators.update(
+            DesignProduct.objects.filter(sku__in=skus[i:i + ID_CHUNK]).values_list('sku', 'design__creator_id')
+        )
+    return creators
+
+
+def usage_from_listing(listing):
+    """
+    Attribute listed objects to creators
+
+    Returns:
+        Tuple of ({creator id: [bytes, files]}, [unattributed object names])
+    """
+    from accounts.models import User
+
+    totals = {}
+    unattributed = []
+    print_files = {}
+    for folder, entries in listing.items():
+        if folder == PRINT_FOLDER:
+            for name, size in entries:
+                # print/{sku}-{key}.png; SKUs contain hyphens, the key does not
+                print_files.setdefault(name.rpartition('-')[0], []).append((name, size))
+            continue
+        try:
+            creator_id = uuid.UUID(folder)
+        except ValueError:
+            unattributed += [f'{folder}/{name}' if folder else name for name, _ in entries]
+            continue
+        usage = totals.setdefault(creator_id, [0, 0])
+        usage[0] += sum(size for _, size in entries)
+        usage[1] += len(entries)
+
+    sku_creators = _creator_of_skus(print_files)
+    for sku, entries in print_files.items():
+        creator_id = sku_creators.get(sku)
+        if creator_id is None:
+            unattributed += [f'{PRINT_FOLDER}/{name}' for name, _ in entries]
+            continue
+        usage = totals.setdefault(creator_id, [0, 0])
+        usage[0] += sum(size for _, size in entries)
+        usage[1] += len(entries)
+
+    # Folders of deleted accounts
+    ids = list(totals)
+    existing = set()
+    for i in range(0, len(ids), ID_CHUNK):
+        existing.update(User.objects.filter(pk__in=ids[i:i + ID_CHUNK]).values_list('pk', flat=True))
+    for creator_id in set(ids) - existing:
+        unattributed.append(f'{creator_id}/*')
+        del totals[creator_id]
+    return totals, unattributed
+
+
+def reconcile_storage(workers=8, dry_run=False):
+    """
+    Recompute every creator's usage from what is actually stored
+
+    Deletes put off by delete_or_defer() are retried first, unless dry_run.
+    The bucket (when configured) and local media are listed in full before
+    any total is written, so a failed listing changes none. Totals are
+    corrected by the difference between the listing and the running total
+    read just before it, so uploads and deletes that land meanwhile keep
+    their own increments.
+
+    Returns:
+        Dict with 'creators' ({creator id: (bytes before, bytes listed)} for
+        the totals that changed), 'objects', 'bytes', 'unattributed' and
+        'deleted' (pending deletes carried out)
+    """
+    from .models import StorageUsage
+
+    deleted = 0 if dry_run else retry_deletes()
+    snapshot = {
+        creator_id: (used, files)
+        for creator_id, used, files in StorageUsage.objects.values_list('creator_id', 'bytes', 'files')
+    }
+    listing = local_listing()
+    if settings.SUPABASE_URL and settings.SUPABASE_KEY:
+        for folder, entries in bucket_listing(workers).items():
+            listing.setdefault(folder, []).extend(entries)
+    totals, unattributed = usage_from_listing(listing)
+
+    changed = {}
+    now = timezone.now()
+    for creator_id in set(totals) | set(snapshot):
+        listed_bytes, listed_files = totals.get(creator_id, (0, 0))
+        before_bytes, before_files = snapshot.get(creator_id, (0, 0))
+        if (listed_bytes, listed_files) != (before_bytes, before_files):
+            changed[creator_id] = (before_bytes, listed_bytes)
+    if not dry_run:
+        created = []
+        with transaction.atomic():
+            StorageUsage.objects.update(reconciled_at=now)
+            for creator_id, (before_bytes, listed_bytes) in changed.items():
+                listed_files = totals.get(creator_id, (0, 0))[1]
+                if creator_id not in snapshot:
+                    created.append(StorageUsage(
+                        creator_id=creator_id, bytes=listed_bytes, files=listed_files, reconciled_at=now,
+                    ))
+                    continue
+                StorageUsage.objects.filter(creator_id=creator_id).update(
+                    bytes=F('bytes') + (listed_bytes - before_bytes),
+                    files=F('files') + (listed_files - snapshot[creator_id][1]),
+                    updated_at=now,
+                )
+            # Rows an upload created since the snapshot already hold their own bytes
+            StorageUsage.objects.bulk_create(created, ignore_conflicts=True)
+
+    logger.info(f"Storage reconciled: {len(changed)} of {len(totals)} creators changed, {len(unattributed)} unattributed")
+    return {
+        'creators': changed,
+        'objects': sum(files for _, files in totals.values()),
+        'bytes': sum(used for used, _ in totals.values()),
+        'unattributed': unattributed,
+        'deleted': deleted,
+    }
@@ -1,3 +1,1159 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from accounts.models import User
+from picu import images, supabase_storage
+from picu.circuit_breaker import CLOSED, OPEN, CircuitOpenError
+from picu.uploads import ImageHeaderError, SizeLimitUploadHandler, read_image_metadata, sniff_image
+from .forms import DesignUploadForm
+from .image_metadata import backfill_image_metadata
+from .live import Broadcaster, Subscription
+from .mockups import _render, failed_mockups, mockup_key, render_mockup
+from .print_files import render_print_file
+from .models import ArchivedDesign, Design, DesignProduct, DesignStatusEvent, PendingDelete, Product, StorageUsage
+from .retention import archive_designs, archive_images, restore_design
+from .skus import resolve_skus
+from .storage_usage import add_usage, reconcile_storage
+from .storage_migration import _swap, migrate_local_images
+
+
+class MockupTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Kaos', base_cost=Decimal('45000'),
+            print_area={'x': 0.5, 'y': 0.5, 'width': 0.5, 'height': 0.5},
+        )
+        creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.design = Design.objects.create(
+            creator=creator, title='Desain', image='https://example.com/d.png', image_sha256='ab' * 32
+        )
+
+    def test_template_change_bumps_version_and_key(self):
+        key = mockup_key(self.design, self.product)
+
+        self.product.base_cost = Decimal('50000')
+        self.product.save()
+        self.assertEqual(self.product.mockup_version, 1)
+
+        self.product.print_area = {'x': 0.3, 'y': 0.3, 'width': 0.4, 'height': 0.4}
+        self.product.save()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.mockup_version, 2)
+        self.assertNotEqual(mockup_key(self.design, self.product), key)
+
+    def test_design_is_composited_inside_print_area(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            design_path = os.path.join(tmp, 'design.png')
+            Image.new('RGBA', (100, 100), (255, 0, 0, 255)).save(design_path)
+
+            data = render_mockup(design_path, None, self.product.print_area, 200, 90)
+
+        mockup = Image.open(io.BytesIO(data)).convert('RGB')
+        self.assertEqual(mockup.size, (200, 200))
+        red, green, _ = mockup.getpixel((150, 150))
+        self.assertGreater(red, 200)
+        self.assertLess(green, 50)
+        self.assertNotEqual(mockup.getpixel((50, 50))[:2], (red, green))
+
+    def test_failed_render_backs_off_and_stops_polling(self):
+        from unittest import mock
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.enterContext(mock.patch.object(
+            images, 'get_cache', return_value=images.DiskLRUCache(tmp.name, max_bytes=10_000),
+        ))
+        self.enterContext(mock.patch.object(images, 'source_path', side_effect=OSError('unreachable')))
+        DesignProduct.objects.create(design=self.design, product=self.product, sku='KAOS-1')
+        self.client.force_login(self.design.creator)
+
+        _render(mockup_key(self.design, self.product), self.design.image, None, self.product.print_area)
+
+        with mock.patch.object(images, 'get_executor') as executor:
+            response = self.client.get(reverse('designs:mockups', args=[self.design.pk]))
+        executor.return_value.submit.assert_not_called()
+        self.assertNotContains(response, 'hx-trigger')
+        self.assertContains(response, 'Mockup tidak tersedia')
+
+        # Once the backoff has passed the next page view queues it again
+        with mock.patch('designs.mockups.time.time', return_value=timezone.now().timestamp() + 3600):
+            self.assertEqual(failed_mockups(self.design, [self.product]), set())
+
+
+class PrintFileTests(TestCase):
+    def test_print_file_is_flattened_at_print_size(self):
+        spec = {'width_mm': 50.8, 'height_mm': 25.4, 'dpi': 300}
+        with tempfile.TemporaryDirectory() as tmp:
+            design_path = os.path.join(tmp, 'design.png')
+            output_path = os.path.join(tmp, 'print.png')
+            Image.new('RGBA', (100, 100), (0, 0, 255, 128)).save(design_path)
+
+            width, height, size = render_print_file(design_path, spec, output_path)
+
+            self.assertEqual((width, height), (600, 300))
+            self.assertEqual(size, os.path.getsize(output_path))
+            with Image.open(output_path) as printed:
+                self.assertEqual(printed.mode, 'RGB')
+                self.assertEqual(round(printed.info['dpi'][0]), 300)
+                self.assertEqual(printed.getpixel((0, 0)), (255, 255, 255))
+
+    def test_regenerating_replaces_the_previous_file_and_its_usage(self):
+        from .print_files import generate_print_files
+
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name, SUPABASE_URL='', SUPABASE_KEY=''))
+        os.makedirs(os.path.join(media.name, 'designs'))
+        os.makedirs(os.path.join(media.name, 'print'))
+        Image.new('RGB', (50, 50), (255, 0, 0)).save(os.path.join(media.name, 'designs', 'd.png'))
+        creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        design = Design.objects.create(creator=creator, title='Desain', image='/media/designs/d.png', status='approved')
+        product = Product.objects.create(name='Stiker', base_cost=Decimal('5000'), category='sticker')
+        dp = DesignProduct.objects.create(design=design, product=product)
+        old_path = os.path.join(media.name, 'print', f'{dp.sku}-old.png')
+        with open(old_path, 'wb') as fh:
+            fh.write(b'12345')
+        DesignProduct.objects.filter(pk=dp.pk).update(
+            print_file=f'/media/print/{dp.sku}-old.png', print_file_key='stale', print_file_bytes=5,
+        )
+        add_usage(creator.pk, 5, 1)
+        before = StorageUsage.objects.get(creator=creator)
+
+        [result] = generate_print_files(DesignProduct.objects.filter(pk=dp.pk), workers=1)
+
+        self.assertEqual(result['status'], 'generated')
+        self.assertFalse(os.path.exists(old_path))
+        usage = StorageUsage.objects.get(creator=creator)
+        self.assertEqual((usage.bytes - before.bytes, usage.files - before.files), (result['bytes'] - 5, 0))
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='admin@picu.test', password='secret', full_name='Admin', phone='0812'
+        )
+        self.product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+        self.client.force_login(self.admin)
+
+    def _add_designs(self, count):
+        for i in range(count):
+            creator = User.objects.create_user(
+                email=f'creator{User.objects.count()}@picu.test', password=None,
+                full_name='Creator', phone='0812', role='creator',
+            )
+            design = Design.objects.create(creator=creator, title=f'Desain {i}', image='https://example.com/d.png')
+            DesignProduct.objects.create(design=design, product=self.product)
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = [
+            reverse('admin:designs_design_changelist'),
+            reverse('admin:designs_designproduct_changelist'),
+            reverse('admin:accounts_user_changelist'),
+            reverse('admin:designs_design_changelist') + '?q=desain',
+        ]
+        self._add_designs(2)
+        before = [self._queries(url) for url in urls]
+        self._add_designs(10)
+        after = [self._queries(url) for url in urls]
+        self.assertEqual(before, after)
+
+
+class LiveBroadcastTests(TestCase):
+    def test_dispatch_filters_by_creator_and_counts_pending_for_admins(self):
+        creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        Design.objects.create(creator=creator, title='Pending', image='https://example.com/p.png')
+        broadcaster = Broadcaster()
+        own = Subscription(creator.id, is_admin=False)
+        other = Subscription(uuid.uuid4(), is_admin=False)
+        admin = Subscription(uuid.uuid4(), is_admin=True)
+        broadcaster.subscriptions.update({own, other, admin})
+
+        event = {'id': 1, 'design': str(uuid.uuid4()), 'creator': str(creator.id), 'event': 'approved', 'status': 'approved'}
+        broadcaster.dispatch([event])
+
+        name, html = own.queue.get_nowait()
+        self.assertEqual(name, f"design-{event['design']}")
+        self.assertIn('badge-approved', html)
+        self.assertTrue(other.queue.empty())
+        self.assertEqual(admin.queue.get_nowait()[0], name)
+        self.assertEqual(admin.queue.get_nowait(), ('pending-count', '1'))
+
+
+class LivePollingTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.design = Design.objects.create(creator=self.creator, title='Desain', image='https://example.com/d.png')
+        self.client.force_login(self.creator)
+
+    def test_wsgi_pages_poll_instead_of_streaming(self):
+        html = self.client.get(reverse('designs:list')).content.decode()
+        self.assertNotIn('sse-connect', html)
+        self.assertIn(reverse('designs:events_poll') + '?since=', html)
+        self.assertEqual(self.client.get(reverse('designs:events')).status_code, 204)
+
+        with override_settings(LIVE_SSE_ENABLED=True):
+            html = self.client.get(reverse('designs:list')).content.decode()
+        self.assertIn('sse-connect', html)
+        self.assertNotIn(reverse('designs:events_poll'), html)
+
+    def test_poll_returns_changed_badges_and_advances_cursor(self):
+        since = int(timezone.now().timestamp()) - 1
+        self.design.status = 'approved'
+        self.design.save()
+        event = DesignStatusEvent.record(self.design, 'approved', from_status='pending')
+        other = User.objects.create_user(
+            email='other@picu.test', password='secret', full_name='Other', phone='0812', role='creator'
+        )
+        DesignStatusEvent.record(Design.objects.create(creator=other, title='Lain', image=''), 'uploaded')
+
+        html = self.client.get(reverse('designs:events_poll'), {'since': since}).content.decode()
+        self.assertIn(f'id="design-status-{self.design.pk}" hx-swap-oob="innerHTML"', html)
+        self.assertIn('badge-approved', html)
+        self.assertEqual(html.count('hx-swap-oob'), 1)  # Not the other creator's design
+        self.assertIn(f'?after={event.pk}"', html)
+        self.assertIn('hx-trigger="every 20s"', html)
+
+        html = self.client.get(reverse('designs:events_poll'), {'after': event.pk}).content.decode()
+        self.assertNotIn('hx-swap-oob', html)
+        self.assertIn(f'?after={event.pk}"', html)
+
+
+class HtmxModerationTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email='admin@picu.test', password='secret', full_name='Admin', phone='0812'
+        )
+        self.creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+        self.client.force_login(self.admin)
+
+    def _design(self):
+        design = Design.objects.create(creator=self.creator, title='Desain', image='https://example.com/d.png')
+        DesignProduct.objects.create(design=design, product=self.product)
+        return design
+
+    def _htmx(self, target, current_url):
+        return {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': target, 'HTTP_HX_CURRENT_URL': current_url}
+
+    def test_approve_returns_review_panel_instead_of_page(self):
+        design = self._design()
+        url = reverse('designs:approve', args=[design.pk])
+        with CaptureQueriesContext(connection) as full:
+            page = self.client.post(url, follow=True)
+        self.assertEqual(page.status_code, 200)
+
+        design.status = 'pending'
+        design.save()
+        detail = 'http://testserver' + reverse('designs:detail', args=[design.pk])
+        with CaptureQueriesContext(connection) as partial:
+            response = self.client.post(url, **self._htmx('review-panel', detail))
+
+        self.assertEqual(response.status_code, 200)
+        html = response.content.decode()
+        self.assertIn('id="review-panel"', html)
+        self.assertIn(f'id="design-status-{design.pk}" hx-swap-oob="innerHTML"', html)
+        self.assertIn('badge-approved', html)
+        self.assertNotIn('data-stat', html)  # No counters on the detail page
+        self.assertLess(len(response.content) * 5, len(page.content))
+        self.assertLess(len(partial), len(full))
+
+    def test_quick_approve_on_dashboard_removes_row_and_updates_counters(self):
+        design = self._design()
+        self._design()
+        dashboard = 'http://testserver' + reverse('dashboard:admin_dashboard')
+        response = self.client.post(
+            reverse('designs:approve', args=[design.pk]), **self._htmx(f'pending-row-{design.pk}', dashboard)
+        )
+
+        html = response.content.decode()
+        self.assertNotIn('review-panel', html)
+        self.assertIn('hx-swap-oob="innerHTML:[data-stat=pending_reviews]">1</span>', html)
+        self.assertIn('hx-swap-oob="innerHTML:[data-stat=approved_designs]">1</span>', html)
+
+    def test_delete_removes_card_or_redirects(self):
+        design = self._design()
+        listing = 'http://testserver' + reverse('designs:list')
+        response = self.client.post(
+            reverse('designs:delete', args=[design.pk]), **self._htmx(f'design-card-{design.pk}', listing)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.strip(), b'')
+        self.assertFalse(Design.objects.filter(pk=design.pk).exists())
+
+        design = self._design()
+        response = self.client.post(reverse('designs:delete', args=[design.pk]), **self._htmx('', listing))
+        self.assertEqual(response['HX-Redirect'], reverse('designs:list'))
+
+        design = self._design()
+        response = self.client.post(reverse('designs:delete', args=[design.pk]))
+        self.assertRedirects(response, reverse('designs:list'))
+
+
+@override_settings(RATE_LIMITS={'upload': {'creator': (2, 60), 'admin': (5, 60), 'ip': (4, 60)}})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@picu.test', password='secret', full_name='Admin', phone='0812'
+        )
+
+    def test_role_and_ip_buckets_answer_429_with_retry_after(self):
+        url = reverse('designs:upload')
+        self.client.force_login(self.creator)
+        self.assertEqual(self.client.get(url).status_code, 200)  # Viewing the form is free
+        for _ in range(2):
+            self.assertNotEqual(self.client.post(url).status_code, 429)
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')  # One token every 60 / 2 seconds
+
+        # Admins have their own, larger bucket until the shared IP bucket runs dry
+        self.client.force_login(self.admin)
+        for _ in range(2):
+            self.assertNotEqual(self.client.post(url).status_code, 429)
+        self.assertEqual(self.client.post(url).status_code, 429)
+        self.assertEqual(self.client.post(url, REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    @override_settings(RATE_LIMITS={'upload': {'creator': (2, 60), 'ip': (1, 60)}})
+    def test_rejected_request_is_not_charged_to_other_buckets(self):
+        from django.test import RequestFactory
+
+        from picu.ratelimit import check
+
+        def request(ip):
+            request = RequestFactory().post('/', REMOTE_ADDR=ip)
+            request.user = self.creator
+            return request
+
+        self.assertEqual(check(request('10.0.0.1'), 'upload'), 0)
+        self.assertGreater(check(request('10.0.0.1'), 'upload'), 0)  # IP bucket empty
+        self.assertEqual(check(request('10.0.0.2'), 'upload'), 0)  # The user still had a token
+        self.assertGreater(check(request('10.0.0.3'), 'upload'), 0)
+
+
+@override_settings(
+    SUPABASE_URL='https://storage.picu.test', SUPABASE_KEY='key',
+    STORAGE_BREAKER_MIN_CALLS=2, STORAGE_BREAKER_FAILURE_RATE=0.5,
+)
+class StorageCircuitBreakerTests(TestCase):
+    def setUp(self):
+        import httpx
+
+        self.status = 503
+        self.calls = 0
+
+        def handler(request):
+            self.calls += 1
+            request.read()
+            return httpx.Response(self.status)
+
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media.name))
+        self._swap('_http_client', httpx.Client(transport=httpx.MockTransport(handler)))
+        self._swap('_storage_breaker', None)
+
+    def _swap(self, name, value):
+        previous = getattr(supabase_storage, name)
+        setattr(supabase_storage, name, value)
+        self.addCleanup(setattr, supabase_storage, name, previous)
+
+    def _upload(self):
+        return supabase_storage.upload_design_image(SimpleUploadedFile('d.png', b'png-bytes', 'image/png'), 'creator')
+
+    def test_open_breaker_falls_back_without_network_until_trial_succeeds(self):
+        for _ in range(2):
+            self.assertTrue(self._upload().startswith('/media/designs/creator/'))
+        breaker = supabase_storage.get_storage_breaker()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(self.calls, 2)
+
+        self.assertTrue(self._upload().startswith('/media/'))
+        self.assertEqual(self.calls, 2)  # Failed over without a request
+
+        # After the cool-down one trial call goes out and closes the breaker
+        breaker.opened_at -= breaker.open_seconds
+        self.status = 200
+        self.assertTrue(self._upload().startswith('https://storage.picu.test/storage/v1/object/public/'))
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_client_errors_do_not_open_the_breaker(self):
+        self.status = 400
+        for _ in range(3):
+            self._upload()
+        self.assertEqual(supabase_storage.get_storage_breaker().state, CLOSED)
+        self.assertEqual(self.calls, 3)
+
+
+    def test_deletes_refused_by_an_open_breaker_are_retried_later(self):
+        from unittest import mock
+
+        from .storage_usage import delete_or_defer, retry_deletes
+
+        url = 'https://storage.picu.test/storage/v1/object/public/designs/c/d.png'
+        with mock.patch.object(supabase_storage, 'delete_design_image', side_effect=CircuitOpenError('open')):
+            self.assertFalse(delete_or_defer(url))
+            self.assertFalse(delete_or_defer(url))
+            with self.assertRaises(CircuitOpenError):
+                retry_deletes()
+        self.assertEqual(list(PendingDelete.objects.values_list('url', flat=True)), [url])
+
+        with mock.patch.object(supabase_storage, 'delete_design_image', return_value=True) as delete:
+            self.assertEqual(retry_deletes(), 1)
+        delete.assert_called_once_with(url)
+        self.assertFalse(PendingDelete.objects.exists())
+
+
+@override_settings(SUPABASE_URL='https://storage.picu.test', SUPABASE_KEY='key')
+class StorageMigrationTests(TestCase):
+    def setUp(self):
+        import httpx
+
+        self.uploaded = []
+
+        def handler(request):
+            self.uploaded.append((request.url.path, request.read()))
+            return httpx.Response(200)
+
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media.name))
+        for name, value in (('_http_client', httpx.Client(transport=httpx.MockTransport(handler))),
+                            ('_storage_breaker', None)):
+            self.addCleanup(setattr, supabase_storage, name, getattr(supabase_storage, name))
+            setattr(supabase_storage, name, value)
+        cache.clear()
+        self.creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+
+    def _local_design(self, name):
+        os.makedirs(os.path.join(self.media.name, 'designs', 'c1'), exist_ok=True)
+        with open(os.path.join(self.media.name, 'designs', 'c1', name), 'wb') as fh:
+            fh.write(b'png-' + name.encode())
+        return Design.objects.create(creator=self.creator, title=name, image=f'/media/designs/c1/{name}')
+
+    def test_local_images_move_to_bucket_then_local_copy_is_deleted(self):
+        design = self._local_design('a.png')
+        gone = Design.objects.create(creator=self.creator, title='Gone', image='/media/designs/c1/gone.png')
+
+        results = {r['local']: r for r in migrate_local_images(workers=2, rate=100)}
+
+        self.assertEqual(results[design.image]['status'], 'migrated')
+        self.assertEqual(results[gone.image]['status'], 'missing')
+        self.assertEqual(self.uploaded, [('/storage/v1/object/designs/c1/a.png', b'png-a.png')])
+        design.refresh_from_db()
+        self.assertEqual(design.image, 'https://storage.picu.test/storage/v1/object/public/designs/c1/a.png')
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, 'designs', 'c1', 'a.png')))
+        # Restarting only revisits what is still on local media
+        self.assertEqual([r['status'] for r in migrate_local_images()], ['missing'])
+
+    def test_swap_leaves_designs_changed_meanwhile_alone(self):
+        design = self._local_design('b.png')
+        Design.objects.filter(pk=design.pk).update(image='https://elsewhere.test/b.png')
+
+        self.assertEqual(_swap(design.pk, '/media/designs/c1/b.png', 'https://storage.picu.test/x.png'), 'changed')
+        design.refresh_from_db()
+        self.assertEqual(design.image, 'https://elsewhere.test/b.png')
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, 'designs', 'c1', 'b.png')))
+
+
+@override_settings(SKU_CACHE_TIMEOUT=60, STOREFRONT_API_TOKEN='storefront-secret')
+class SkuLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+        self.design = Design.objects.create(
+            creator=creator, title='Desain', image='https://example.com/d.png', status='approved',
+        )
+        pending = Design.objects.create(creator=creator, title='Baru', image='https://example.com/p.png')
+        self.sku = DesignProduct.objects.create(design=self.design, product=self.product).sku
+        self.pending_sku = DesignProduct.objects.create(design=pending, product=self.product).sku
+
+    def test_batch_is_one_query_then_cached_per_sku(self):
+        skus = [self.sku, self.pending_sku, 'PICU-NOPE', self.sku]
+        with CaptureQueriesContext(connection) as queries:
+            results = resolve_skus(skus)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(list(results), [self.sku, self.pending_sku, 'PICU-NOPE'])
+        self.assertEqual(results[self.sku]['base_cost'], '45000.00')
+        self.assertEqual(results[self.sku]['image'], f'/img/{self.design.pk}/800.webp')
+        self.assertIsNone(results[self.pending_sku]['image'])
+        self.assertIsNone(results['PICU-NOPE'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(resolve_skus(skus), results)
+        self.assertEqual(len(queries), 0)
+
+    def test_changes_invalidate_only_their_skus(self):
+        resolve_skus([self.sku, self.pending_sku, 'PICU-NEW'])
+
+        self.design.title = 'Desain Baru'
+        self.design.save()
+        self.product.base_cost = Decimal('50000')
+        self.product.save()
+        DesignProduct.objects.create(
+            design=self.design, product=Product.objects.create(name='Mug', base_cost=Decimal('30000')), sku='PICU-NEW',
+        )
+
+        results = resolve_skus([self.sku, self.pending_sku, 'PICU-NEW'])
+        self.assertEqual(results[self.sku]['title'], 'Desain Baru')
+        self.assertEqual(results[self.pending_sku]['base_cost'], '50000.00')
+        self.assertEqual(results['PICU-NEW']['product_name'], 'Mug')
+
+    def test_endpoint(self):
+        url = reverse('sku_lookup')
+        body = json.dumps({'skus': [self.sku, 'PICU-NOPE']})
+
+        self.assertEqual(self.client.post(url, body, content_type='application/json').status_code, 403)
+
+        auth = {'HTTP_AUTHORIZATION': 'Bearer storefront-secret'}
+        response = self.client.post(url, body, content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(results[self.sku]['image'], f'http://testserver/img/{self.design.pk}/800.webp')
+        self.assertIsNone(results['PICU-NOPE'])
+
+        with override_settings(SKU_LOOKUP_MAX=1):
+            response = self.client.post(url, body, content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 413)
+
+
+@override_settings(CATALOG_PAGE_SIZE=2)
+class CatalogApiTests(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+        self.approved = []
+        for i in range(5):
+            design = Design.objects.create(
+                creator=creator, title=f'Desain {i}', image='https://example.com/d.png', status='approved',
+            )
+            DesignProduct.objects.create(design=design, product=product)
+            self.approved.append(design)
+        # Same timestamp for two designs: the id must break the tie without skipping either
+        Design.objects.filter(pk__in=[d.pk for d in self.approved[1:3]]).update(created_at=self.approved[1].created_at)
+        Design.objects.create(creator=creator, title='Pending', image='https://example.com/p.png')
+
+    def _pages(self, url):
+        ids, queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            queries.append(len(captured))
+            ids += [item['id'] for item in response.json()['data']]
+            url = response.json()['next']
+        return ids, queries
+
+    def test_keyset_pages_cover_every_approved_design_once(self):
+        ids, queries = self._pages(reverse('catalog_designs'))
+
+        expected = Design.objects.filter(status='approved').order_by('-created_at', '-id').values_list('pk', flat=True)
+        self.assertEqual(ids, [str(pk) for pk in expected])
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(set(queries)), 1)
+
+    def test_sparse_fieldsets_and_etag(self):
+        url = reverse('catalog_designs') + '?fields=title,products&limit=1'
+        response = self.client.get(url)
+        item = response.json()['data'][0]
+        self.assertEqual(set(item), {'id', 'title', 'products'})
+        self.assertEqual(item['products'][0]['product'], 'Kaos')
+        self.assertIn('fields=title%2Cproducts', response.json()['next'])
+        self.assertNotIn(b' ', response.content.split(b'"title"')[0])
+
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse('catalog_designs') + '?fields=title')
+        self.assertEqual(len(captured), 1)  # No products query when they are not requested
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        self.assertEqual(self.client.get(reverse('catalog_designs') + '?fields=secret').status_code, 400)
+        self.assertEqual(self.client.get(reverse('catalog_designs') + '?cursor=nope').status_code, 400)
+
+    def test_creator_is_listed_only_by_opt_in_display_name(self):
+        url = reverse('catalog_designs') + '?fields=creator&limit=1'
+        self.assertIsNone(self.client.get(url).json()['data'][0]['creator'])
+
+        User.objects.filter(email='creator@picu.test').update(display_name='picu.art')
+        body = self.client.get(url).content.decode()
+        self.assertIn('"creator":"picu.art"', body)
+        self.assertNotIn('Creator"', body)
+
+
+@override_settings(DESIGN_RETENTION_DAYS={'rejected': 90}, ARCHIVE_STORAGE_PREFIX='archive')
+class RetentionTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media.name))
+        self.creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+        self.old = timezone.now() - timedelta(days=91)
+
+    def _design(self, name, status='rejected', updated_at=None):
+        os.makedirs(os.path.join(self.media.name, 'designs', 'c1'), exist_ok=True)
+        with open(os.path.join(self.media.name, 'designs', 'c1', name), 'wb') as fh:
+            fh.write(b'png')
+        design = Design.objects.create(
+            creator=self.creator, title=name, image=f'/media/designs/c1/{name}', status=status,
+        )
+        DesignProduct.objects.create(design=design, product=self.product)
+        Design.objects.filter(pk=design.pk).update(updated_at=updated_at or self.old, created_at=self.old)
+        return design
+
+    def test_only_stale_unsold_designs_are_archived(self):
+        from payouts.models import RoyaltyEntry
+
+        stale = self._design('stale.png')
+        self._design('recent.png', updated_at=timezone.now() - timedelta(days=10))
+        self._design('approved.png', status='approved')
+        sold = self._design('sold.png')
+        RoyaltyEntry.for_sale(
+            DesignProduct.objects.select_related('design', 'product').get(design=sold), 1, '100000', 'order-1', timezone.now(),
+        ).save()
+
+        self.assertEqual(list(archive_designs(batch_size=1)), [1])
+
+        self.assertEqual(list(ArchivedDesign.objects.values_list('pk', flat=True)), [stale.pk])
+        self.assertFalse(Design.objects.filter(pk=stale.pk).exists())
+        self.assertEqual(Design.objects.count(), 3)
+        self.assertEqual(list(archive_designs()), [])
+
+    def test_image_moves_to_cold_storage_and_restore_reverses_everything(self):
+        design = self._design('a.png')
+        sku = DesignProduct.objects.get(design=design).sku
+        os.makedirs(os.path.join(self.media.name, 'print'))
+        with open(os.path.join(self.media.name, 'print', f'{sku}-k.png'), 'wb') as fh:
+            fh.write(b'print')
+        DesignProduct.objects.filter(sku=sku).update(print_file=f'/media/print/{sku}-k.png', print_file_bytes=5)
+        event = DesignStatusEvent.record(design, 'rejected', from_status='pending')
+        list(archive_designs())
+        event.refresh_from_db()
+        self.assertIsNone(event.design_id)
+
+        self.assertEqual([r['status'] for r in archive_images()], ['moved'])
+        archived = ArchivedDesign.objects.get(pk=design.pk)
+        self.assertEqual(archived.image, '/media/archive/designs/c1/a.png')
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, 'archive', 'designs', 'c1', 'a.png')))
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, 'designs', 'c1', 'a.png')))
+        self.assertEqual(archived.products[0]['print_file'], f'/media/archive/print/{sku}-k.png')
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, 'print', f'{sku}-k.png')))
+        self.assertEqual(list(archive_images()), [])
+        self.assertIsNone(resolve_skus([sku])[sku])
+
+        restored = restore_design(archived)
+
+        restored.refresh_from_db()
+        self.assertEqual(restored.pk, design.pk)
+        self.assertEqual(restored.created_at, self.old)
+        self.assertEqual(restored.image, '/media/designs/c1/a.png')
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, 'designs', 'c1', 'a.png')))
+        self.assertEqual(
+            list(DesignProduct.objects.filter(design=restored).values_list('sku', 'print_file')),
+            [(sku, f'/media/print/{sku}-k.png')],
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.media.name, 'print', f'{sku}-k.png')))
+        self.assertEqual(list(restored.status_events.values_list('pk', flat=True)), [event.pk])
+        self.assertFalse(ArchivedDesign.objects.exists())
+
+    @override_settings(ARCHIVE_IMAGE_MAX_ATTEMPTS=2)
+    def test_images_that_cannot_move_stop_blocking_the_queue(self):
+        elsewhere = self._design('elsewhere.png')
+        broken = self._design('broken.png')
+        pending = self._design('pending.png')
+        Design.objects.filter(pk=elsewhere.pk).update(image='https://cdn.example.com/elsewhere.png')
+        list(archive_designs())
+        ArchivedDesign.objects.filter(pk=pending.pk).update(archived_at=timezone.now())
+        os.remove(os.path.join(self.media.name, 'designs', 'c1', 'broken.png'))
+
+        first = {r['design']: r['status'] for r in archive_images(limit=2)}
+        self.assertEqual(set(first.values()), {'skipped', 'failed'})
+        self.assertEqual([r['design'] for r in archive_images(limit=1)], [str(pending.pk)])
+        self.assertEqual([r['status'] for r in archive_images()], ['failed'])
+        self.assertEqual(list(archive_images()), [])
+
+    def test_restore_command_accepts_any_uuid_spelling(self):
+        from django.core.management import CommandError, call_command
+
+        design = self._design('a.png')
+        list(archive_designs())
+        with self.assertRaisesRegex(CommandError, 'must be UUIDs'):
+            call_command('archive_designs', '--restore', 'not-a-uuid', stdout=io.StringIO(), stderr=io.StringIO())
+
+        call_command('archive_designs', '--restore', design.pk.hex.upper(), stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.assertTrue(Design.objects.filter(pk=design.pk).exists())
+
+    def test_admin_restore_reports_failures_and_continues(self):
+        admin_user = User.objects.create_superuser(
+            email='admin@picu.test', password='secret', full_name='Admin', phone='0812'
+        )
+        missing = self._design('missing.png')
+        present = self._design('present.png')
+        list(archive_designs())
+        list(archive_images())
+        os.remove(os.path.join(self.media.name, 'archive', 'designs', 'c1', 'missing.png'))
+
+        self.client.force_login(admin_user)
+        response = self.client.post(reverse('admin:designs_archiveddesign_changelist'), {
+            'action': 'restore', '_selected_action': [str(missing.pk), str(present.pk)],
+        }, follow=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'missing.png (')
+        self.assertContains(response, '1 designs restored')
+        self.assertTrue(Design.objects.filter(pk=present.pk).exists())
+        self.assertTrue(ArchivedDesign.objects.filter(pk=missing.pk).exists())
+
+
+def _image_bytes(mode, size, fmt, **options):
+    output = io.BytesIO()
+    Image.new(mode, size).save(output, format=fmt, **options)
+    return output.getvalue()
+
+
+class ImageMetadataTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media.name, SUPABASE_URL='', SUPABASE_KEY=''))
+        self.creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.product = Product.objects.create(name='Hoodie', base_cost=Decimal('120000'))
+
+    def test_metadata_comes_from_the_header(self):
+        png = read_image_metadata(io.BytesIO(_image_bytes('RGBA', (40, 30), 'PNG', dpi=(300, 300))))
+        self.assertEqual(png, {
+            'image_width': 40, 'image_height': 30, 'image_dpi': 300, 'image_mode': 'RGBA', 'image_has_alpha': True,
+        })
+        jpeg = read_image_metadata(io.BytesIO(_image_bytes('CMYK', (20, 10), 'JPEG', dpi=(150, 150))))
+        self.assertEqual((jpeg['image_mode'], jpeg['image_dpi'], jpeg['image_has_alpha']), ('CMYK', 150, False))
+        palette = read_image_metadata(io.BytesIO(_image_bytes('P', (5, 5), 'PNG', transparency=0)))
+        self.assertEqual((palette['image_dpi'], palette['image_has_alpha']), (None, True))
+
+    def test_upload_stores_metadata(self):
+        self.client.force_login(self.creator)
+        data = _image_bytes('RGB', (64, 48), 'PNG', dpi=(72, 72))
+        response = self.client.post(reverse('designs:upload'), {
+            'title': 'Desain', 'products': [self.product.pk],
+            'image_file': SimpleUploadedFile('d.png', data, 'image/png'),
+        })
+        self.assertRedirects(response, reverse('designs:list'))
+        design = Design.objects.get()
+        self.assertEqual(
+            [getattr(design, field) for field in Design.IMAGE_METADATA_FIELDS], [64, 48, 72, 'RGB', False, len(data)],
+        )
+
+    @override_settings(IMAGE_METADATA_HEAD_BYTES=64)
+    def test_backfill_reads_only_the_head_of_remote_images(self):
+        import httpx
+
+        small = _image_bytes('RGB', (300, 200), 'PNG')
+        # EXIF ahead of the frame header pushes it past the first range
+        exif = Image.Exif()
+        exif[0x010E] = 'x' * 500
+        large = _image_bytes('RGB', (120, 80), 'JPEG', exif=exif.tobytes())
+        files = {'/small.png': small, '/large.jpg': large}
+        requests = []
+
+        def handler(request):
+            body = files[request.url.path]
+            requests.append((request.url.path, request.headers.get('Range')))
+            if 'Range' in request.headers:
+                end = int(request.headers['Range'].rpartition('-')[2])
+                return httpx.Response(206, content=body[:end + 1], headers={
+                    'Content-Range': f'bytes 0-{end}/{len(body)}',
+                })
+            return httpx.Response(200, content=body)
+
+        self.addCleanup(setattr, supabase_storage, '_http_client', supabase_storage._http_client)
+        supabase_storage._http_client = httpx.Client(transport=httpx.MockTransport(handler))
+        small_design = Design.objects.create(creator=self.creator, title='S', image='https://cdn.test/small.png')
+        large_design = Design.objects.create(creator=self.creator, title='L', image='https://cdn.test/large.jpg')
+
+        results = list(backfill_image_metadata(workers=2))
+
+        self.assertEqual(sorted(r['status'] for r in results), ['indexed', 'indexed'])
+        self.assertEqual(requests.count(('/small.png', 'bytes=0-63')), 1)
+        self.assertNotIn(('/small.png', None), requests)
+        self.assertIn(('/large.jpg', None), requests)  # Only the image whose header did not fit is read in full
+        small_design.refresh_from_db()
+        large_design.refresh_from_db()
+        self.assertEqual((small_design.image_width, small_design.image_bytes), (300, len(small)))
+        self.assertEqual((large_design.image_width, large_design.image_bytes), (120, len(large)))
+        self.assertEqual(list(backfill_image_metadata()), [])
+
+    def test_admin_filters_designs_below_print_dpi(self):
+        admin_user = User.objects.create_superuser(
+            email='admin@picu.test', password='secret', full_name='Admin', phone='0812'
+        )
+        self.client.force_login(admin_user)
+        # Apparel prints 300x400mm at 300 DPI: 3544x4725 pixels
+        for title, width, height in (('Kecil', 1000, 1400), ('Cukup', 3600, 1000), ('Lain', 10, 10)):
+            design = Design.objects.create(
+                creator=self.creator, title=title, image='https://example.com/d.png',
+                image_width=width, image_height=height,
+            )
+            if title != 'Lain':
+                DesignProduct.objects.create(design=design, product=self.product)
+        Design.objects.create(creator=self.creator, title='Lama', image='https://example.com/d.png')
+
+        url = reverse('admin:designs_design_changelist')
+        response = self.client.get(url, {'print_dpi_below': self.product.pk})
+        self.assertEqual([d.title for d in response.context['cl'].result_list], ['Kecil'])
+        self.assertContains(response, 'Di bawah 300 DPI untuk Hoodie')
+        response = self.client.get(url, {'print_dpi_below': 'unknown'})
+        self.assertEqual([d.title for d in response.context['cl'].result_list], ['Lama'])
+
+
+class StorageUsageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=self.media.name, SUPABASE_URL='', SUPABASE_KEY='', STORAGE_QUOTA_BYTES=10_000,
+        ))
+        cache.clear()
+        self.creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+        self.client.force_login(self.creator)
+
+    def _upload(self, data):
+        return self.client.post(reverse('designs:upload'), {
+            'title': 'Desain', 'products': [self.product.pk],
+            'image_file': SimpleUploadedFile('d.png', data, 'image/png'),
+        })
+
+    def _usage(self):
+        usage = StorageUsage.objects.filter(creator=self.creator).first()
+        return (usage.bytes, usage.files) if usage else (0, 0)
+
+    def test_running_total_follows_uploads_deletes_and_archive(self):
+        data = _image_bytes('RGB', (32, 32), 'PNG')
+        self._upload(data)
+        self._upload(data)
+        self.assertEqual(self._usage(), (2 * len(data), 2))
+
+        first, second = Design.objects.all()
+        DesignProduct.objects.filter(design=second).update(print_file='/media/print/x.png', print_file_bytes=500)
+        add_usage(self.creator.pk, 500, 1)  # As generate_print_files does
+        self.assertEqual(self._usage(), (2 * len(data) + 500, 3))
+        self.client.post(reverse('designs:delete', args=[first.pk]))
+        self.assertEqual(self._usage(), (len(data) + 500, 2))
+
+        Design.objects.filter(pk=second.pk).update(status='rejected')
+        with override_settings(DESIGN_RETENTION_DAYS={'rejected': 0}):
+            list(archive_designs())
+        self.assertEqual(self._usage(), (0, 0))
+        restore_design(ArchivedDesign.objects.get())
+        self.assertEqual(self._usage(), (len(data) + 500, 2))
+
+    def test_deleting_a_design_deletes_its_print_files(self):
+        self._upload(_image_bytes('RGB', (32, 32), 'PNG'))
+        design = Design.objects.get()
+        sku = DesignProduct.objects.get(design=design).sku
+        os.makedirs(os.path.join(self.media.name, 'print'))
+        path = os.path.join(self.media.name, 'print', f'{sku}-k.png')
+        with open(path, 'wb') as fh:
+            fh.write(b'print')
+        DesignProduct.objects.filter(sku=sku).update(print_file=f'/media/print/{sku}-k.png', print_file_bytes=5)
+        add_usage(self.creator.pk, 5, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('designs:delete', args=[design.pk]))
+
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self._usage(), (0, 0))
+
+    def test_quota_is_checked_before_anything_is_stored(self):
+        data = _image_bytes('RGB', (32, 32), 'PNG')
+        StorageUsage.objects.create(creator=self.creator, bytes=10_000 - len(data) + 1)
+
+        response = self._upload(data)
+        self.assertContains(response, 'Kuota penyimpanan Anda tidak cukup')
+        self.assertFalse(Design.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, 'designs')))
+
+        StorageUsage.objects.filter(creator=self.creator).update(quota_bytes=0)  # Unlimited for this creator
+        self.assertRedirects(self._upload(data), reverse('designs:list'))
+
+    @override_settings(SUPABASE_URL='https://storage.picu.test', SUPABASE_KEY='key', ARCHIVE_STORAGE_PREFIX='archive')
+    def test_reconcile_recomputes_totals_from_the_bucket_listing(self):
+        import httpx
+
+        design = Design.objects.create(creator=self.creator, title='D', image='https://storage.picu.test/d.png')
+        sku = DesignProduct.objects.create(design=design, product=self.product).sku
+        creator = str(self.creator.pk)
+        folders = {
+            '': [{'name': creator, 'id': None}, {'name': 'print', 'id': None}, {'name': 'archive', 'id': None},
+                 {'name': 'stray.png', 'id': '1', 'metadata': {'size': 7}}],
+            creator: [{'name': f'{i}.png', 'id': str(i), 'metadata': {'size': 100}} for i in range(3)],
+            'print': [{'name': f'{sku}-abcdef123456.png', 'id': '9', 'metadata': {'size': 1000}},
+                      {'name': 'PICU-GONE-0000-abcdef123456.png', 'id': '8', 'metadata': {'size': 5}}],
+        }
+        listed = []
+
+        def handler(request):
+            body = json.loads(request.read())
+            listed.append(body['prefix'])
+            return httpx.Response(200, json=folders[body['prefix']][body['offset']:body['offset'] + body['limit']])
+
+        for name, value in (('_http_client', httpx.Client(transport=httpx.MockTransport(handler))),
+                            ('_storage_breaker', None)):
+            self.addCleanup(setattr, supabase_storage, name, getattr(supabase_storage, name))
+            setattr(supabase_storage, name, value)
+        StorageUsage.objects.create(creator=self.creator, bytes=42, files=1)
+
+        result = reconcile_storage(workers=2)
+
+        self.assertEqual(sorted(listed), ['', creator, 'print'])  # The archive is never listed
+        self.assertEqual(self._usage(), (1300, 4))
+        self.assertEqual(result['creators'], {self.creator.pk: (42, 1300)})
+        self.assertEqual(sorted(result['unattributed']), ['print/PICU-GONE-0000-abcdef123456.png', 'stray.png'])
+        self.assertIsNotNone(StorageUsage.objects.get().reconciled_at)
+
+
+class UploadValidationTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+
+    def _form(self, name, data, content_type='image/png'):
+        return DesignUploadForm(
+            {'title': 'Desain', 'products': [self.product.pk]},
+            {'image_file': SimpleUploadedFile(name, data, content_type)},
+        )
+
+    def test_size_limit_handler_stops_keeping_data_past_the_cap(self):
+        with override_settings(UPLOAD_MAX_FILE_SIZE=1000):
+            handler = SizeLimitUploadHandler()
+        handler.new_file('image_file', 'big.png', 'image/png', 3000)
+        self.assertEqual(handler.receive_data_chunk(b'x' * 800, 0), b'x' * 800)
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 800, 800))
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 800, 1600))
+        oversized = handler.file_complete(2400)
+        self.assertTrue(oversized.too_large)
+        self.assertEqual((oversized.size, oversized.read()), (2400, b''))
+
+    @override_settings(UPLOAD_MAX_FILE_SIZE=1000)
+    def test_oversized_upload_is_rejected_by_the_view(self):
+        creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.client.force_login(creator)
+        response = self.client.post(reverse('designs:upload'), {
+            'title': 'Desain', 'products': [self.product.pk],
+            'image_file': SimpleUploadedFile('big.png', _image_bytes('RGB', (200, 200), 'PNG', compress_level=0)),
+        })
+        self.assertContains(response, 'Ukuran file maksimal')
+        self.assertFalse(Design.objects.exists())
+
+    def test_content_is_trusted_over_name_and_content_type(self):
+        form = self._form('photo.png', _image_bytes('RGB', (8, 8), 'JPEG'))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['image_file'].content_type, 'image/jpeg')
+
+        for data in (b'GIF89a' + b'\0' * 32, b'<svg xmlns="http://www.w3.org/2000/svg"/>'):
+            form = self._form('spoofed.png', data)
+            self.assertFalse(form.is_valid())
+            self.assertIn('image_file', form.errors)
+
+    def test_truncated_headers(self):
+        png = _image_bytes('RGB', (8, 8), 'PNG')
+        jpeg = _image_bytes('RGB', (8, 8), 'JPEG')
+        for data in (png[:20], png[:8], jpeg[:3], jpeg[:2] + b'\xff\xe0\x00'):
+            with self.assertRaises(ImageHeaderError):
+                sniff_image(io.BytesIO(data))
+            self.assertFalse(self._form('cut.png', data).is_valid())
+
+    @override_settings(UPLOAD_MAX_IMAGE_PIXELS=10_000)
+    def test_pixel_limit_is_checked_from_the_header(self):
+        form = self._form('big.png', _image_bytes('L', (101, 100), 'PNG'))
+        self.assertFalse(form.is_valid())
+        self.assertIn('Resolusi gambar terlalu besar (101x100)', form.errors['image_file'][0])
+
+        # A header claiming 100000x100000 pixels is refused without decoding anything
+        png = bytearray(_image_bytes('L', (1, 1), 'PNG'))
+        png[16:24] = (100_000).to_bytes(4, 'big') * 2
+        self.assertFalse(self._form('bomb.png', bytes(png)).is_valid())
+        self.assertTrue(self._form('ok.png', _image_bytes('L', (100, 100), 'PNG')).is_valid())
+
+
+class ImageCacheTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_lru_evicts_least_recently_used_down_to_90_percent(self):
+        cache = images.DiskLRUCache(os.path.join(self.tmp.name, 'cache'), max_bytes=1000)
+        cache.put('a', b'a' * 400)
+        cache.put('b', b'b' * 400)
+        os.utime(cache.path('a'), (100, 100))
+        os.utime(cache.path('b'), (200, 200))
+        self.assertTrue(cache.get('a'))  # A hit makes 'a' the most recent
+
+        cache.put('c', b'c' * 400)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertTrue(cache.get('a') and cache.get('c'))
+        self.assertLessEqual(sum(os.path.getsize(cache.path(k)) for k in 'ac'), 900)
+
+    def test_oversized_local_source_is_refused(self):
+        os.makedirs(os.path.join(self.tmp.name, 'designs'))
+        with open(os.path.join(self.tmp.name, 'designs', 'big.png'), 'wb') as fh:
+            fh.write(b'x' * 11)
+        with override_settings(MEDIA_ROOT=self.tmp.name, UPLOAD_MAX_FILE_SIZE=10):
+            with self.assertRaisesRegex(ValueError, 'larger than 10 bytes'):
+                images._read_source('/media/designs/big.png')
+
+    def test_concurrent_misses_render_once(self):
+        import threading
+        import time
+        from unittest import mock
+
+        os.makedirs(os.path.join(self.tmp.name, 'media', 'designs'))
+        with open(os.path.join(self.tmp.name, 'media', 'designs', 'd.png'), 'wb') as fh:
+            fh.write(_image_bytes('RGB', (64, 64), 'PNG'))
+        self.enterContext(override_settings(MEDIA_ROOT=os.path.join(self.tmp.name, 'media')))
+        self.addCleanup(setattr, images, '_cache', images._cache)
+        images._cache = images.DiskLRUCache(os.path.join(self.tmp.name, 'cache'), 10 * 1024 * 1024)
+
+        renders = []
+
+        def slow_resize(path, width, pil_format):
+            renders.append(width)
+            time.sleep(0.2)
+            return b'rendered'
+
+        results = []
+        with mock.patch.object(images, '_resize_in_pool', slow_resize):
+            threads = [
+                threading.Thread(target=lambda: results.append(images.resized_image('/media/designs/d.png', 32, 'webp')))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(renders, [32])
+        self.assertEqual(len({path for path, _, _ in results}), 1)
+        self.assertEqual(len(results), 8)
+
+
+class DesignImageViewTests(TestCase):
+    def setUp(self):
+        from unittest import mock
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        rendered = os.path.join(self.tmp.name, 'rendered.webp')
+        with open(rendered, 'wb') as fh:
+            fh.write(b'webp')
+        self.enterContext(mock.patch.object(
+            images, 'resized_image', lambda url, width, fmt: (rendered, 'image/webp', 'key'),
+        ))
+        self.image_cache = images.DiskLRUCache(os.path.join(self.tmp.name, 'cache'), 10 ** 6)
+        self.enterContext(mock.patch.object(images, 'get_cache', lambda: self.image_cache))
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.creator = User.objects.create_user(
+            email='creator@picu.test', password='secret', full_name='Creator', phone='0812', role='creator'
+        )
+        self.other = User.objects.create_user(
+            email='other@picu.test', password='secret', full_name='Other', phone='0812', role='creator'
+        )
+        self.design = Design.objects.create(creator=self.creator, title='D', image='https://example.com/d.png')
+
+    def _url(self, width=400, fmt='webp'):
+        return reverse('design_image', args=[self.design.pk, width, fmt])
+
+    def test_unapproved_designs_are_private(self):
+        self.assertEqual(self.client.get(self._url()).status_code, 403)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self._url()).status_code, 403)
+        self.client.force_login(self.creator)
+        response = self.client.get(self._url())
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+    def test_etag_answers_304(self):
+        Design.objects.filter(pk=self.design.pk).update(status='approved')
+        response = self.client.get(self._url())
+        self.assertEqual(b''.join(response.streaming_content), b'webp')
+        cached = self.client.get(self._url(), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+    def test_public_images_revalidate_so_rejection_takes_effect(self):
+        Design.objects.filter(pk=self.design.pk).update(status='approved')
+        response = self.client.get(self._url())
+        self.assertEqual(response['Cache-Control'], 'public, max-age=300')
+        Design.objects.filter(pk=self.design.pk).update(status='rejected')
+        self.assertEqual(self.client.get(self._url(), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 403)
+
+    def test_bad_width_or_format(self):
+        Design.objects.filter(pk=self.design.pk).update(status='approved')
+        for width, fmt in ((8, 'webp'), (401, 'webp'), (5000, 'webp'), (400, 'gif'), (400, 'svg')):
+            self.assertEqual(self.client.get(self._url(width, fmt)).status_code, 404)
+
+    @override_settings(RATE_LIMITS={'image': {'ip': (1, 60)}})
+    def test_only_renders_are_rate_limited(self):
+        Design.objects.filter(pk=self.design.pk).update(status='approved')
+        self.assertEqual(self.client.get(self._url()).status_code, 200)
+        response = self.client.get(self._url())
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+        self.image_cache.put(images.cache_key(self.design.image, 400, 'webp'), b'webp')
+        self.assertEqual(self.client.get(self._url()).status_code, 200)
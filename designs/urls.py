@@ -9,7 +9,11 @@ app_name = 'designs'
 urlpatterns = [
     path('', views.design_list, name='list'),
     path('upload/', views.design_upload, name='upload'),
+    path('events/', views.design_events, name='events'),
+    path('events/poll/', views.design_events_poll, name='events_poll'),
     path('<uuid:pk>/', views.design_detail, name='detail'),
+    path('<uuid:pk>/mockups/', views.design_mockups, name='mockups'),
+    path('<uuid:pk>/mockups/<uuid:product_pk>.webp', views.design_mockup, name='mockup'),
     path('<uuid:pk>/approve/', views.design_approve, name='approve'),
     path('<uuid:pk>/reject/', views.design_reject, name='reject'),
     path('<uuid:pk>/delete/', views.design_delete, name='delete'),
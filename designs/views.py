@@ -1,11 +1,27 @@
 """
 Views for designs app
 """
+import hashlib
+import json
+import logging
+from urllib.parse import urlsplit
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponseForbidden
-from .models import Design, Product, DesignProduct
+from django.conf import settings
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import resolve, reverse
+from django.utils.http import urlencode
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
+from django_htmx.http import HttpResponseClientRedirect
+from picu.api import storefront_authorized
+from picu.ratelimit import check, rate_limit, too_many_requests
+from .models import Design, Product, DesignProduct, DesignStatusEvent
 from .forms import DesignUploadForm
 
 
@@ -15,7 +31,7 @@ def design_list(request):
     user = request.user
     
     if user.is_admin:
-        designs = Design.objects.all()
+        designs = Design.objects.select_related('creator')
     else:
         designs = Design.objects.filter(creator=user)
     
@@ -33,28 +49,35 @@ def design_list(request):
 
 
 @login_required
+@rate_limit('upload')
 def design_upload(request):
     """Upload a new design"""
     if request.method == 'POST':
-        form = DesignUploadForm(request.POST, request.FILES)
+        form = DesignUploadForm(request.POST, request.FILES, creator=request.user)
         if form.is_valid():
             design = form.save(commit=False)
             design.creator = request.user
             
             # Handle file upload to Supabase Storage
-            uploaded_file = request.FILES.get('image_file')
+            uploaded_file = form.cleaned_data.get('image_file')
             if uploaded_file:
                 # Upload to Supabase Storage (with local fallback)
                 from picu.supabase_storage import upload_design_image
                 image_url = upload_design_image(uploaded_file, str(request.user.id))
                 design.image = image_url
+                design.image_sha256 = getattr(uploaded_file, 'sha256', '')
+                for field, value in getattr(uploaded_file, 'image_metadata', {}).items():
+                    setattr(design, field, value)
             
-            design.save()
-            
-            # Add selected products
-            selected_products = form.cleaned_data.get('products')
-            for product in selected_products:
-                DesignProduct.objects.create(design=design, product=product)
+            with transaction.atomic():
+                design.save()
+                
+                # Add selected products
+                selected_products = form.cleaned_data.get('products')
+                for product in selected_products:
+                    DesignProduct.objects.create(design=design, product=product)
+                
+                DesignStatusEvent.record(design, 'uploaded', actor=request.user)
             
             messages.success(request, f'Desain "{design.title}" berhasil diupload dan menunggu review.')
             return redirect('designs:list')
@@ -82,28 +105,94 @@ def design_detail(request, pk):
     
     context = {
         'design': design,
-        'design_products': design.designproduct_set.all(),
+        **_mockup_context(design),
     }
     
     return render(request, 'designs/detail.html', context)
 
 
+def _mockup_context(design):
+    """Product list with mockup availability; queues rendering of missing mockups"""
+    from .mockups import cached_mockup, enqueue_missing, failed_mockups
+    
+    design_products = list(design.designproduct_set.select_related('product'))
+    for dp in design_products:
+        dp.mockup_ready = bool(design.image) and cached_mockup(design, dp.product) is not None
+    failed = failed_mockups(design, [dp.product for dp in design_products if not dp.mockup_ready])
+    for dp in design_products:
+        dp.mockup_failed = dp.product.pk in failed
+    # Failed mockups are not polled for; a later page view retries them once their backoff ends
+    missing = enqueue_missing(
+        design, [dp.product for dp in design_products if not dp.mockup_ready and not dp.mockup_failed],
+    )
+    
+    return {
+        'design_products': design_products,
+        'mockups_pending': missing > 0,
+    }
+
+
+@login_required
+def design_mockups(request, pk):
+    """Product section of the detail page, polled by HTMX until all mockups exist"""
+    design = get_object_or_404(Design, pk=pk)
+    
+    if not request.user.is_admin and design.creator != request.user:
+        return HttpResponseForbidden("Anda tidak memiliki akses ke desain ini.")
+    
+    return render(request, 'designs/partials/mockups.html', {'design': design, **_mockup_context(design)})
+
+
+@login_required
+def design_mockup(request, pk, product_pk):
+    """Rendered mockup of a design on one product"""
+    from .mockups import cached_mockup, mockup_key
+    
+    design = get_object_or_404(Design.objects.only('image', 'image_sha256', 'creator_id'), pk=pk)
+    if not request.user.is_admin and design.creator_id != request.user.id:
+        return HttpResponseForbidden("Anda tidak memiliki akses ke desain ini.")
+    product = get_object_or_404(Product.objects.only('mockup_version'), pk=product_pk)
+    
+    etag = f'"{mockup_key(design, product)}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    else:
+        path = cached_mockup(design, product) if design.image else None
+        try:
+            response = FileResponse(open(path, 'rb'), content_type='image/webp') if path else None
+        except FileNotFoundError:
+            response = None
+        if response is None:
+            raise Http404("Mockup belum tersedia.")
+    
+    response['Cache-Control'] = 'private, max-age=86400'
+    response['ETag'] = etag
+    return response
+
+
 @login_required
+@rate_limit('moderate', methods=('GET', 'POST'))
 def design_approve(request, pk):
     """Approve a design (admin only)"""
     if not request.user.is_admin:
         return HttpResponseForbidden("Hanya admin yang bisa approve desain.")
     
     design = get_object_or_404(Design, pk=pk)
+    previous_status = design.status
     design.status = 'approved'
     design.reject_reason = None
-    design.save()
+    with transaction.atomic():
+        design.save()
+        DesignStatusEvent.record(design, 'approved', actor=request.user, from_status=previous_status)
     
+    if request.htmx:
+        return _moderation_fragment(request, design)
     messages.success(request, f'Desain "{design.title}" berhasil di-approve.')
     return redirect('designs:detail', pk=pk)
 
 
 @login_required
+@rate_limit('moderate')
 def design_reject(request, pk):
     """Reject a design (admin only)"""
     if not request.user.is_admin:
@@ -113,17 +202,52 @@ def design_reject(request, pk):
     
     if request.method == 'POST':
         reason = request.POST.get('reject_reason', '')
+        previous_status = design.status
         design.status = 'rejected'
         design.reject_reason = reason
-        design.save()
+        with transaction.atomic():
+            design.save()
+            DesignStatusEvent.record(design, 'rejected', actor=request.user, from_status=previous_status)
         
+        if request.htmx:
+            return _moderation_fragment(request, design)
         messages.success(request, f'Desain "{design.title}" ditolak.')
         return redirect('designs:detail', pk=pk)
     
     return render(request, 'designs/reject_modal.html', {'design': design})
 
 
+def _moderation_fragment(request, design):
+    """
+    HTMX response to approve/reject: just the element the request targets
+    
+    On the detail page that is the review panel, plus the status badge
+    out-of-band. A pending row on the admin dashboard is replaced with
+    nothing, which removes it. Dashboard counters ride along out-of-band.
+    """
+    html = ''
+    if request.htmx.target == 'review-panel':
+        html = render_to_string(
+            'designs/partials/review_panel.html', {'design': design, 'oob': True}, request=request
+        )
+    return HttpResponse(html + _oob_counters(request))
+
+
+def _oob_counters(request):
+    """Out-of-band counter updates, when the HTMX request came from a dashboard"""
+    from dashboard.views import counters
+    
+    try:
+        view_name = resolve(urlsplit(request.htmx.current_url or '').path).view_name
+    except Http404:
+        return ''
+    if view_name not in ('dashboard:dashboard', 'dashboard:admin_dashboard'):
+        return ''
+    return render_to_string('designs/partials/counters_oob.html', {'counters': counters(request.user)})
+
+
 @login_required
+@rate_limit('delete')
 def design_delete(request, pk):
     """Delete a design (creator only for their own designs, or admin)"""
     design = get_object_or_404(Design, pk=pk)
@@ -133,20 +257,27 @@ def design_delete(request, pk):
         return HttpResponseForbidden("Anda tidak memiliki izin untuk menghapus desain ini.")
     
     if request.method == 'POST':
+        from .print_files import delete_print_files
+        
         design_title = design.title
         image_url = design.image
+        # A card removed from the list needs no page reload, nor flash messages
+        removes_card = bool(request.htmx) and request.htmx.target == f'design-card-{design.pk}'
         
-        # Delete design from database first
-        design.delete()
+        # Delete design from database first; its events stay for the stats
+        with transaction.atomic():
+            DesignStatusEvent.record(design, 'deleted', actor=request.user, from_status=design.status)
+            delete_print_files([design])
+            design.delete()
         
         # Then try to delete associated image from storage
         if image_url:
             try:
                 # Check if it's a Supabase URL (contains supabase.co or storage)
                 if 'supabase' in image_url or '/storage/' in image_url:
-                    from picu.supabase_storage import delete_design_image
-                    deleted = delete_design_image(image_url)
-                    if deleted:
+                    from .storage_usage import delete_or_defer
+                    deleted = delete_or_defer(image_url)
+                    if deleted and not removes_card:
                         messages.info(request, 'Gambar berhasil dihapus dari storage.')
                 elif image_url.startswith('/media/'):
                     # Delete local file
@@ -159,10 +290,190 @@ def design_delete(request, pk):
                 import logging
                 logging.warning(f"Failed to delete image from storage: {e}")
         
+        if removes_card:
+            return HttpResponse(_oob_counters(request))
         messages.success(request, f'Desain "{design_title}" berhasil dihapus.')
+        if request.htmx:
+            return HttpResponseClientRedirect(reverse('designs:list'))
         return redirect('designs:list')
     
     # GET request - show confirmation
     return render(request, 'designs/delete_confirm.html', {'design': design})
 
 
+def design_image(request, pk, width, fmt):
+    """
+    Resized design image for emails, admin and partner previews.
+    Approved designs are public; others only for their creator and admins.
+    Only renders are rate limited: serving a cached rendition is cheap.
+    """
+    from picu.images import OUTPUT_FORMATS, cache_key, get_cache, resized_image
+    
+    if fmt not in OUTPUT_FORMATS or width not in settings.IMAGE_RESIZE_WIDTHS:
+        raise Http404("Ukuran atau format tidak didukung.")
+    
+    design = get_object_or_404(Design.objects.only('image', 'status', 'creator_id'), pk=pk)
+    if not design.image:
+        raise Http404("Desain tidak memiliki gambar.")
+    
+    public = design.status == 'approved'
+    if not public:
+        user = request.user
+        if not user.is_authenticated or (not user.is_admin and design.creator_id != user.id):
+            return HttpResponseForbidden("Anda tidak memiliki akses ke desain ini.")
+    
+    # Not immutable: the URL outlives approval, so caches must come back for the ETag
+    cache_control = f'public, max-age={settings.IMAGE_PUBLIC_MAX_AGE}' if public else 'private, max-age=86400'
+    key = cache_key(design.image, width, fmt)
+    etag = f'"{key}"'
+    
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponse(status=304)
+    else:
+        if settings.RATE_LIMIT_ENABLED and get_cache().get(key) is None:
+            retry_after = check(request, 'image')
+            if retry_after:
+                return too_many_requests(retry_after)
+        try:
+            path, content_type, _ = resized_image(design.image, width, fmt)
+            try:
+                image = open(path, 'rb')
+            except FileNotFoundError:
+                # Evicted right after rendering; render again
+                path, content_type, _ = resized_image(design.image, width, fmt)
+                image = open(path, 'rb')
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Resize failed for design {pk}: {type(e).__name__}: {e}")
+            return HttpResponse("Gambar tidak tersedia.", status=502)
+        response = FileResponse(image, content_type=content_type)
+    
+    response['Cache-Control'] = cache_control
+    response['ETag'] = etag
+    return response
+
+
+@csrf_exempt
+@require_POST
+def sku_lookup(request):
+    """
+    Storefront API: resolve a batch of SKUs
+
+    Body: {"skus": ["PICU-...", ...]}. Answers {"results": {sku: {...} or null}}
+    with the design title and status, product, base cost and, for approved
+    designs, the URL of the catalog image variant.
+    """
+    from .skus import resolve_skus
+    
+    if not storefront_authorized(request):
+        return HttpResponseForbidden('Forbidden')
+    
+    try:
+        skus = json.loads(request.body)['skus']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected {"skus": [...]}'}, status=400)
+    if not isinstance(skus, list) or not all(isinstance(sku, str) for sku in skus):
+        return JsonResponse({'error': 'skus must be a list of strings'}, status=400)
+    if len(skus) > settings.SKU_LOOKUP_MAX:
+        return JsonResponse({'error': f'At most {settings.SKU_LOOKUP_MAX} SKUs per request'}, status=413)
+    
+    origin = request.build_absolute_uri('/')[:-1]
+    results = {
+        sku: {**item, 'image': origin + item['image']} if item and item['image'] else item
+        for sku, item in resolve_skus(skus).items()
+    }
+    return JsonResponse({'results': results})
+
+
+@gzip_page
+@require_GET
+@rate_limit('catalog', methods=('GET',))
+def catalog_designs(request):
+    """
+    Public API v1: approved designs, newest first
+
+    Query: fields (comma-separated, default all), limit, cursor (from "next").
+    Bodies are compact JSON with a stable key order and carry a content
+    ETag, so unchanged pages answer 304 and compress well.
+    """
+    from .catalog import CatalogError, catalog_page, parse_fields
+    
+    try:
+        fields = parse_fields(request.GET.get('fields', ''))
+        try:
+            limit = int(request.GET.get('limit', settings.CATALOG_PAGE_SIZE))
+        except ValueError:
+            raise CatalogError('limit must be a number')
+        if not 1 <= limit <= settings.CATALOG_MAX_PAGE_SIZE:
+            raise CatalogError(f'limit must be between 1 and {settings.CATALOG_MAX_PAGE_SIZE}')
+        items, next_cursor = catalog_page(
+            fields, request.GET.get('cursor'), limit, origin=request.build_absolute_uri('/')[:-1],
+        )
+    except CatalogError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    next_url = None
+    if next_cursor:
+        params = {key: request.GET[key] for key in ('fields', 'limit') if key in request.GET}
+        next_url = request.build_absolute_uri(f"{request.path}?{urlencode({**params, 'cursor': next_cursor})}")
+    body = json.dumps({'data': items, 'next': next_url}, separators=(',', ':'), ensure_ascii=False).encode()
+    
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = f'public, max-age={settings.CATALOG_CACHE_SECONDS}'
+    return response
+
+
+@login_required
+def design_events(request):
+    """
+    Server-sent events with status badge fragments for the user's designs,
+    plus the pending count for admins
+    """
+    from . import live
+    
+    if not live.sse_enabled(request):
+        return HttpResponse(status=204)  # Tells EventSource to stop reconnecting
+    
+    subscription = live.Subscription(request.user.id, request.user.is_admin)
+    if isinstance(request, ASGIRequest):
+        body = live.astream(subscription, settings.LIVE_STREAM_MAX_SECONDS_ASGI)
+    else:
+        # Each client holds a worker thread, so streams end sooner and the
+        # browser reconnects
+        body = live.stream(subscription, settings.LIVE_STREAM_MAX_SECONDS)
+    
+    response = StreamingHttpResponse(body, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Tell nginx not to buffer the stream
+    return response
+
+
+@login_required
+def design_events_poll(request):
+    """
+    Polling stand-in for design_events: status badges changed since the last
+    poll, swapped out-of-band, and the poller itself carrying the new cursor
+    """
+    from datetime import datetime, timezone as dt_timezone
+    from . import live
+    
+    try:
+        after = int(request.GET['after']) if 'after' in request.GET else None
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        return HttpResponse(status=400)
+    
+    statuses, after = live.updates_since(
+        request.user, after, datetime.fromtimestamp(since, tz=dt_timezone.utc),
+    )
+    counters = {}
+    if statuses and request.user.is_admin:
+        counters['pending_reviews'] = Design.objects.filter(status='pending').count()
+    return render(request, 'designs/partials/events_poll.html', {
+        'after': after, 'since': since, 'statuses': statuses.items(), 'counters': counters,
+    })
+
@@ -0,0 +1,86 @@
+"""
+Django Admin configuration for royalty and payout models
+"""
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+
+from picu.admin_mixins import LargeTableAdmin
+from .batches import stream_transfer_csv
+from .models import DesignSales, Payout, PayoutBatch, RoyaltyEntry
+
+
+@admin.register(RoyaltyEntry)
+class RoyaltyEntryAdmin(LargeTableAdmin):
+    """Royalty ledger; only adjustments are added by hand"""
+    list_display = ('occurred_at', 'reference', 'kind', 'creator', 'design_product', 'quantity', 'gross', 'amount', 'payout')
+    list_filter = ('kind', 'occurred_at')
+    list_select_related = ('creator', 'design_product', 'payout')
+    search_fields = ('reference', 'creator__email', 'design_product__sku')
+    search_help_text = 'Referensi, email kreator atau SKU'
+    autocomplete_fields = ('creator', 'design_product')
+    readonly_fields = ('payout', 'created_at')
+    
+    def has_change_permission(self, request, obj=None):
+        return obj is None or obj.payout_id is None
+    
+    def has_delete_permission(self, request, obj=None):
+        return obj is None or obj.payout_id is None
+
+
+class PayoutInline(admin.TabularInline):
+    model = Payout
+    extra = 0
+    fields = ('creator', 'amount', 'entry_count', 'bank_name', 'bank_number', 'bank_holder')
+    readonly_fields = fields
+    show_change_link = True
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PayoutBatch)
+class PayoutBatchAdmin(admin.ModelAdmin):
+    """Batches are built by manage.py build_payouts and never edited"""
+    list_display = ('__str__', 'payout_count', 'entry_count', 'total', 'created_at', 'created_by')
+    readonly_fields = [f.name for f in PayoutBatch._meta.fields]
+    actions = ['export_transfers']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='Download bank transfer CSV')
+    def export_transfers(self, request, queryset):
+        batches = list(queryset[:2])
+        if len(batches) > 1:
+            self.message_user(request, 'Select one batch to download its transfer CSV.', messages.ERROR)
+            return None
+        batch = batches[0]
+        response = StreamingHttpResponse(stream_transfer_csv(batch), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="payouts-{batch.period_end:%Y%m}.csv"'
+        return response
+
+
+@admin.register(Payout)
+class PayoutAdmin(LargeTableAdmin):
+    list_display = ('batch', 'creator', 'amount', 'entry_count', 'bank_name', 'bank_number')
+    list_filter = ('batch', 'bank_name')
+    list_select_related = ('batch', 'creator')
+    search_fields = ('creator__email', 'creator__full_name', 'bank_number')
+    search_help_text = 'Email, nama kreator atau no. rekening'
+    readonly_fields = ('batch', 'creator', 'amount', 'entry_count', 'bank_name', 'bank_number', 'bank_holder')
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(DesignSales)
+class DesignSalesAdmin(LargeTableAdmin):
+    """Kept up to date by order ingestion; rebuild with manage.py ingest_orders --rebuild-sales"""
+    list_display = ('design', 'units', 'gross', 'royalty', 'last_sold_at')
+    list_select_related = ('design__creator',)
+    search_fields = ('design__title', 'design__creator__email')
+    search_help_text = 'Judul desain atau email kreator'
+    readonly_fields = ('design', 'units', 'gross', 'royalty', 'last_sold_at')
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,142 @@
+"""
+Payout batches for PICU Creator Dashboard
+Settles the royalty ledger for a period with a fixed number of set-based
+queries, however many creators there are, and exports the transfers as a
+bank CSV.
+"""
+import csv
+import logging
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Trim, Upper
+from django.utils import timezone
+
+from .models import Payout, PayoutBatch, RoyaltyEntry
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_FIELDS = ['bank_name', 'bank_number', 'bank_holder', 'amount', 'reference', 'creator_email', 'creator_name']
+# Spreadsheets run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def period_cutoff(period_end):
+    """Midnight after the last day of the period, in Asia/Jakarta"""
+    return timezone.make_aware(datetime.combine(period_end + timedelta(days=1), time.min))
+
+
+def build_payout_batch(period_start, period_end, minimum=None, user=None):
+    """
+    Settle every creator's unpaid royalties up to the end of a period
+
+    Creators qualify when their unpaid balance reaches the minimum and their
+    bank account is filled in; everyone else carries the balance over to the
+    next period. Building the same period again returns the existing batch
+    unchanged.
+
+    Args:
+        period_start: First day of the period (date)
+        period_end: Last day of the period (date)
+        minimum: Smallest balance paid out (default PAYOUT_MINIMUM)
+        user: Admin building the batch
+
+    Returns:
+        Tuple of (PayoutBatch, created)
+    """
+    minimum = settings.PAYOUT_MINIMUM if minimum is None else minimum
+    cutoff = period_cutoff(period_end)
+
+    with transaction.atomic():
+        batch, created = PayoutBatch.objects.get_or_create(
+            period_start=period_start,
+            period_end=period_end,
+            defaults={'cutoff': cutoff, 'minimum': minimum, 'created_by': user},
+        )
+        if not created:
+            return batch, False
+
+        unpaid = RoyaltyEntry.objects.filter(payout__isnull=True, occurred_at__lt=cutoff)
+
+        # 1. One payout per qualifying creator, from a single GROUP BY
+        balances = (
+            unpaid.filter(creator__bank_number__gt='')
+            .values('creator', 'creator__bank_number', 'creator__bank_holder', bank=Upper(Trim('creator__bank_name')))
+            .annotate(balance=Sum('amount'))
+            .filter(balance__gte=minimum)
+            .values_list('creator', 'balance', 'creator__bank_number', 'creator__bank_holder', 'bank')
+        )
+        Payout.objects.bulk_create(
+            (
+                Payout(
+                    batch=batch, creator_id=creator_id, amount=balance,
+                    bank_name=bank or '', bank_number=bank_number.strip(), bank_holder=(bank_holder or '').strip(),
+                )
+                for creator_id, balance, bank_number, bank_holder, bank in balances.iterator(chunk_size=5000)
+            ),
+            batch_size=2000,
+        )
+
+        # 2. Attach their unpaid entries to the payouts
+        payouts = Payout.objects.filter(batch=batch)
+        unpaid.filter(creator__in=payouts.values('creator')).update(
+            payout=Subquery(payouts.filter(creator=OuterRef('creator')).values('pk')[:1])
+        )
+
+        # 3. Amounts come from the attached entries, so entries recorded
+        # between steps 1 and 2 are paid and counted, never paid silently
+        linked = RoyaltyEntry.objects.filter(payout=OuterRef('pk')).values('payout')
+        payouts.update(
+            amount=Subquery(linked.annotate(total=Sum('amount')).values('total')),
+            entry_count=Subquery(linked.annotate(n=Count('pk')).values('n')),
+        )
+
+        totals = payouts.aggregate(total=Sum('amount'), payouts=Count('pk'), entries=Sum('entry_count'))
+        batch.total = totals['total'] or 0
+        batch.payout_count = totals['payouts']
+        batch.entry_count = totals['entries'] or 0
+        batch.save(update_fields=['total', 'payout_count', 'entry_count'])
+
+    logger.info(f"Built {batch}: {batch.payout_count} payouts, {batch.total} total")
+    return batch, True
+
+
+def _cell(value):
+    """Creator-entered text, quoted so a spreadsheet shows it instead of evaluating it"""
+    value = value or ''
+    return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+
+
+class _Echo:
+    """File-like object whose write() returns the line for streaming"""
+
+    def write(self, value):
+        return value
+
+
+def stream_transfer_csv(batch):
+    """
+    Stream a batch's bank transfers as CSV, grouped by bank
+
+    Rows are read in chunks from the database, so memory stays flat for
+    any number of payouts.
+
+    Yields:
+        CSV lines
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(TRANSFER_FIELDS)
+
+    rows = (
+        Payout.objects.filter(batch=batch)
+        .order_by('bank_name', 'bank_holder', 'pk')
+        .values_list('pk', 'bank_name', 'bank_number', 'bank_holder', 'amount', 'creator__email', 'creator__full_name')
+    )
+    for pk, bank_name, bank_number, bank_holder, amount, email, name in rows.iterator(chunk_size=2000):
+        reference = f'PICU-{batch.period_end:%Y%m}-{pk}'
+        yield writer.writerow([
+            _cell(bank_name), _cell(bank_number), _cell(bank_holder), f'{amount:.2f}', reference,
+            _cell(email), _cell(name),
+        ])
@@ -0,0 +1,340 @@
+"""
+Order event ingestion for PICU Creator Dashboard
+
+Storefronts report each order line with our SKU. Every line becomes one
+RoyaltyEntry whose reference is the storefront's order line ID, so a line
+delivered twice is recorded once. Events are handled in batches: SKUs are
+resolved with one IN query per batch into an in-memory map, the lines are
+inserted with ON CONFLICT DO NOTHING, and the per-design totals in
+DesignSales are bumped by exactly the lines that were new, with a single
+upsert. On PostgreSQL the lines are streamed with COPY into a staging
+table first: a multi-row INSERT with thousands of placeholders spends
+most of its time in the driver building the statement.
+"""
+import json
+import logging
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from picu.metrics import ORDER_EVENTS
+from .models import DesignSales, RoyaltyEntry, royalty_amount
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+INSERT_CHUNK = 1000  # Rows per INSERT statement, well under PostgreSQL's 65535 parameters
+RESULTS = ('created', 'duplicate', 'unknown_sku', 'invalid')
+ENTRY_COLUMNS = (
+    'creator', 'design_product', 'kind', 'reference', 'quantity', 'gross', 'rate', 'amount', 'occurred_at',
+    'created_at',
+)
+STAGING_TABLE = 'payouts_royaltyentry_staging'
+SALES_COLUMNS = ('design', 'units', 'gross', 'royalty', 'last_sold_at')
+# Largest values the ledger columns hold: quantity is an IntegerField, gross
+# and amount have 12 digits before the decimal point
+MAX_QUANTITY = 2 ** 31 - 1
+MAX_AMOUNT_DIGITS = 12
+
+
+class SkuMap:
+    """
+    SKU -> (design_product_id, design_id, creator_id, royalty rate), filled on demand
+
+    Unknown SKUs are remembered too, so a bad SKU costs one lookup per map.
+    """
+
+    def __init__(self):
+        self.known = {}
+        self.missing = set()
+
+    def resolve(self, skus):
+        """Load every SKU not seen yet with one query"""
+        from designs.models import DesignProduct
+
+        unseen = {sku for sku in skus if sku not in self.known and sku not in self.missing}
+        if not unseen:
+            return
+        rows = DesignProduct.objects.filter(sku__in=unseen).values_list(
+            'sku', 'pk', 'design_id', 'design__creator_id',
+            Coalesce('design__royalty_rate', 'product__royalty_rate'),
+        )
+        # Keys are stored as the database expects them, ready for raw inserts
+        fields = (
+            RoyaltyEntry._meta.get_field('design_product'),
+            DesignSales._meta.pk,
+            RoyaltyEntry._meta.get_field('creator'),
+        )
+        for sku, *keys, rate in rows:
+            self.known[sku] = (*(field.get_db_prep_value(key, connection) for field, key in zip(fields, keys)), rate)
+        self.missing |= unseen - self.known.keys()
+
+    def get(self, sku):
+        return self.known.get(sku)
+
+
+def parse_event(event):
+    """
+    Validate one order event
+
+    Events look like {"id": "order line ID", "sku": "PICU-...", "quantity": 2,
+    "amount": "150000.00", "occurred_at": "2026-09-01T10:00:00+07:00"}. amount is
+    the line total; refunds are separate lines with negative quantity and amount.
+
+    Values the ledger columns cannot hold are invalid too, so one bad event
+    cannot fail the insert of its whole batch.
+
+    Returns:
+        Tuple of (id, sku, quantity, amount, occurred_at), or None if invalid
+    """
+    try:
+        line_id = str(event['id']).strip()
+        sku = event['sku'].strip()
+        quantity = int(event.get('quantity', 1))
+        amount = Decimal(str(event['amount']))
+        occurred_at = event.get('occurred_at')
+        occurred_at = datetime.fromisoformat(occurred_at) if occurred_at else timezone.now()
+    except (KeyError, TypeError, ValueError, AttributeError, InvalidOperation):
+        return None
+    if not line_id or len(line_id) > 100 or not sku or not amount.is_finite():
+        return None
+    if abs(quantity) > MAX_QUANTITY or (amount and amount.adjusted() >= MAX_AMOUNT_DIGITS):
+        return None
+    if timezone.is_naive(occurred_at):
+        occurred_at = timezone.make_aware(occurred_at)
+    return line_id, sku, quantity, amount, occurred_at
+
+
+def read_jsonl(lines):
+    """Decode JSON Lines, yielding None for lines that are not a JSON object"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield event if isinstance(event, dict) else None
+
+
+def _insert_entries(rows):
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING reference, in chunks
+
+    This is the statement bulk_create(ignore_conflicts=True) runs, plus
+    RETURNING, so we learn which order lines were new even when another
+    ingester recorded some of them first. Rows are tuples in ENTRY_COLUMNS
+    order, already adapted for the database.
+
+    Returns:
+        Set of references actually inserted
+    """
+    if connection.vendor == 'postgresql':
+        return _copy_entries(rows)
+
+    ops = connection.ops
+    table = ops.quote_name(RoyaltyEntry._meta.db_table)
+    columns = ', '.join(ops.quote_name(RoyaltyEntry._meta.get_field(name).column) for name in ENTRY_COLUMNS)
+    placeholder = f"({', '.join(['%s'] * len(ENTRY_COLUMNS))})"
+    chunk = min(ops.bulk_batch_size(ENTRY_COLUMNS, rows) or INSERT_CHUNK, INSERT_CHUNK)
+
+    inserted = set()
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), chunk):
+            batch = rows[i:i + chunk]
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) VALUES {", ".join([placeholder] * len(batch))} '
+                f'ON CONFLICT DO NOTHING RETURNING {ops.quote_name("reference")}',
+                [value for row in batch for value in row],
+            )
+            inserted.update(reference for reference, in cursor.fetchall())
+    return inserted
+
+
+def _copy_entries(rows):
+    """
+    _insert_entries() for PostgreSQL: COPY into a staging table, then
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING reference
+
+    The staging table is dropped at commit, so it also works through a
+    transaction-mode pooler. Must run inside a transaction.
+    """
+    ops = connection.ops
+    table = ops.quote_name(RoyaltyEntry._meta.db_table)
+    staging = ops.quote_name(STAGING_TABLE)
+    fields = [RoyaltyEntry._meta.get_field(name) for name in ENTRY_COLUMNS]
+    columns = ', '.join(ops.quote_name(field.column) for field in fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA'
+        )
+        # Binary COPY skips formatting every value as text; it needs the column types up front
+        with cursor.copy(f'COPY {staging} ({columns}) FROM STDIN (FORMAT BINARY)') as copy:
+            copy.set_types([field.db_type(connection).partition('(')[0] for field in fields])
+            for row in rows:
+                copy.write_row(row)
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} '
+            f'ON CONFLICT DO NOTHING RETURNING {ops.quote_name("reference")}'
+        )
+        inserted = {reference for reference, in cursor.fetchall()}
+        cursor.execute(f'DROP TABLE {staging}')  # The next batch may share the transaction
+    return inserted
+
+
+def _add_to_sales(totals):
+    """Add {design_id: (units, gross, royalty, last_sold_at)} to DesignSales with one upsert"""
+    if not totals:
+        return
+
+    ops = connection.ops
+    table = ops.quote_name(DesignSales._meta.db_table)
+    fields = [DesignSales._meta.get_field(name) for name in SALES_COLUMNS]
+    if connection.vendor == 'postgresql':
+        # One statement with an array per column instead of one per design
+        source = 'SELECT * FROM unnest({})'.format(
+            ', '.join(f'%s::{field.db_type(connection)}[]' for field in fields)
+        )
+    else:
+        source = f"VALUES ({', '.join(['%s'] * len(fields))})"
+    # ON CONFLICT ... DO UPDATE works on PostgreSQL and SQLite alike; the
+    # increments happen in the database, so concurrent ingesters add up
+    sql = (
+        f'INSERT INTO {table} (design_id, units, gross, royalty, last_sold_at) {source} '
+        f'ON CONFLICT (design_id) DO UPDATE SET '
+        f'units = {table}.units + excluded.units, '
+        f'gross = {table}.gross + excluded.gross, '
+        f'royalty = {table}.royalty + excluded.royalty, '
+        f'last_sold_at = CASE WHEN {table}.last_sold_at IS NULL OR excluded.last_sold_at > {table}.last_sold_at '
+        f'THEN excluded.last_sold_at ELSE {table}.last_sold_at END'
+    )
+    rows = [
+        (
+            design_id,
+            units,
+            ops.adapt_decimalfield_value(gross),
+            ops.adapt_decimalfield_value(royalty),
+            ops.adapt_datetimefield_value(last_sold_at),
+        )
+        for design_id, (units, gross, royalty, last_sold_at) in totals.items()
+    ]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(sql, [list(column) for column in zip(*rows)])
+        else:
+            cursor.executemany(sql, rows)
+
+
+def _ingest_batch(events, sku_map, stats):
+    lines = {}
+    for event in events:
+        parsed = parse_event(event) if event is not None else None
+        if parsed is None:
+            stats['invalid'] += 1
+        elif parsed[0] in lines:
+            stats['duplicate'] += 1
+        else:
+            lines[parsed[0]] = parsed
+
+    sku_map.resolve({line[1] for line in lines.values()})
+
+    # Rows are built as plain tuples: model instances and per-field
+    # get_db_prep_save() were most of the per-event cost
+    ops = connection.ops
+    adapt_decimal, adapt_datetime = ops.adapt_decimalfield_value, ops.adapt_datetimefield_value
+    created_at = adapt_datetime(timezone.now())
+    rows, sales, timestamps = [], {}, {}
+    for line_id, sku, quantity, amount, occurred_at in lines.values():
+        resolved = sku_map.get(sku)
+        if resolved is None:
+            stats['unknown_sku'] += 1
+            continue
+        design_product_id, design_id, creator_id, rate = resolved
+        royalty = royalty_amount(amount, rate)
+        rows.append((
+            creator_id, design_product_id, 'sale' if amount >= 0 else 'refund', line_id, quantity,
+            adapt_decimal(amount), adapt_decimal(rate), adapt_decimal(royalty),
+            timestamps.get(occurred_at) or timestamps.setdefault(occurred_at, adapt_datetime(occurred_at)),
+            created_at,
+        ))
+        sales[line_id] = (design_id, quantity, amount, royalty, occurred_at)
+    if not rows:
+        return
+
+    with transaction.atomic():
+        inserted = _insert_entries(rows)
+        totals = {}
+        for line_id in inserted:
+            design_id, quantity, amount, royalty, occurred_at = sales[line_id]
+            units, gross, total_royalty, last_sold_at = totals.get(design_id, (0, 0, 0, occurred_at))
+            totals[design_id] = (
+                units + quantity, gross + amount, total_royalty + royalty, max(last_sold_at, occurred_at),
+            )
+        _add_to_sales(totals)
+    stats['created'] += len(inserted)
+    stats['duplicate'] += len(rows) - len(inserted)
+
+
+def ingest_events(events, sku_map=None, batch_size=BATCH_SIZE):
+    """
+    Record order events on the royalty ledger
+
+    Args:
+        events: Iterable of event dicts (see parse_event); None counts as invalid
+        sku_map: SkuMap to reuse across calls (default: a fresh one)
+        batch_size: Events per SKU lookup, insert and sales upsert
+
+    Returns:
+        Counter of created, duplicate, unknown_sku and invalid events
+    """
+    sku_map = sku_map or SkuMap()
+    stats = Counter(dict.fromkeys(RESULTS, 0))
+    events = iter(events)
+    while batch := list(islice(events, batch_size)):
+        before = stats.copy()
+        _ingest_batch(batch, sku_map, stats)
+        for result in RESULTS:
+            if stats[result] != before[result]:
+                ORDER_EVENTS.inc(stats[result] - before[result], result=result)
+    if stats['unknown_sku']:
+        logger.warning(f"{stats['unknown_sku']} order events had an unknown SKU")
+    return stats
+
+
+def rebuild_design_sales():
+    """
+    Recompute every DesignSales row from the ledger
+
+    Returns:
+        Number of designs with sales
+    """
+    totals = (
+        RoyaltyEntry.objects.filter(design_product__isnull=False)
+        .values('design_product__design')
+        .annotate(
+            units=Sum('quantity'), gross=Sum('gross'), royalty=Sum('amount'),
+            last_sold_at=Max('occurred_at'),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        DesignSales.objects.all().delete()
+        DesignSales.objects.bulk_create(
+            (
+                DesignSales(
+                    design_id=row['design_product__design'], units=row['units'], gross=row['gross'],
+                    royalty=row['royalty'], last_sold_at=row['last_sold_at'],
+                )
+                for row in totals.iterator(chunk_size=5000)
+            ),
+            batch_size=2000,
+        )
+    return DesignSales.objects.count()
@@ -0,0 +1,60 @@
+"""
+Management command to build a period's creator payouts and export the bank transfer file
+"""
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payouts.batches import build_payout_batch, stream_transfer_csv
+
+
+def month_period(value):
+    """(first day, last day) of a YYYY-MM month"""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        start = date(year, month, 1)
+    except ValueError:
+        raise CommandError(f'Invalid --period {value!r}, expected YYYY-MM.')
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+
+class Command(BaseCommand):
+    help = 'Settle unpaid royalties for a period (default: last month) and write the bank transfer CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', default='', help='Month to settle as YYYY-MM (default: last month)')
+        parser.add_argument('--minimum', default='', help='Smallest balance paid out (default PAYOUT_MINIMUM)')
+        parser.add_argument('--output', default='', help='Write the CSV to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['period']:
+            start, end = month_period(options['period'])
+        else:
+            last_month = timezone.localdate().replace(day=1) - timedelta(days=1)
+            start, end = last_month.replace(day=1), last_month
+
+        minimum = None
+        if options['minimum']:
+            try:
+                minimum = Decimal(options['minimum'])
+            except InvalidOperation:
+                raise CommandError(f'Invalid --minimum {options["minimum"]!r}.')
+
+        batch, created = build_payout_batch(start, end, minimum)
+        if not created:
+            self.stderr.write(self.style.WARNING(f'{batch} was already built on {batch.created_at:%Y-%m-%d %H:%M}; exporting it again.'))
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+                for line in stream_transfer_csv(batch):
+                    fh.write(line)
+        else:
+            for line in stream_transfer_csv(batch):
+                self.stdout.write(line, ending='')
+
+        self.stderr.write(self.style.SUCCESS(
+            f'✅ {batch}: {batch.payout_count} payouts, {batch.entry_count} entries, total Rp {batch.total:,.2f}'
+        ))
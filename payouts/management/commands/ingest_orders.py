@@ -0,0 +1,45 @@
+"""
+Management command to ingest storefront order events from JSON Lines files
+"""
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payouts.ingest import BATCH_SIZE, SkuMap, ingest_events, read_jsonl, rebuild_design_sales
+
+
+class Command(BaseCommand):
+    help = 'Record order events from JSON Lines files on the royalty ledger and update per-design sales'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help="JSON Lines files of order events ('-' for stdin)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Events per batch')
+        parser.add_argument('--rebuild-sales', action='store_true',
+                            help='Recompute per-design sales totals from the whole ledger afterwards')
+
+    def handle(self, *args, **options):
+        if not options['files'] and not options['rebuild_sales']:
+            raise CommandError('Give at least one file, or --rebuild-sales.')
+
+        sku_map = SkuMap()
+        for path in options['files']:
+            start = time.perf_counter()
+            try:
+                fh = sys.stdin if path == '-' else open(path, encoding='utf-8')
+            except OSError as e:
+                raise CommandError(f'Cannot read {path}: {e}')
+            with fh:
+                stats = ingest_events(read_jsonl(fh), sku_map, options['batch_size'])
+            elapsed = time.perf_counter() - start
+            total = sum(stats.values())
+            self.stderr.write(
+                f'{path}: {total} events in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f}/s) — '
+                + ', '.join(f'{result} {count}' for result, count in stats.items())
+            )
+
+        if options['rebuild_sales']:
+            designs = rebuild_design_sales()
+            self.stderr.write(f'Rebuilt sales totals for {designs} designs')
+
+        self.stderr.write(self.style.SUCCESS('✅ Done'))
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('designs', '0006_royalty_rate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField(verbose_name='Periode Mulai')),
+                ('period_end', models.DateField(verbose_name='Periode Selesai')),
+                ('cutoff', models.DateTimeField(verbose_name='Cut-off')),
+                ('minimum', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Minimum Payout')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Total')),
+                ('payout_count', models.PositiveIntegerField(default=0, verbose_name='Jumlah Payout')),
+                ('entry_count', models.PositiveIntegerField(default=0, verbose_name='Jumlah Entri')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Dibuat oleh')),
+            ],
+            options={
+                'verbose_name': 'Payout Batch',
+                'verbose_name_plural': 'Payout Batches',
+                'ordering': ['-period_start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Payout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Jumlah')),
+                ('entry_count', models.PositiveIntegerField(default=0, verbose_name='Jumlah Entri')),
+                ('bank_name', models.CharField(max_length=50, verbose_name='Nama Bank')),
+                ('bank_number', models.CharField(max_length=30, verbose_name='No. Rekening')),
+                ('bank_holder', models.CharField(max_length=100, verbose_name='Atas Nama')),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='payouts', to=settings.AUTH_USER_MODEL, verbose_name='Creator')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payouts', to='payouts.payoutbatch')),
+            ],
+            options={
+                'verbose_name': 'Payout',
+                'verbose_name_plural': 'Payouts',
+            },
+        ),
+        migrations.CreateModel(
+            name='RoyaltyEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sale', 'Sale'), ('refund', 'Refund'), ('adjustment', 'Adjustment')], default='sale', max_length=20, verbose_name='Jenis')),
+                ('reference', models.CharField(max_length=100, unique=True, verbose_name='Referensi')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Jumlah')),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Penjualan')),
+                ('rate', models.DecimalField(decimal_places=4, default=0, max_digits=5, verbose_name='Rate Royalti')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Royalti')),
+                ('occurred_at', models.DateTimeField(verbose_name='Waktu')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='royalty_entries', to=settings.AUTH_USER_MODEL, verbose_name='Creator')),
+                ('design_product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='royalty_entries', to='designs.designproduct', verbose_name='SKU')),
+                ('payout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='payouts.payout', verbose_name='Payout')),
+            ],
+            options={
+                'verbose_name': 'Royalty Entry',
+                'verbose_name_plural': 'Royalty Entries',
+                'ordering': ['-occurred_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='payoutbatch',
+            constraint=models.UniqueConstraint(fields=('period_start', 'period_end'), name='payouts_batch_period'),
+        ),
+        migrations.AddIndex(
+            model_name='payout',
+            index=models.Index(fields=['batch', 'bank_name'], name='payouts_payout_batch_bank'),
+        ),
+        migrations.AddConstraint(
+            model_name='payout',
+            constraint=models.UniqueConstraint(fields=('batch', 'creator'), name='payouts_payout_batch_creator'),
+        ),
+        migrations.AddIndex(
+            model_name='royaltyentry',
+            index=models.Index(condition=models.Q(('payout__isnull', True)), fields=['occurred_at', 'creator'], name='payouts_entry_unpaid'),
+        ),
+        migrations.AddIndex(
+            model_name='royaltyentry',
+            index=models.Index(fields=['creator', '-occurred_at'], name='payouts_entry_creator'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.10 on 2026-10-19 00:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('designs', '0006_royalty_rate'),
+        ('payouts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignSales',
+            fields=[
+                ('design', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales', serialize=False, to='designs.design', verbose_name='Design')),
+                ('units', models.IntegerField(default=0, verbose_name='Terjual')),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Penjualan')),
+                ('royalty', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Royalti')),
+                ('last_sold_at', models.DateTimeField(blank=True, null=True, verbose_name='Penjualan Terakhir')),
+            ],
+            options={
+                'verbose_name': 'Design Sales',
+                'verbose_name_plural': 'Design Sales',
+                'ordering': ['-units'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='royaltyentry',
+            name='creator',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='royalty_entries', to=settings.AUTH_USER_MODEL, verbose_name='Creator'),
+        ),
+    ]
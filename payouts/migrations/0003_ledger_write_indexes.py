@@ -0,0 +1,62 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+LEDGER_TABLE = 'payouts_royaltyentry'
+
+
+def drop_reference_like_index(apps, schema_editor):
+    """unique=True also gave reference a varchar_pattern_ops index on PostgreSQL"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    name = schema_editor._create_index_name(LEDGER_TABLE, ['reference'], suffix='_like')
+    schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+def create_reference_like_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    name = schema_editor._create_index_name(LEDGER_TABLE, ['reference'], suffix='_like')
+    schema_editor.execute(
+        f'CREATE INDEX {schema_editor.quote_name(name)} ON {schema_editor.quote_name(LEDGER_TABLE)} '
+        f'({schema_editor.quote_name("reference")} varchar_pattern_ops)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payouts', '0002_design_sales'),
+    ]
+
+    operations = [
+        # Add the partial index before dropping the full one, so lookups by payout always have one
+        migrations.AddIndex(
+            model_name='royaltyentry',
+            index=models.Index(condition=models.Q(('payout__isnull', False)), fields=['payout'], name='payouts_entry_paid'),
+        ),
+        migrations.AlterField(
+            model_name='royaltyentry',
+            name='payout',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='payouts.payout', verbose_name='Payout'),
+        ),
+        # The constraint takes over the unique index PostgreSQL already has under
+        # this name, so the ledger is not re-indexed; only the LIKE index goes
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='royaltyentry',
+                    name='reference',
+                    field=models.CharField(max_length=100, verbose_name='Referensi'),
+                ),
+                migrations.AddConstraint(
+                    model_name='royaltyentry',
+                    constraint=models.UniqueConstraint(fields=('reference',), name='payouts_royaltyentry_reference_key'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(drop_reference_like_index, create_reference_like_index),
+            ],
+        ),
+    ]
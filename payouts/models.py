@@ -0,0 +1,203 @@
+"""
+Royalty ledger and payout models for PICU Creator Dashboard
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+
+
+def royalty_rate(design, product) -> Decimal:
+    """Royalty share of a sale: the design's own rate if set, else the product's"""
+    return design.royalty_rate if design.royalty_rate is not None else product.royalty_rate
+
+
+def royalty_amount(gross, rate) -> Decimal:
+    """Creator's share of a sale, rounded to the rupiah cent"""
+    return (gross * rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+class RoyaltyEntry(models.Model):
+    """
+    One line of a creator's royalty ledger
+    Sales credit it, refunds and corrections debit it; a payout settles it.
+    """
+    KIND_CHOICES = [
+        ('sale', 'Sale'),
+        ('refund', 'Refund'),
+        ('adjustment', 'Adjustment'),
+    ]
+    
+    creator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='royalty_entries',
+        verbose_name='Creator',
+        db_index=False,  # payouts_entry_creator leads with creator
+    )
+    design_product = models.ForeignKey(
+        'designs.DesignProduct',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='royalty_entries',
+        verbose_name='SKU'
+    )
+    kind = models.CharField('Jenis', max_length=20, choices=KIND_CHOICES, default='sale')
+    # Order line ID or similar; recording the same reference twice is a no-op
+    # (payouts_entry_reference)
+    reference = models.CharField('Referensi', max_length=100)
+    quantity = models.IntegerField('Jumlah', default=0)
+    gross = models.DecimalField('Penjualan', max_digits=14, decimal_places=2, default=0)
+    rate = models.DecimalField('Rate Royalti', max_digits=5, decimal_places=4, default=0)
+    amount = models.DecimalField('Royalti', max_digits=14, decimal_places=2)
+    occurred_at = models.DateTimeField('Waktu')
+    payout = models.ForeignKey(
+        'Payout',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='entries',
+        verbose_name='Payout',
+        db_index=False,  # payouts_entry_paid
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Royalty Entry'
+        verbose_name_plural = 'Royalty Entries'
+        ordering = ['-occurred_at']
+        indexes = [
+            # build_payouts scans unpaid entries up to a cut-off
+            models.Index(
+                fields=['occurred_at', 'creator'],
+                condition=Q(payout__isnull=True),
+                name='payouts_entry_unpaid',
+            ),
+            models.Index(fields=['creator', '-occurred_at'], name='payouts_entry_creator'),
+            # Entries arrive unpaid, so ingestion does not have to maintain this one
+            models.Index(fields=['payout'], condition=Q(payout__isnull=False), name='payouts_entry_paid'),
+        ]
+        constraints = [
+            # A constraint rather than unique=True: on PostgreSQL that also adds a
+            # LIKE index on reference, which nothing queries but every insert updates
+            models.UniqueConstraint(fields=['reference'], name='payouts_royaltyentry_reference_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.reference}: {self.amount}"
+    
+    @classmethod
+    def for_sale(cls, design_product, quantity, gross, reference, occurred_at):
+        """
+        Unsaved ledger entry for a sale (or a refund, with negative quantity and gross)
+        
+        design_product must have design and product loaded.
+        """
+        rate = royalty_rate(design_product.design, design_product.product)
+        gross = Decimal(gross)
+        return cls(
+            creator_id=design_product.design.creator_id,
+            design_product=design_product,
+            kind='sale' if gross >= 0 else 'refund',
+            reference=reference,
+            quantity=quantity,
+            gross=gross,
+            rate=rate,
+            amount=royalty_amount(gross, rate),
+            occurred_at=occurred_at,
+        )
+
+
+class PayoutBatch(models.Model):
+    """
+    All payouts for one period; built once by `manage.py build_payouts`
+    """
+    period_start = models.DateField('Periode Mulai')
+    period_end = models.DateField('Periode Selesai')
+    # Unpaid entries before this moment are settled by the batch, including
+    # carried-over balances from earlier periods that were below the minimum
+    cutoff = models.DateTimeField('Cut-off')
+    minimum = models.DecimalField('Minimum Payout', max_digits=14, decimal_places=2)
+    total = models.DecimalField('Total', max_digits=16, decimal_places=2, default=0)
+    payout_count = models.PositiveIntegerField('Jumlah Payout', default=0)
+    entry_count = models.PositiveIntegerField('Jumlah Entri', default=0)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Dibuat oleh'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Payout Batch'
+        verbose_name_plural = 'Payout Batches'
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['period_start', 'period_end'], name='payouts_batch_period'),
+        ]
+    
+    def __str__(self):
+        return f"Payout {self.period_start:%d %b %Y} - {self.period_end:%d %b %Y}"
+
+
+class Payout(models.Model):
+    """
+    One bank transfer to a creator
+    Bank details are copied from the creator when the batch is built.
+    """
+    batch = models.ForeignKey(PayoutBatch, on_delete=models.CASCADE, related_name='payouts')
+    creator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='payouts',
+        verbose_name='Creator'
+    )
+    amount = models.DecimalField('Jumlah', max_digits=14, decimal_places=2)
+    entry_count = models.PositiveIntegerField('Jumlah Entri', default=0)
+    bank_name = models.CharField('Nama Bank', max_length=50)
+    bank_number = models.CharField('No. Rekening', max_length=30)
+    bank_holder = models.CharField('Atas Nama', max_length=100)
+    
+    class Meta:
+        verbose_name = 'Payout'
+        verbose_name_plural = 'Payouts'
+        constraints = [
+            models.UniqueConstraint(fields=['batch', 'creator'], name='payouts_payout_batch_creator'),
+        ]
+        indexes = [
+            models.Index(fields=['batch', 'bank_name'], name='payouts_payout_batch_bank'),
+        ]
+    
+    def __str__(self):
+        return f"{self.creator_id}: {self.amount}"
+
+
+class DesignSales(models.Model):
+    """
+    Running sales totals per design, net of refunds
+    Updated incrementally as order events are ingested (payouts.ingest).
+    """
+    design = models.OneToOneField(
+        'designs.Design',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='sales',
+        verbose_name='Design'
+    )
+    units = models.IntegerField('Terjual', default=0)
+    gross = models.DecimalField('Penjualan', max_digits=16, decimal_places=2, default=0)
+    royalty = models.DecimalField('Royalti', max_digits=16, decimal_places=2, default=0)
+    last_sold_at = models.DateTimeField('Penjualan Terakhir', null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Design Sales'
+        verbose_name_plural = 'Design Sales'
+        ordering = ['-units']
+    
+    def __str__(self):
+        return f"{self.design_id}: {self.units} sold"
@@ -0,0 +1,233 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from designs.models import Design, DesignProduct, Product
+from .batches import build_payout_batch, stream_transfer_csv
+from .ingest import ingest_events, rebuild_design_sales
+from .models import DesignSales, Payout, RoyaltyEntry
+
+
+@override_settings(PAYOUT_MINIMUM=Decimal('10000'))
+class BuildPayoutsTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+        self.sequence = 0
+
+    def _creator(self, bank='bca', number='123'):
+        self.sequence += 1
+        creator = User.objects.create_user(
+            email=f'creator{self.sequence}@picu.test', password=None, full_name=f'Creator {self.sequence}',
+            phone='0812', role='creator', bank_name=bank, bank_number=number, bank_holder=f'Holder {self.sequence}',
+        )
+        design = Design.objects.create(creator=creator, title='Desain', image='https://example.com/d.png')
+        return DesignProduct.objects.select_related('design', 'product').get(
+            pk=DesignProduct.objects.create(design=design, product=self.product).pk
+        )
+
+    def _sale(self, design_product, gross, day):
+        self.sequence += 1
+        occurred_at = datetime(2026, 9, day, 3, tzinfo=dt_timezone.utc)
+        return RoyaltyEntry.for_sale(design_product, 1, Decimal(gross), f'order-{self.sequence}', occurred_at)
+
+    def test_period_is_settled_set_based_and_idempotently(self):
+        paid = self._creator(bank=' bca ')
+        RoyaltyEntry.objects.bulk_create([self._sale(paid, 150000, 1), self._sale(paid, 50000, 30)])
+        small = self._creator(bank='Mandiri')
+        RoyaltyEntry.objects.bulk_create([self._sale(small, 90000, 2)])  # 9000 royalty: carried over
+        no_bank = self._creator(number='')
+        RoyaltyEntry.objects.bulk_create([self._sale(no_bank, 500000, 3)])
+        later = self._sale(paid, 100000, 1)
+        later.occurred_at = datetime(2026, 10, 1, 1, tzinfo=dt_timezone.utc)  # 08:00 in Jakarta
+        later.save()
+
+        batch, created = build_payout_batch(date(2026, 9, 1), date(2026, 9, 30))
+
+        self.assertTrue(created)
+        payout = Payout.objects.get(batch=batch)
+        self.assertEqual((payout.creator_id, payout.amount, payout.entry_count), (paid.design.creator_id, Decimal('20000.00'), 2))
+        self.assertEqual(payout.bank_name, 'BCA')
+        self.assertEqual(RoyaltyEntry.objects.filter(payout=payout).count(), 2)
+        self.assertEqual(RoyaltyEntry.objects.filter(payout__isnull=True).count(), 3)
+        self.assertEqual(batch.total, Decimal('20000.00'))
+
+        again, created = build_payout_batch(date(2026, 9, 1), date(2026, 9, 30))
+        self.assertFalse(created)
+        self.assertEqual(again.pk, batch.pk)
+        self.assertEqual(Payout.objects.count(), 1)
+
+    def test_query_count_does_not_grow_with_creators(self):
+        def queries_for(creators, period):
+            for _ in range(creators):
+                RoyaltyEntry.objects.bulk_create([self._sale(self._creator(), 200000, 5)])
+            with CaptureQueriesContext(connection) as queries:
+                build_payout_batch(*period)
+            return len(queries)
+
+        few = queries_for(2, (date(2026, 9, 1), date(2026, 9, 15)))
+        many = queries_for(40, (date(2026, 9, 16), date(2026, 9, 30)))
+        self.assertEqual(few, many)
+
+    def test_transfer_csv_is_grouped_by_bank(self):
+        for bank in ('Mandiri', 'BCA', 'mandiri', 'BNI'):
+            RoyaltyEntry.objects.bulk_create([self._sale(self._creator(bank=bank), 200000, 10)])
+
+        out = io.StringIO()
+        call_command('build_payouts', '--period', '2026-09', stdout=out, stderr=io.StringIO())
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([row['bank_name'] for row in rows], ['BCA', 'BNI', 'MANDIRI', 'MANDIRI'])
+        self.assertEqual(rows[0]['amount'], '20000.00')
+        self.assertTrue(rows[0]['reference'].startswith('PICU-202609-'))
+        batch = Payout.objects.first().batch
+        self.assertEqual(''.join(stream_transfer_csv(batch)).replace('\r\n', '\n'), out.getvalue().replace('\r\n', '\n'))
+
+
+    def test_transfer_csv_neutralises_formulas(self):
+        design_product = self._creator()
+        User.objects.filter(pk=design_product.design.creator_id).update(
+            bank_holder='=HYPERLINK("http://evil.test","x")', full_name='@SUM(A1)',
+        )
+        RoyaltyEntry.objects.bulk_create([self._sale(design_product, 200000, 10)])
+        batch, _ = build_payout_batch(date(2026, 9, 1), date(2026, 9, 30))
+
+        [row] = csv.DictReader(io.StringIO(''.join(stream_transfer_csv(batch))))
+
+        self.assertEqual(row['bank_holder'], '\'=HYPERLINK("http://evil.test","x")')
+        self.assertEqual(row['creator_name'], "'@SUM(A1)")
+        self.assertEqual(row['bank_number'], '123')
+
+    def test_transfer_export_takes_one_batch_at_a_time(self):
+        from django.urls import reverse
+
+        RoyaltyEntry.objects.bulk_create([self._sale(self._creator(), 200000, 10)])
+        first, _ = build_payout_batch(date(2026, 9, 1), date(2026, 9, 15))
+        second, _ = build_payout_batch(date(2026, 9, 16), date(2026, 9, 30))
+        self.client.force_login(User.objects.create_superuser(
+            email='admin@picu.test', password='secret', full_name='Admin', phone='0812'
+        ))
+        url = reverse('admin:payouts_payoutbatch_changelist')
+
+        response = self.client.post(
+            url, {'action': 'export_transfers', '_selected_action': [first.pk, second.pk]}, follow=True,
+        )
+        self.assertContains(response, 'Select one batch')
+
+        response = self.client.post(url, {'action': 'export_transfers', '_selected_action': [first.pk]})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+@override_settings(STOREFRONT_API_TOKEN='storefront-secret')
+class OrderIngestTests(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user(
+            email='creator@picu.test', password=None, full_name='Creator', phone='0812', role='creator',
+        )
+        product = Product.objects.create(name='Kaos', base_cost=Decimal('45000'))
+        self.design = Design.objects.create(creator=creator, title='Desain', image='https://example.com/d.png')
+        self.sku = DesignProduct.objects.create(design=self.design, product=product).sku
+        special = Design.objects.create(
+            creator=creator, title='Spesial', image='https://example.com/s.png', royalty_rate=Decimal('0.2500'),
+        )
+        self.special_sku = DesignProduct.objects.create(design=special, product=product).sku
+
+    def _event(self, line_id, sku=None, quantity=1, amount='100000'):
+        return {'id': line_id, 'sku': sku or self.sku, 'quantity': quantity, 'amount': amount,
+                'occurred_at': '2026-09-01T10:00:00+07:00'}
+
+    def test_file_ingest_dedupes_and_keeps_sales_totals(self):
+        events = [
+            self._event('line-1', quantity=2, amount='200000'),
+            self._event('line-1', quantity=2, amount='200000'),
+            self._event('line-2'),
+            self._event('line-3', sku=self.special_sku),
+            self._event('line-4', quantity=-1, amount='-100000'),
+            self._event('line-5', sku='PICU-NOPE'),
+            {'id': 'line-6', 'sku': self.sku},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as fh:
+            fh.write('\n'.join(json.dumps(event) for event in events) + '\nnot json\n')
+        self.addCleanup(os.remove, fh.name)
+
+        err = io.StringIO()
+        call_command('ingest_orders', fh.name, '--batch-size', '3', stderr=err)
+        self.assertIn('created 4, duplicate 1, unknown_sku 1, invalid 2', err.getvalue())
+
+        sales = DesignSales.objects.get(design=self.design)
+        self.assertEqual((sales.units, sales.gross, sales.royalty), (2, Decimal('200000.00'), Decimal('20000.00')))
+        self.assertEqual(RoyaltyEntry.objects.get(reference='line-3').amount, Decimal('25000.00'))
+        self.assertEqual(RoyaltyEntry.objects.get(reference='line-4').kind, 'refund')
+
+        # Redelivering the whole file changes nothing
+        stats = ingest_events(events)
+        self.assertEqual((stats['created'], stats['duplicate']), (0, 5))
+        self.assertEqual(DesignSales.objects.get(design=self.design).units, 2)
+
+        incremental = sorted(DesignSales.objects.values_list('design', 'units', 'gross', 'royalty', 'last_sold_at'))
+        rebuild_design_sales()
+        self.assertEqual(
+            sorted(DesignSales.objects.values_list('design', 'units', 'gross', 'royalty', 'last_sold_at')), incremental,
+        )
+
+    def test_values_the_ledger_cannot_hold_are_invalid(self):
+        stats = ingest_events([
+            self._event('big-qty', quantity=2 ** 31),
+            self._event('big-amount', amount='1000000000000'),
+            self._event('max', quantity=2 ** 31 - 1, amount='-999999999999.99'),
+        ])
+        self.assertEqual((stats['created'], stats['invalid']), (1, 2))
+        self.assertEqual(RoyaltyEntry.objects.get().reference, 'max')
+
+    def test_query_count_per_batch_is_constant(self):
+        def queries_for(prefix, count):
+            events = [self._event(f'{prefix}-{i}', sku=(self.sku, self.special_sku)[i % 2]) for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                ingest_events(events)
+            return len(queries)
+
+        # 50 rows still fit in one INSERT under SQLite's 999-parameter limit
+        self.assertEqual(queries_for('few', 2), queries_for('many', 50))
+
+    def test_endpoint_requires_token(self):
+        url = '/api/orders/events'
+        body = json.dumps([self._event('web-1'), self._event('web-2')])
+
+        response = self.client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            url, body, content_type='application/json', HTTP_AUTHORIZATION='Bearer storefront-secret',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+
+        ndjson = '\n'.join(json.dumps(self._event(f'web-{i}')) for i in (2, 3))
+        response = self.client.post(
+            url, ndjson, content_type='application/x-ndjson', HTTP_AUTHORIZATION='Bearer storefront-secret',
+        )
+        self.assertEqual((response.json()['created'], response.json()['duplicate']), (1, 1))
+        self.assertEqual(DesignSales.objects.get(design=self.design).units, 3)
+
+    @override_settings(STOREFRONT_API_TOKEN='', ORDER_INGEST_TOKEN='legacy-secret')
+    def test_deprecated_token_name_still_works(self):
+        from unittest import mock
+
+        from picu import api
+
+        self.enterContext(mock.patch.object(api, '_legacy_token_warned', False))
+        with self.assertLogs('picu.api', 'WARNING') as logs:
+            response = self.client.post(
+                '/api/orders/events', json.dumps([self._event('web-1')]), content_type='application/json',
+                HTTP_AUTHORIZATION='Bearer legacy-secret',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ORDER_INGEST_TOKEN is deprecated', logs.output[0])
@@ -0,0 +1,45 @@
+"""
+Views for payouts app
+"""
+import json
+
+from django.conf import settings
+from django.http import HttpResponseForbidden, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from picu.api import storefront_authorized
+
+from .ingest import ingest_events, read_jsonl
+
+
+@csrf_exempt
+@require_POST
+def order_events(request):
+    """
+    Storefront webhook: record a batch of order events
+
+    The body is a JSON array of events, or JSON Lines when sent as
+    application/x-ndjson. Delivering the same order line again is harmless,
+    so storefronts may retry a whole batch.
+    """
+    if not storefront_authorized(request):
+        return HttpResponseForbidden('Forbidden')
+
+    if request.content_type == 'application/x-ndjson':
+        events = list(read_jsonl(request.body.decode('utf-8', errors='replace').splitlines()))
+    else:
+        try:
+            events = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'Body is not valid JSON'}, status=400)
+        if not isinstance(events, list):
+            return JsonResponse({'error': 'Expected a JSON array of events'}, status=400)
+        events = [event if isinstance(event, dict) else None for event in events]
+
+    if len(events) > settings.ORDER_INGEST_MAX_EVENTS:
+        return JsonResponse(
+            {'error': f'At most {settings.ORDER_INGEST_MAX_EVENTS} events per request'}, status=413
+        )
+
+    return JsonResponse(ingest_events(events))
@@ -0,0 +1,33 @@
+"""
+Helpers shared by the JSON endpoints storefront integrations call
+"""
+import hmac
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_legacy_token_warned = False
+
+
+def bearer_authorized(request, token: str) -> bool:
+    """Whether the request carries `token` as a bearer token; always False while the token is empty"""
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def storefront_token() -> str:
+    """STOREFRONT_API_TOKEN, or the deprecated ORDER_INGEST_TOKEN while it is unset"""
+    global _legacy_token_warned
+    if settings.STOREFRONT_API_TOKEN or not settings.ORDER_INGEST_TOKEN:
+        return settings.STOREFRONT_API_TOKEN
+    if not _legacy_token_warned:
+        _legacy_token_warned = True
+        logger.warning("ORDER_INGEST_TOKEN is deprecated; rename it to STOREFRONT_API_TOKEN")
+    return settings.ORDER_INGEST_TOKEN
+
+
+def storefront_authorized(request) -> bool:
+    """Whether the request carries the storefront token as a bearer token"""
+    return bearer_authorized(request, storefront_token())
@@ -0,0 +1,136 @@
+"""
+Circuit breaker for calls to external services
+
+Outcomes of recent calls are kept for a rolling window. When enough of
+them failed or were slower than the latency threshold, the breaker opens
+and calls fail immediately with CircuitOpenError instead of waiting on a
+degraded service. After a cool-down it lets a few trial calls through
+(half-open); one success closes it again, one failure re-opens it.
+
+State is per process and shared by all its threads.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from picu.metrics import BREAKER_REJECTED, BREAKER_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of making a call while the breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker over a rolling window of call outcomes
+
+    Args:
+        name: Label for logs and metrics
+        failure_rate: Fraction of failed or slow calls in the window that opens the breaker
+        slow_call_seconds: Calls taking longer than this count as failures
+        window_seconds: How far back outcomes are considered
+        min_calls: Outcomes needed in the window before the breaker may open
+        open_seconds: Cool-down before trial calls are let through
+        half_open_calls: Trial calls allowed at once while half-open
+        is_failure: Predicate deciding whether an exception counts against the service
+    """
+
+    def __init__(self, name, failure_rate=0.5, slow_call_seconds=5.0, window_seconds=30,
+                 min_calls=5, open_seconds=30, half_open_calls=1, is_failure=None):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.is_failure = is_failure or (lambda error: True)
+
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trials = 0
+        self.outcomes = deque()  # (monotonic time, failed)
+
+    def _transition(self, state, reason=''):
+        # Caller holds the lock
+        previous, self.state = self.state, state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        self.trials = 0
+        self.outcomes.clear()
+        BREAKER_TRANSITIONS.inc(breaker=self.name, state=state)
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit breaker {self.name}: {previous} -> {state}{f' ({reason})' if reason else ''}")
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; counts it as a trial when half-open"""
+        with self.lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.trials >= self.half_open_calls:
+                    return False
+                self.trials += 1
+            return True
+
+    def record(self, failed: bool, duration: float):
+        """Record the outcome of a call that allow() let through"""
+        failed = failed or duration > self.slow_call_seconds
+        with self.lock:
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._transition(OPEN, f'trial call failed after {duration:.1f}s')
+                else:
+                    self._transition(CLOSED)
+                return
+            if self.state == OPEN:
+                return  # A call started before the breaker opened
+
+            now = time.monotonic()
+            self.outcomes.append((now, failed))
+            while self.outcomes and self.outcomes[0][0] < now - self.window_seconds:
+                self.outcomes.popleft()
+            failures = sum(1 for _, f in self.outcomes if f)
+            calls = len(self.outcomes)
+            if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                self._transition(OPEN, f'{failures}/{calls} calls failed or slow in {self.window_seconds}s')
+
+    def release(self):
+        """Give back a call allow() let through without recording an outcome"""
+        with self.lock:
+            if self.state == HALF_OPEN and self.trials:
+                self.trials -= 1
+
+    @contextmanager
+    def guard(self):
+        """
+        Run the body as one call through the breaker
+
+        Raises:
+            CircuitOpenError: The breaker is open; the body did not run
+        """
+        if not self.allow():
+            BREAKER_REJECTED.inc(breaker=self.name)
+            raise CircuitOpenError(f"Circuit breaker {self.name} is open")
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.record(self.is_failure(e), time.monotonic() - start)
+            raise
+        except BaseException:
+            # Interrupted (e.g. a generator closed early); says nothing about the service
+            self.release()
+            raise
+        self.record(False, time.monotonic() - start)
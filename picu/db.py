@@ -0,0 +1,75 @@
+"""
+Database connection strategies for PICU Creator Dashboard
+
+persistent  One connection per worker thread, kept for conn_max_age seconds
+            (long-lived gunicorn workers)
+pool        psycopg3 connection pool shared by the threads of a worker
+serverless  At most one short-lived connection per lambda, closed at the end
+            of every request so frozen instances do not hold server slots
+"""
+import os
+
+import dj_database_url
+
+CONNECTION_MODES = ('persistent', 'pool', 'serverless')
+
+
+def default_connection_mode() -> str:
+    """Serverless on Vercel, persistent everywhere else"""
+    if os.getenv('VERCEL'):
+        return 'serverless'
+    return 'persistent'
+
+
+def database_config(url: str, mode: str = None) -> dict:
+    """
+    Build a DATABASES entry for the given URL and connection mode
+
+    Args:
+        url: Database URL (postgresql://... or sqlite:///...)
+        mode: One of CONNECTION_MODES; defaults to DB_CONNECTION_MODE env
+
+    Returns:
+        Settings dict for DATABASES
+    """
+    mode = mode or os.getenv('DB_CONNECTION_MODE') or default_connection_mode()
+    if mode not in CONNECTION_MODES:
+        raise ValueError(f"DB_CONNECTION_MODE must be one of {', '.join(CONNECTION_MODES)}, got {mode!r}")
+
+    config = dj_database_url.parse(url)
+    options = config.setdefault('OPTIONS', {})
+
+    # Only PostgreSQL gets pooling; SQLite stand-ins keep Django's defaults
+    is_postgres = config['ENGINE'] == 'django.db.backends.postgresql'
+
+    if mode == 'persistent':
+        config['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+        # Ping a reused connection before the first query of each request
+        config['CONN_HEALTH_CHECKS'] = True
+
+    elif mode == 'pool':
+        config['CONN_MAX_AGE'] = 0  # Required by Django when pooling
+        # The pool checks every connection before handing it out
+        config['CONN_HEALTH_CHECKS'] = True
+        if is_postgres:
+            options['pool'] = {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+                'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+                'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            }
+
+    elif mode == 'serverless':
+        config['CONN_MAX_AGE'] = 0
+        config['CONN_HEALTH_CHECKS'] = False
+        if is_postgres:
+            # Transaction-mode poolers (Supabase port 6543) cannot keep
+            # named cursors across transactions
+            config['DISABLE_SERVER_SIDE_CURSORS'] = True
+            options['connect_timeout'] = int(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+
+    if is_postgres:
+        options.setdefault('application_name', f'picu-{mode}')
+
+    return config
@@ -0,0 +1,310 @@
+"""
+On-demand image resizing for PICU Creator Dashboard
+Resizes design images in a worker pool and caches the results on local disk
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpg': ('JPEG', 'image/jpeg'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'png': ('PNG', 'image/png'),
+}
+
+
+class DiskLRUCache:
+    """
+    Size-bounded cache of files in one directory
+
+    Recency is the file's mtime, refreshed on every hit, so all processes
+    sharing the directory agree on eviction order. When the running total
+    passes max_bytes, the oldest files are removed down to 90% of it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str):
+        """Return the cached file path, or None"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, data: bytes) -> str:
+        """Store data atomically and evict old entries if over budget"""
+        path = self.path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _entries(self):
+        return [e for e in os.scandir(self.directory) if e.is_file() and not e.name.startswith('.')]
+
+    def _scan_size(self) -> int:
+        return sum(e.stat().st_size for e in self._entries())
+
+    def _evict(self):
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(
+            ((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._entries()),
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._size = total
+        logger.info(f"Image cache evicted down to {total} bytes")
+
+
+_cache = None
+_executor = None
+_inflight = {}
+_inflight_lock = threading.Lock()
+_setup_lock = threading.Lock()
+
+
+def get_cache() -> DiskLRUCache:
+    """Get the image cache (singleton)"""
+    global _cache
+    if _cache is None:
+        with _setup_lock:
+            if _cache is None:
+                _cache = DiskLRUCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
+    return _cache
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the resize worker pool (singleton); Pillow releases the GIL while resizing"""
+    global _executor
+    if _executor is None:
+        with _setup_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_RESIZE_WORKERS,
+                    thread_name_prefix='picu-resize',
+                )
+    return _executor
+
+
+def _single_flight(key: str, compute):
+    """
+    Run compute() once per key no matter how many threads ask for it
+    concurrently; every caller gets the same result or exception
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+
+    if not leader:
+        return future.result()
+
+    try:
+        future.set_result(compute())
+    except BaseException as e:
+        future.set_exception(e)
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+    return future.result()
+
+
+class FileLock:
+    """Exclusive lock across processes sharing the cache directory"""
+
+    def __init__(self, cache: DiskLRUCache, key: str):
+        # 256 striped lock files per namespace instead of one per key. Sources
+        # get their own stripes: a render holds its lock while fetching one.
+        namespace = 'src-' if key.startswith('src-') else ''
+        self.path = os.path.join(cache.directory, f'.lock-{namespace}{key[-2:]}')
+        self.fh = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.fh = open(self.path, 'w')
+            fcntl.flock(self.fh, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.fh is not None:
+            fcntl.flock(self.fh, fcntl.LOCK_UN)
+            self.fh.close()
+
+
+def media_path(image_url: str) -> str:
+    """Filesystem path of a /media/ URL; refuses paths outside MEDIA_ROOT"""
+    media_root = os.path.realpath(settings.MEDIA_ROOT)
+    path = os.path.realpath(os.path.join(media_root, image_url[len('/media/'):]))
+    if not path.startswith(media_root + os.sep):
+        raise ValueError(f"Invalid media path: {image_url}")
+    return path
+
+
+def _read_source(image_url: str) -> bytes:
+    """Read the original design image from local media or over HTTP"""
+    max_size = settings.UPLOAD_MAX_FILE_SIZE
+
+    if image_url.startswith('/media/'):
+        with open(media_path(image_url), 'rb') as fh:
+            data = fh.read(max_size + 1)
+        if len(data) > max_size:
+            raise ValueError(f"Source image larger than {max_size} bytes: {image_url}")
+        return data
+
+    from picu.supabase_storage import get_http_client, get_storage_breaker
+
+    # Reads from our own bucket fail fast while Supabase is down
+    from_storage = bool(settings.SUPABASE_URL) and image_url.startswith(settings.SUPABASE_URL)
+    buffer = io.BytesIO()
+    with get_storage_breaker().guard() if from_storage else nullcontext():
+        with get_http_client().stream('GET', image_url) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                buffer.write(chunk)
+                if buffer.tell() > max_size:
+                    raise ValueError(f"Source image larger than {max_size} bytes: {image_url}")
+    return buffer.getvalue()
+
+
+def source_path(image_url: str) -> str:
+    """Path of the cached original, fetching it once if needed"""
+    cache = get_cache()
+    key = 'src-' + hashlib.sha256(image_url.encode()).hexdigest()
+
+    def fetch():
+        path = cache.get(key)
+        if path:
+            return path
+        with FileLock(cache, key):
+            path = cache.get(key)  # Another process may have fetched it meanwhile
+            if path:
+                return path
+            return cache.put(key, _read_source(image_url))
+
+    return _single_flight(key, fetch)
+
+
+def _resize(path: str, width: int, pil_format: str) -> bytes:
+    """Downscale to width (never upscale) and encode; runs in the worker pool"""
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as img:
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img.draft('RGB', (width, height))  # Lets JPEG decode at a reduced scale
+        img = ImageOps.exif_transpose(img)
+        if img.width > width:
+            img.thumbnail((width, img.height), Image.LANCZOS, reducing_gap=3.0)
+
+        if pil_format == 'JPEG' and img.mode != 'RGB':
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGBA')
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel('A'))
+                img = background
+            else:
+                img = img.convert('RGB')
+
+        output = io.BytesIO()
+        options = {'optimize': True}
+        if pil_format in ('JPEG', 'WEBP'):
+            options['quality'] = settings.IMAGE_RESIZE_QUALITY
+        img.save(output, format=pil_format, **options)
+        return output.getvalue()
+
+
+def _resize_in_pool(path: str, width: int, pil_format: str) -> bytes:
+    future = get_executor().submit(_resize, path, width, pil_format)
+    return future.result(timeout=settings.IMAGE_RESIZE_TIMEOUT)
+
+
+def cache_key(image_url: str, width: int, fmt: str) -> str:
+    """Key of a rendition; also used as its ETag"""
+    pil_format = OUTPUT_FORMATS[fmt][0]
+    return hashlib.sha256(f'{image_url}|{width}|{pil_format}'.encode()).hexdigest()
+
+
+def resized_image(image_url: str, width: int, fmt: str):
+    """
+    Get a resized rendition of a design image
+
+    Args:
+        image_url: Design.image value (Supabase URL or /media/ path)
+        width: Target width in pixels
+        fmt: Output format key from OUTPUT_FORMATS
+
+    Returns:
+        Tuple of (file path, content type, cache key)
+    """
+    pil_format, content_type = OUTPUT_FORMATS[fmt]
+    cache = get_cache()
+    key = cache_key(image_url, width, fmt)
+
+    path = cache.get(key)
+    if path:
+        return path, content_type, key
+
+    def render():
+        path = cache.get(key)
+        if path:
+            return path
+        with FileLock(cache, key):
+            path = cache.get(key)
+            if path:
+                return path
+            try:
+                data = _resize_in_pool(source_path(image_url), width, pil_format)
+            except FileNotFoundError:
+                # The source was evicted between fetch and resize; fetch again
+                data = _resize_in_pool(source_path(image_url), width, pil_format)
+            logger.info(f"Resized {image_url} to {width}px {pil_format} ({len(data)} bytes)")
+            return cache.put(key, data)
+
+    return _single_flight(key, render), content_type, key
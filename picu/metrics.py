@@ -0,0 +1,370 @@
+"""
+Prometheus metrics for PICU Creator Dashboard
+Exposes request, database and storage metrics in text exposition format
+
+Every thread records into its own shard, so the request path never takes a
+lock. Shards are merged when /metrics is scraped; those of finished threads
+are folded into one retired shard, so the list only holds live threads. When
+PROMETHEUS_MULTIPROC_DIR is set, each process periodically dumps its merged
+shards to a file in that directory and the scrape merges all of them.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+_local = threading.local()
+_shards = []  # (thread, shard) per live thread; only the owning thread writes to its shard
+_retired = {}  # merged shards of threads that have exited
+_shards_lock = threading.Lock()  # taken once per thread, never per request
+_registry = {}
+_next_flush = 0.0
+
+
+def _shard() -> dict:
+    """Return the calling thread's private shard"""
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = {}
+        with _shards_lock:
+            _prune()
+            _shards.append((threading.current_thread(), shard))
+        _local.shard = shard
+        return shard
+
+
+def _prune():
+    """Fold shards of exited threads into _retired; caller holds _shards_lock"""
+    live = []
+    for thread, shard in _shards:
+        if thread.is_alive():
+            live.append((thread, shard))
+        else:
+            for key, value in shard.items():
+                _merge_into(_retired, key, value)
+    _shards[:] = live
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry[name] = self
+
+    def _key(self, labels: dict) -> tuple:
+        return (self.name, tuple(str(labels.get(n, '')) for n in self.labelnames))
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        shard = _shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bounds"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        shard = _shard()
+        key = self._key(labels)
+        # [per-bucket counts..., +Inf count, sum, count]
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [0] * (len(self.buckets) + 3)
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+
+class Gauge(_Metric):
+    """Gauge whose value is computed by a callback at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+
+# Request metrics
+REQUEST_LATENCY = Histogram(
+    'picu_request_duration_seconds',
+    'Request latency by URL name',
+    ('view', 'method'),
+)
+REQUESTS_TOTAL = Counter(
+    'picu_requests_total',
+    'Requests by URL name and status code',
+    ('view', 'method', 'status'),
+)
+DB_QUERIES = Histogram(
+    'picu_db_queries_per_request',
+    'Database queries executed per request',
+    ('view',),
+    buckets=QUERY_BUCKETS,
+)
+
+# Storage metrics
+STORAGE_LATENCY = Histogram(
+    'picu_storage_duration_seconds',
+    'Supabase Storage call latency',
+    ('operation',),
+)
+STORAGE_FAILURES = Counter(
+    'picu_storage_failures_total',
+    'Failed Supabase Storage calls',
+    ('operation',),
+)
+DESIGN_UPLOADS = Counter(
+    'picu_design_uploads_total',
+    'Calls to upload_design_image',
+)
+BREAKER_TRANSITIONS = Counter(
+    'picu_circuit_breaker_transitions_total',
+    'Circuit breaker state changes by the state entered',
+    ('breaker', 'state'),
+)
+BREAKER_REJECTED = Counter(
+    'picu_circuit_breaker_rejected_total',
+    'Calls failed fast because the circuit breaker was open',
+    ('breaker',),
+)
+LOCAL_FALLBACKS = Counter(
+    'picu_storage_local_fallback_total',
+    'Uploads saved to local media instead of Supabase',
+    ('reason',),
+)
+
+# Admission control
+RATE_LIMITED = Counter(
+    'picu_rate_limited_total',
+    'Requests rejected with 429 by the token-bucket limiter',
+    ('scope', 'bucket'),
+)
+
+# Sales
+ORDER_EVENTS = Counter(
+    'picu_order_events_total',
+    'Storefront order events by ingestion result',
+    ('result',),
+)
+
+
+def _pending_reviews():
+    from designs.models import Design
+    return Design.objects.filter(status='pending').count()
+
+
+PENDING_REVIEWS = Gauge(
+    'picu_designs_pending_review',
+    'Designs waiting for admin review',
+    _pending_reviews,
+)
+
+
+def _merge_into(target: dict, key: tuple, value):
+    current = target.get(key)
+    if current is None:
+        target[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(current, list):
+        for i, v in enumerate(value):
+            current[i] += v
+    else:
+        target[key] = current + value
+
+
+def snapshot() -> dict:
+    """Merge all thread shards of this process"""
+    with _shards_lock:
+        _prune()
+        shards = [shard for _, shard in _shards]
+        merged = {}
+        for key, value in _retired.items():
+            _merge_into(merged, key, value)
+    for shard in shards:
+        # dict.copy() runs under the GIL, so it is safe against the owner thread
+        for key, value in shard.copy().items():
+            _merge_into(merged, key, value)
+    return merged
+
+
+def _multiproc_dir() -> str:
+    return getattr(settings, 'METRICS_MULTIPROC_DIR', '')
+
+
+def flush():
+    """Write this process's snapshot to the multiprocess directory"""
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    data = [[name, list(labels), value] for (name, labels), value in snapshot().items()]
+    path = os.path.join(directory, f'picu_{os.getpid()}.json')
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'w') as fh:
+            json.dump(data, fh)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Metrics flush failed: {e}")
+
+
+def maybe_flush():
+    """Flush at most once per METRICS_FLUSH_INTERVAL seconds"""
+    global _next_flush
+    if not _multiproc_dir():
+        return
+    now = time.monotonic()
+    if now < _next_flush:
+        return
+    _next_flush = now + getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+    flush()
+
+
+atexit.register(flush)
+
+
+def collect() -> dict:
+    """Merged samples of every process"""
+    directory = _multiproc_dir()
+    if not directory:
+        return snapshot()
+
+    flush()
+    merged = {}
+    for filename in os.listdir(directory):
+        if not (filename.startswith('picu_') and filename.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping metrics file {filename}: {e}")
+            continue
+        for name, labels, value in data:
+            _merge_into(merged, (name, tuple(labels)), value)
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render() -> str:
+    """Render all metrics in Prometheus text exposition format"""
+    samples = collect()
+    by_metric = {}
+    for (name, labels), value in samples.items():
+        by_metric.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for metric in _registry.values():
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+
+        if isinstance(metric, Gauge):
+            try:
+                lines.append(f'{metric.name} {_number(metric.callback())}')
+            except Exception as e:
+                logger.warning(f"Gauge {metric.name} failed: {e}")
+            continue
+
+        for labels, value in sorted(by_metric.get(metric.name, [])):
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets, value):
+                    cumulative += count
+                    le = _labels(metric.labelnames, labels, f'le="{_number(float(bound))}"')
+                    lines.append(f'{metric.name}_bucket{le} {cumulative}')
+                cumulative += value[len(metric.buckets)]
+                le = _labels(metric.labelnames, labels, 'le="+Inf"')
+                lines.append(f'{metric.name}_bucket{le} {cumulative}')
+                label_str = _labels(metric.labelnames, labels)
+                lines.append(f'{metric.name}_sum{label_str} {_number(float(value[-2]))}')
+                lines.append(f'{metric.name}_count{label_str} {value[-1]}')
+            else:
+                lines.append(f'{metric.name}{_labels(metric.labelnames, labels)} {_number(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Record latency, status and query count for every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from django.db import connections
+
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(count_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+
+        REQUEST_LATENCY.observe(duration, view=view, method=request.method)
+        REQUESTS_TOTAL.inc(view=view, method=request.method, status=response.status_code)
+        DB_QUERIES.observe(queries[0], view=view)
+        maybe_flush()
+
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs METRICS_TOKEN, and is open without one only with DEBUG"""
+    from picu.api import bearer_authorized
+
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not bearer_authorized(request, token) and (token or not settings.DEBUG):
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,162 @@
+"""
+Token-bucket rate limiting for PICU Creator Dashboard
+
+Each scope (upload, delete, moderate) has one bucket per user, sized by
+the user's role, and one per client IP. Buckets are kept in the default
+cache as a single timestamp each (GCRA: the time the bucket will be full
+again), so a check is one round trip. On Redis that round trip is a Lua
+script and atomic across all workers; other backends update under a
+process lock, which is exact for the per-process LocMemCache.
+"""
+import functools
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.http import HttpResponse
+
+from picu.metrics import RATE_LIMITED
+
+# KEYS buckets; ARGV interval and period of each bucket in turn. Returns {bucket
+# number, seconds until allowed} for the first bucket that rejects, {0, 0} when
+# all allow; tokens are only taken when all allow.
+# Uses the Redis clock so app servers with skewed clocks share one timeline.
+GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local new_tats = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[2 * i - 1])
+    local period = tonumber(ARGV[2 * i])
+    local tat = math.max(tonumber(redis.call('GET', key) or 0), now)
+    local new_tat = tat + interval
+    if new_tat - period > now then
+        return {i, tostring(new_tat - period - now)}
+    end
+    new_tats[i] = new_tat
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, tostring(new_tats[i]), 'PX', math.ceil((new_tats[i] - now) * 1000))
+end
+return {0, '0'}
+"""
+
+_lock = threading.Lock()
+
+
+def client_ip(request) -> str:
+    """
+    Client address, trusting RATE_LIMIT_PROXY_HOPS reverse proxies
+
+    Each trusted proxy appends the address it received the request from to
+    X-Forwarded-For, so the client is that many entries from the right.
+    """
+    hops = settings.RATE_LIMIT_PROXY_HOPS
+    if hops:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _redis_client(key):
+    """The raw redis-py client behind Django's RedisCache, or None for other backends"""
+    backend = caches['default']
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend._cache.get_client(key, write=True)
+
+
+def hit(key: str, limit: int, period: int) -> float:
+    """
+    Take one token from a bucket of `limit` tokens that refills over `period` seconds
+
+    Returns:
+        0 if the request is allowed, otherwise seconds until a token is available
+    """
+    return hit_all([(key, limit, period)])[1]
+
+
+def hit_all(buckets):
+    """
+    Take one token from each of several (key, limit, period) buckets, or from none
+
+    A request one bucket rejects is not charged to the others.
+
+    Returns:
+        Tuple of (index of the bucket that rejected or None, seconds until it allows)
+    """
+    cache_keys = [cache.make_and_validate_key(f'ratelimit:{key}') for key, _, _ in buckets]
+    client = _redis_client(cache_keys[0]) if buckets else None
+    if client is not None:
+        args = [value for _, limit, period in buckets for value in (period / limit, period)]
+        number, retry_after = client.eval(GCRA_SCRIPT, len(cache_keys), *cache_keys, *args)
+        return (int(number) - 1 if int(number) else None), float(retry_after)
+
+    with _lock:
+        now = time.time()
+        new_tats = []
+        for i, (key, limit, period) in enumerate(buckets):
+            new_tat = max(cache.get(f'ratelimit:{key}') or 0, now) + period / limit
+            if new_tat - period > now:
+                return i, new_tat - period - now
+            new_tats.append(new_tat)
+        for (key, _, _), new_tat in zip(buckets, new_tats):
+            cache.set(f'ratelimit:{key}', new_tat, math.ceil(new_tat - now))
+    return None, 0.0
+
+
+def check(request, scope: str) -> float:
+    """
+    Charge a request to the user's and the client IP's bucket for a scope;
+    neither is charged when either is empty
+
+    Returns:
+        0 if allowed, otherwise seconds until the request would be allowed
+    """
+    limits = settings.RATE_LIMITS.get(scope, {})
+    buckets = []
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        role_limit = limits.get(user.role)
+        if role_limit:
+            buckets.append((f'{scope}:user:{user.pk}', role_limit, user.role))
+    if limits.get('ip'):
+        buckets.append((f'{scope}:ip:{client_ip(request)}', limits['ip'], 'ip'))
+
+    rejected, retry_after = hit_all([(key, limit, period) for key, (limit, period), _ in buckets])
+    if rejected is not None:
+        RATE_LIMITED.inc(scope=scope, bucket=buckets[rejected][2])
+    return retry_after
+
+
+def too_many_requests(retry_after: float) -> HttpResponse:
+    """429 response telling the client when to come back"""
+    response = HttpResponse(
+        'Terlalu banyak permintaan. Silakan coba lagi nanti.',
+        status=429, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def rate_limit(scope: str, methods=('POST',)):
+    """
+    Decorator: answer 429 with Retry-After when a scope's bucket is empty
+
+    Only requests with one of `methods` are charged, so viewing a form is free.
+    Place it below @login_required so the user's role is known.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED and request.method in methods:
+                retry_after = check(request, scope)
+                if retry_after:
+                    return too_many_requests(retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
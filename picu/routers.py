@@ -0,0 +1,100 @@
+"""
+Read-replica routing for PICU Creator Dashboard
+
+ReplicaRoutingMiddleware marks GET requests to read-heavy views listed in
+DATABASE_REPLICA_VIEWS; ReplicaRouter then sends their reads to one of
+DATABASE_REPLICAS. Every write goes to the primary. After a write the
+browser is pinned to the primary for DATABASE_REPLICA_PIN_SECONDS, so a
+creator sees their own fresh upload despite replication lag.
+"""
+import random
+from contextvars import ContextVar
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'picu_db_primary'
+
+# Session data must never be read stale
+PRIMARY_ONLY_APPS = {'sessions'}
+
+# Per-request routing state: {'replica': alias or None, 'wrote': bool}
+_request_state = ContextVar('picu_replica_state', default=None)
+
+
+def _replicas() -> list:
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaRouter:
+    """Send reads of marked requests to a replica and everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if not state or not state['replica'] or state['wrote']:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        return state['replica']
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        allowed = {DEFAULT_DB_ALIAS, *_replicas()}
+        if obj1._state.db in allowed and obj2._state.db in allowed:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        if db in _replicas():
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Decide per request whether reads may use a replica"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'replica': None, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state['wrote'] and _replicas():
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 15),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _request_state.get()
+        if state is None or not _replicas():
+            return None
+        if request.method not in ('GET', 'HEAD') or PIN_COOKIE in request.COOKIES:
+            return None
+
+        view_name = request.resolver_match.view_name if request.resolver_match else ''
+        patterns = getattr(settings, 'DATABASE_REPLICA_VIEWS', [])
+        if any(fnmatchcase(view_name, pattern) for pattern in patterns):
+            user = getattr(request, 'user', None)
+            if user is not None:
+                user.is_authenticated  # Resolve the lazy session user on the primary first
+            # One replica per request keeps its reads mutually consistent
+            state['replica'] = random.choice(_replicas())
+        return None
@@ -4,16 +4,18 @@ PICU Creator Dashboard - Settings Configuration
 """
 
 import os
+import tempfile
+from decimal import Decimal
 from pathlib import Path
 from dotenv import load_dotenv
-import dj_database_url
-
-# Load environment variables from .env file
-load_dotenv()
+from picu.db import database_config, default_connection_mode
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Load environment variables from .env file (the only place it is read)
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -62,9 +64,11 @@ INSTALLED_APPS = [
     'accounts',
     'designs',
     'dashboard',
+    'payouts',
 ]
 
 MIDDLEWARE = [
+    'picu.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -72,6 +76,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'picu.routers.ReplicaRoutingMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
@@ -89,6 +94,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'designs.context_processors.live_updates',
             ],
         },
     },
@@ -102,9 +108,13 @@ WSGI_APPLICATION = 'picu.wsgi.application'
 
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+# Connection strategy: persistent, pool or serverless (see picu/db.py).
+# Defaults to serverless on Vercel and persistent elsewhere.
+DB_CONNECTION_MODE = os.getenv('DB_CONNECTION_MODE') or default_connection_mode()
+
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.config(default=DATABASE_URL, conn_max_age=600)
+        'default': database_config(DATABASE_URL, DB_CONNECTION_MODE)
     }
 else:
     # Fallback to SQLite for local development without Supabase
@@ -115,6 +125,51 @@ else:
         }
     }
 
+# Read replicas (comma-separated URLs). Reads of DATABASE_REPLICA_VIEWS go to
+# a replica; writes stay on the primary and pin the browser to it for
+# DATABASE_REPLICA_PIN_SECONDS (see picu/routers.py)
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if u.strip()]
+for index, url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f'replica_{index}'] = {
+        **database_config(url, DB_CONNECTION_MODE),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['picu.routers.ReplicaRouter']
+DATABASE_REPLICA_VIEWS = [
+    'dashboard:admin_dashboard',
+    'designs:list',
+    'catalog_designs',
+    'admin:*_changelist',
+]
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv('DATABASE_REPLICA_PIN_SECONDS', '15'))
+
+
+# Cache
+# Sessions and authenticated users are cached only when a cache shared by
+# all workers is configured; a per-process cache would serve stale logins
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTH_USER_CACHE_TIMEOUT = 300
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            # The default of 300 entries would cull per-SKU lookups long before they repeat
+            'OPTIONS': {'MAX_ENTRIES': 20_000},
+        }
+    }
+    AUTH_USER_CACHE_TIMEOUT = 0  # Disabled
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -156,6 +211,114 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads
+# Files above FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk while streaming;
+# SizeLimitUploadHandler discards anything past UPLOAD_MAX_FILE_SIZE
+FILE_UPLOAD_HANDLERS = [
+    'picu.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024  # 1MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024  # 1MB of non-file form data
+FILE_UPLOAD_TEMP_DIR = os.getenv('FILE_UPLOAD_TEMP_DIR') or None
+UPLOAD_MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
+UPLOAD_MAX_IMAGE_PIXELS = 64_000_000  # e.g. 8000x8000
+
+# Resized design images (/img/<design_id>/<width>.<fmt>)
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'picu-image-cache')
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_MB', '512')) * 1024 * 1024
+IMAGE_RESIZE_WORKERS = int(os.getenv('IMAGE_RESIZE_WORKERS', str(os.cpu_count() or 2)))
+IMAGE_RESIZE_WIDTHS = (200, 400, 800, 1200, 1600, 2048)  # Only these are rendered; include CATALOG_IMAGE_WIDTH
+IMAGE_RESIZE_QUALITY = 82
+IMAGE_RESIZE_TIMEOUT = 30  # seconds
+# Browsers and the edge revalidate approved images against their ETag after this,
+# so rejecting, deleting or archiving a design takes it offline within minutes
+IMAGE_PUBLIC_MAX_AGE = 300  # seconds
+
+# Product mockups, composited in a process pool and stored in the image cache
+MOCKUP_SIZE = 1000
+MOCKUP_QUALITY = 85
+MOCKUP_WORKERS = int(os.getenv('MOCKUP_WORKERS', '2'))
+MOCKUP_TIMEOUT = 60  # seconds
+MOCKUP_RETRY_SECONDS = 60  # A failed mockup is retried after this, doubling per failure
+MOCKUP_RETRY_MAX_SECONDS = 3600
+
+# Print-ready files per SKU: print area and resolution by product category
+PRINT_FILE_SPECS = {
+    'apparel': {'width_mm': 300, 'height_mm': 400, 'dpi': 300},      # DTF front print
+    'merchandise': {'width_mm': 200, 'height_mm': 90, 'dpi': 300},   # Mug wrap
+}
+PRINT_FILE_WORKERS = int(os.getenv('PRINT_FILE_WORKERS', str(os.cpu_count() or 2)))
+
+# Image metadata backfill (manage.py backfill_image_metadata): bytes read per image for its header
+IMAGE_METADATA_HEAD_BYTES = 64 * 1024
+
+# Admin dashboard history chart, read from the daily rollups (manage.py rollup_stats)
+STATS_CHART_DAYS = 90
+
+# Admin changelists on PostgreSQL show the planner's row estimate above this
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10_000
+
+# Creator payouts (manage.py build_payouts): smaller balances carry over to the next period
+PAYOUT_MINIMUM = Decimal(os.getenv('PAYOUT_MINIMUM', '50000'))  # IDR
+
+# Storefront integrations: bearer token for /api/orders/events and /api/skus; both are closed while it is empty
+STOREFRONT_API_TOKEN = os.getenv('STOREFRONT_API_TOKEN', '')
+ORDER_INGEST_TOKEN = os.getenv('ORDER_INGEST_TOKEN', '')  # Deprecated name, used while STOREFRONT_API_TOKEN is unset
+
+# Storefront order events (POST /api/orders/events, manage.py ingest_orders)
+ORDER_INGEST_MAX_EVENTS = int(os.getenv('ORDER_INGEST_MAX_EVENTS', '5000'))  # Also bounded by DATA_UPLOAD_MAX_MEMORY_SIZE
+
+# SKU lookups (POST /api/skus); resolved SKUs are cached per SKU and dropped when
+# their design, product or design product changes
+SKU_LOOKUP_MAX = int(os.getenv('SKU_LOOKUP_MAX', '10000'))
+SKU_CACHE_TIMEOUT = int(os.getenv('SKU_CACHE_TIMEOUT', '3600' if REDIS_URL else '0'))  # 0 disables
+CATALOG_IMAGE_WIDTH = 800  # Width of the image variant linked for approved designs
+
+# Public catalog API (GET /api/v1/catalog/designs)
+CATALOG_PAGE_SIZE = 50
+CATALOG_MAX_PAGE_SIZE = 200
+CATALOG_CACHE_SECONDS = 60
+
+# Design retention (manage.py archive_designs): days since the last edit, per status,
+# before a design moves to the archive; statuses not listed are kept forever
+DESIGN_RETENTION_DAYS = {
+    'rejected': int(os.getenv('RETENTION_REJECTED_DAYS', '90')),
+}
+ARCHIVE_STORAGE_PREFIX = os.getenv('ARCHIVE_STORAGE_PREFIX', 'archive')  # Images of archived designs move under this path
+ARCHIVE_IMAGE_MAX_ATTEMPTS = 5  # Runs that may fail to move an archived image before it is left in place
+
+# Storage per creator (design images and print files), checked before an upload is sent;
+# StorageUsage.quota_bytes overrides it per creator, 0 means unlimited (manage.py reconcile_storage)
+STORAGE_QUOTA_BYTES = int(os.getenv('STORAGE_QUOTA_MB', '1024')) * 1024 * 1024
+
+# Cold start: django.setup() plus URLconf loading in a fresh process (manage.py profile_startup)
+STARTUP_BUDGET_SECONDS = 1.0
+
+# Live status updates: server-sent events at /designs/events/ when served over ASGI
+# or LIVE_SSE_ENABLED is set (a server with spare threads, e.g. gunicorn --threads);
+# otherwise pages poll /designs/events/poll/, since a stream holds a sync worker
+LIVE_SSE_ENABLED = os.getenv('LIVE_SSE_ENABLED', 'False').lower() == 'true'
+LIVE_FALLBACK_POLL_SECONDS = 20
+LIVE_DATABASE_URL = os.getenv('LIVE_DATABASE_URL', '')  # Session-mode URL for LISTEN behind a pooler
+LIVE_POLL_INTERVAL = 2  # seconds, when the database has no LISTEN/NOTIFY
+LIVE_RETRY_MS = 3000
+LIVE_STREAM_MAX_SECONDS = 300  # WSGI: each stream holds a worker thread
+LIVE_STREAM_MAX_SECONDS_ASGI = 3600
+
+# Token-bucket rate limits per scope: (requests, per seconds) by role, plus one bucket per client IP.
+# A full bucket allows a burst of all its requests; it refills evenly over the period.
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', '1' if os.getenv('VERCEL') else '0'))
+RATE_LIMITS = {
+    'upload': {'creator': (30, 3600), 'admin': (300, 3600), 'ip': (120, 3600)},
+    'delete': {'creator': (60, 3600), 'admin': (600, 3600), 'ip': (240, 3600)},
+    'moderate': {'admin': (600, 3600), 'ip': (1200, 3600)},
+    'catalog': {'ip': (3600, 3600)},
+    'image': {'ip': (1200, 3600)},  # /img/ renders; cached renditions are not charged
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -170,8 +333,8 @@ AUTH_USER_MODEL = 'accounts.User'
 # Django Allauth Configuration
 SITE_ID = 1
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',
-    'allauth.account.auth_backends.AuthenticationBackend',
+    'accounts.backends.CachedModelBackend',
+    'accounts.backends.CachedAuthenticationBackend',
 ]
 
 # AllAuth settings (new API - django-allauth 65.0+)
@@ -191,6 +354,24 @@ LOGOUT_REDIRECT_URL = '/'
 SUPABASE_URL = os.getenv('SUPABASE_URL', '')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY', '')
 SUPABASE_BUCKET = 'designs'
+SUPABASE_TIMEOUT = float(os.getenv('SUPABASE_TIMEOUT', '30'))  # seconds per read/write
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+
+# Circuit breaker around storage calls: open when this share of calls in the window
+# failed or took longer than the slow-call threshold, then retry after the cool-down
+STORAGE_BREAKER_FAILURE_RATE = float(os.getenv('STORAGE_BREAKER_FAILURE_RATE', '0.5'))
+STORAGE_BREAKER_SLOW_CALL_SECONDS = float(os.getenv('STORAGE_BREAKER_SLOW_CALL_SECONDS', '5'))
+STORAGE_BREAKER_WINDOW_SECONDS = 30
+STORAGE_BREAKER_MIN_CALLS = 5
+STORAGE_BREAKER_OPEN_SECONDS = int(os.getenv('STORAGE_BREAKER_OPEN_SECONDS', '30'))
+
+
+# Prometheus metrics (/metrics)
+# Set PROMETHEUS_MULTIPROC_DIR to a directory shared by all gunicorn workers
+# (and emptied on deploy) to aggregate metrics across processes
+METRICS_MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR', '')
+METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # Bearer token for /metrics; closed while empty unless DEBUG
 
 # Custom signup form
 ACCOUNT_FORMS = {
@@ -2,27 +2,41 @@
 Supabase Storage utility for PICU Creator Dashboard
 Handles file uploads to Supabase Storage
 """
+import importlib.util
 import os
+import time
 import uuid
+import hashlib
 import logging
 from django.conf import settings
+from django.core.files import File
+
+from picu.circuit_breaker import CircuitBreaker, CircuitOpenError
+from picu.metrics import (
+    DESIGN_UPLOADS,
+    LOCAL_FALLBACKS,
+    STORAGE_FAILURES,
+    STORAGE_LATENCY,
+)
 
 logger = logging.getLogger(__name__)
 
-# Check if supabase is available
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
-    Client = None
+# The supabase SDK pulls in auth, realtime, postgrest and functions clients;
+# only deletes need it, so it is imported on first use, not at startup
+SUPABASE_AVAILABLE = importlib.util.find_spec('supabase') is not None
+if not SUPABASE_AVAILABLE:
     logger.warning("Supabase package not installed. Using local storage.")
 
 
 _supabase_client = None
+_http_client = None
+_storage_breaker = None
+
+# Read size for streaming uploads; peak memory per upload stays near this
+UPLOAD_CHUNK_SIZE = 256 * 1024
 
 
-def get_supabase_client() -> Client:
+def get_supabase_client():
     """Get Supabase client instance (singleton)"""
     global _supabase_client
     
@@ -32,6 +46,8 @@ def get_supabase_client() -> Client:
     if _supabase_client is not None:
         return _supabase_client
     
+    from supabase import create_client
+    
     url = settings.SUPABASE_URL
     key = settings.SUPABASE_KEY
     
@@ -42,6 +58,98 @@ def get_supabase_client() -> Client:
     return _supabase_client
 
 
+def get_http_client():
+    """Get the httpx client used for streaming uploads (singleton)"""
+    global _http_client
+    
+    if _http_client is None:
+        import httpx
+        timeout = getattr(settings, 'SUPABASE_TIMEOUT', 30)
+        connect_timeout = getattr(settings, 'SUPABASE_CONNECT_TIMEOUT', timeout)
+        _http_client = httpx.Client(timeout=httpx.Timeout(timeout, connect=connect_timeout))
+    return _http_client
+
+
+def _is_storage_failure(error) -> bool:
+    """Client errors mean Supabase answered; only timeouts, 408/429 and 5xx count against it"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return not (status and 400 <= status < 500 and status not in (408, 429))
+
+
+def get_storage_breaker() -> CircuitBreaker:
+    """Get the circuit breaker guarding Supabase Storage calls (singleton)"""
+    global _storage_breaker
+    
+    if _storage_breaker is None:
+        _storage_breaker = CircuitBreaker(
+            'supabase_storage',
+            failure_rate=settings.STORAGE_BREAKER_FAILURE_RATE,
+            slow_call_seconds=settings.STORAGE_BREAKER_SLOW_CALL_SECONDS,
+            window_seconds=settings.STORAGE_BREAKER_WINDOW_SECONDS,
+            min_calls=settings.STORAGE_BREAKER_MIN_CALLS,
+            open_seconds=settings.STORAGE_BREAKER_OPEN_SECONDS,
+            is_failure=_is_storage_failure,
+        )
+    return _storage_breaker
+
+
+class HashingFile(File):
+    """
+    Wraps an uploaded file so that reading its chunks also computes the
+    SHA-256 digest and byte count, with no extra pass over the data
+    """
+    
+    def __init__(self, file):
+        super().__init__(file, getattr(file, 'name', None))
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
+    
+    def chunks(self, chunk_size=None):
+        # Each pass starts over (e.g. the local fallback after a failed upload)
+        self.sha256 = hashlib.sha256()
+        self.bytes_read = 0
+        for chunk in self.file.chunks(chunk_size or UPLOAD_CHUNK_SIZE):
+            self.sha256.update(chunk)
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+def stream_to_supabase(file: HashingFile, file_path: str, content_type: str) -> str:
+    """
+    Stream a file into Supabase Storage as the raw request body
+    
+    Args:
+        file: HashingFile wrapping the upload
+        file_path: Object path within the bucket
+        content_type: MIME type of the file
+    
+    Returns:
+        Public URL of the uploaded file
+    
+    Raises:
+        CircuitOpenError: Supabase is failing; no request was made
+    """
+    base_url = settings.SUPABASE_URL.rstrip('/')
+    key = settings.SUPABASE_KEY
+    bucket = getattr(settings, 'SUPABASE_BUCKET', 'designs')
+    
+    with get_storage_breaker().guard():
+        response = get_http_client().post(
+            f"{base_url}/storage/v1/object/{bucket}/{file_path}",
+            content=file.chunks(),
+            headers={
+                'Authorization': f'Bearer {key}',
+                'apikey': key,
+                'Content-Type': content_type,
+                'Content-Length': str(file.size),
+                'x-upsert': 'true',  # Overwrite if exists
+            },
+        )
+        response.raise_for_status()
+    
+    return f"{base_url}/storage/v1/object/public/{bucket}/{file_path}"
+
+
 def upload_design_image(file, creator_id: str) -> str:
     """
     Upload an image file to Supabase Storage
@@ -51,7 +159,8 @@ def upload_design_image(file, creator_id: str) -> str:
         creator_id: UUID of the creator for organizing files
     
     Returns:
-        Public URL of the uploaded file
+        Public URL of the uploaded file. The file's SHA-256 hex digest is
+        set as ``file.sha256``.
     """
     # Generate unique filename
     file_ext = os.path.splitext(file.name)[1].lower()
@@ -59,57 +168,58 @@ def upload_design_image(file, creator_id: str) -> str:
         file_ext = '.png'  # Default extension
     unique_name = f"{uuid.uuid4()}{file_ext}"
     file_path = f"{creator_id}/{unique_name}"
+    DESIGN_UPLOADS.inc()
     
     # Check if Supabase is configured
     supabase_url = getattr(settings, 'SUPABASE_URL', '')
     supabase_key = getattr(settings, 'SUPABASE_KEY', '')
     
-    if not supabase_url or not supabase_key or not SUPABASE_AVAILABLE:
+    # Hash and measure while the data streams to its destination
+    hashing_file = HashingFile(file)
+    
+    if not supabase_url or not supabase_key:
         logger.info("Supabase not configured, using local storage")
-        return save_file_locally(file, f"designs/{file_path}")
+        LOCAL_FALLBACKS.inc(reason='not_configured')
+        url = save_file_locally(hashing_file, f"designs/{file_path}")
+        file.sha256 = hashing_file.sha256.hexdigest()
+        return url
     
+    start = time.perf_counter()
     try:
-        supabase = get_supabase_client()
-        bucket = getattr(settings, 'SUPABASE_BUCKET', 'designs')
-        
-        # Read file content as bytes
-        file.seek(0)  # Ensure we're at the beginning
-        file_content = file.read()
-        
         # Determine content type
         content_type = getattr(file, 'content_type', 'image/png')
         if not content_type:
             content_type = 'image/png'
         
-        logger.info(f"Uploading to Supabase: bucket={bucket}, path={file_path}, size={len(file_content)} bytes")
-        
-        # Upload to Supabase Storage
-        response = supabase.storage.from_(bucket).upload(
-            path=file_path,
-            file=file_content,
-            file_options={
-                "content-type": content_type,
-                "upsert": "true"  # Overwrite if exists
-            }
-        )
+        logger.info(f"Uploading to Supabase: path={file_path}, size={file.size} bytes")
         
-        logger.info(f"Upload response: {response}")
+        public_url = stream_to_supabase(hashing_file, file_path, content_type)
+        file.sha256 = hashing_file.sha256.hexdigest()
         
-        # Get public URL
-        public_url = supabase.storage.from_(bucket).get_public_url(file_path)
-        
-        logger.info(f"Public URL: {public_url}")
+        logger.info(f"Public URL: {public_url} (sha256={file.sha256}, {hashing_file.bytes_read} bytes)")
+        STORAGE_LATENCY.observe(time.perf_counter() - start, operation='upload')
         
         return public_url
         
+    except CircuitOpenError:
+        # Supabase is known to be failing; skip the network attempt and the traceback
+        LOCAL_FALLBACKS.inc(reason='circuit_open')
+        url = save_file_locally(hashing_file, f"designs/{file_path}")
+        file.sha256 = hashing_file.sha256.hexdigest()
+        return url
+        
     except Exception as e:
+        STORAGE_LATENCY.observe(time.perf_counter() - start, operation='upload')
+        STORAGE_FAILURES.inc(operation='upload')
         logger.error(f"Supabase upload error: {type(e).__name__}: {e}")
         import traceback
         logger.error(traceback.format_exc())
         
         # Fallback to local storage on error
-        file.seek(0)  # Reset file pointer
-        return save_file_locally(file, f"designs/{file_path}")
+        LOCAL_FALLBACKS.inc(reason='error')
+        url = save_file_locally(hashing_file, f"designs/{file_path}")
+        file.sha256 = hashing_file.sha256.hexdigest()
+        return url
 
 
 def save_file_locally(file, file_path: str) -> str:
@@ -130,6 +240,106 @@ def save_file_locally(file, file_path: str) -> str:
     return f"/media/{saved_path}"
 
 
+def move_design_image(file_url: str, destination: str) -> str:
+    """
+    Move a design image to another path in the same storage
+    
+    Local /media/ files are renamed on disk; Supabase objects are moved
+    server-side, so no bytes pass through the app.
+    
+    Args:
+        file_url: Current URL of the image
+        destination: New path within the bucket (or under MEDIA_ROOT)
+    
+    Returns:
+        URL of the image at its new path
+    
+    Raises:
+        CircuitOpenError: Supabase is failing; nothing was moved
+        ValueError: The URL is neither local media nor in our bucket
+    """
+    from picu.images import media_path
+    
+    if file_url.startswith('/media/'):
+        target = f'/media/{destination}'
+        os.makedirs(os.path.dirname(media_path(target)), exist_ok=True)
+        os.replace(media_path(file_url), media_path(target))
+        return target
+    
+    base_url = settings.SUPABASE_URL.rstrip('/')
+    key = settings.SUPABASE_KEY
+    bucket = getattr(settings, 'SUPABASE_BUCKET', 'designs')
+    public_prefix = f"{base_url}/storage/v1/object/public/{bucket}/"
+    if not base_url or not file_url.startswith(public_prefix):
+        raise ValueError(f"Not a design image in our storage: {file_url}")
+    
+    start = time.perf_counter()
+    try:
+        with get_storage_breaker().guard():
+            response = get_http_client().post(
+                f"{base_url}/storage/v1/object/move",
+                json={
+                    'bucketId': bucket,
+                    'sourceKey': file_url[len(public_prefix):].split('?')[0],
+                    'destinationKey': destination,
+                },
+                headers={'Authorization': f'Bearer {key}', 'apikey': key},
+            )
+            response.raise_for_status()
+    except CircuitOpenError:
+        raise
+    except Exception:
+        STORAGE_FAILURES.inc(operation='move')
+        raise
+    finally:
+        STORAGE_LATENCY.observe(time.perf_counter() - start, operation='move')
+    
+    return f"{public_prefix}{destination}"
+
+
+def list_objects(prefix: str = '', limit: int = 1000, offset: int = 0) -> list:
+    """
+    One page of a folder listing in the bucket
+    
+    Args:
+        prefix: Folder path within the bucket ('' for the root)
+        limit: Entries per page
+        offset: Entries to skip
+    
+    Returns:
+        List of dicts with 'name' and 'size'; size is None for sub-folders
+    
+    Raises:
+        CircuitOpenError: Supabase is failing; no request was made
+    """
+    base_url = settings.SUPABASE_URL.rstrip('/')
+    key = settings.SUPABASE_KEY
+    bucket = getattr(settings, 'SUPABASE_BUCKET', 'designs')
+    
+    start = time.perf_counter()
+    try:
+        with get_storage_breaker().guard():
+            response = get_http_client().post(
+                f"{base_url}/storage/v1/object/list/{bucket}",
+                json={'prefix': prefix, 'limit': limit, 'offset': offset, 'sortBy': {'column': 'name', 'order': 'asc'}},
+                headers={'Authorization': f'Bearer {key}', 'apikey': key},
+            )
+            response.raise_for_status()
+    except CircuitOpenError:
+        raise
+    except Exception:
+        STORAGE_FAILURES.inc(operation='list')
+        raise
+    finally:
+        STORAGE_LATENCY.observe(time.perf_counter() - start, operation='list')
+    
+    # Folders come back without an id or metadata
+    return [
+        {'name': entry['name'], 'size': (entry.get('metadata') or {}).get('size') if entry.get('id') else None}
+        for entry in response.json()
+    ]
+
+
 def delete_design_image(file_url: str) -> bool:
     """
     Delete an image from Supabase Storage
@@ -139,6 +349,9 @@ def delete_design_image(file_url: str) -> bool:
     
     Returns:
         True if deleted successfully, False otherwise
+    
+    Raises:
+        CircuitOpenError: Supabase is failing; nothing was deleted
     """
     if not file_url:
         logger.warning("delete_design_image: No file URL provided")
@@ -179,13 +392,20 @@ def delete_design_image(file_url: str) -> bool:
         
         logger.info(f"Attempting to delete from Supabase: bucket={bucket}, path={file_path}")
         
+        start = time.perf_counter()
         supabase = get_supabase_client()
-        response = supabase.storage.from_(bucket).remove([file_path])
+        with get_storage_breaker().guard():
+            response = supabase.storage.from_(bucket).remove([file_path])
+        STORAGE_LATENCY.observe(time.perf_counter() - start, operation='delete')
         
         logger.info(f"Delete response: {response}")
         return True
         
+    except CircuitOpenError:
+        raise
+        
     except Exception as e:
+        STORAGE_FAILURES.inc(operation='delete')
         logger.error(f"Supabase delete error: {type(e).__name__}: {e}")
         import traceback
         logger.error(traceback.format_exc())
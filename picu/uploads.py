@@ -0,0 +1,198 @@
+"""
+Upload handling for PICU Creator Dashboard
+Enforces the upload size cap while streaming and sniffs image headers
+without decoding pixel data
+"""
+import io
+import struct
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Placeholder for a file whose data was discarded for exceeding the cap"""
+
+    too_large = True
+
+    def __init__(self, name, size, content_type, charset, content_type_extra=None):
+        super().__init__(io.BytesIO(), name, content_type, size, charset, content_type_extra)
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """
+    Stop passing file data to the storage handlers once a file exceeds
+    UPLOAD_MAX_FILE_SIZE. The rest of the body is still parsed so the form
+    can report the error next to its other fields.
+
+    Must come before the memory and temporary-file handlers.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = getattr(settings, 'UPLOAD_MAX_FILE_SIZE', 20 * 1024 * 1024)
+        self.reject_all = False
+        self.received = 0
+        self.oversized = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # A body larger than the cap plus the form fields cannot hold a valid file
+        if content_length > self.max_size + settings.DATA_UPLOAD_MAX_MEMORY_SIZE:
+            self.reject_all = True
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.oversized = self.reject_all
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.oversized = True
+        if self.oversized:
+            return None  # Swallow the chunk; later handlers never see it
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not self.oversized:
+            return None
+        # Release whatever the storage handlers buffered before the cap was hit
+        for handler in self.request.upload_handlers if self.request else []:
+            partial = getattr(handler, 'file', None)
+            if handler is not self and partial is not None:
+                partial.close()
+        return OversizedUploadedFile(
+            self.file_name, self.received, self.content_type, self.charset, self.content_type_extra
+        )
+
+
+class ImageHeaderError(ValueError):
+    """The file is not a PNG or JPEG with a readable header"""
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# SOF markers carry the frame dimensions; C4 (DHT), C8 (JPG) and CC (DAC) do not
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_STANDALONE_MARKERS = {0x01, *range(0xD0, 0xD9)}
+JPEG_MAX_SEGMENTS = 256
+
+
+def sniff_image(file):
+    """
+    Read format and dimensions from the image header only
+
+    Args:
+        file: Seekable file object positioned anywhere
+
+    Returns:
+        Tuple of (format, width, height) with format 'PNG' or 'JPEG'
+
+    Raises:
+        ImageHeaderError: If the header is missing, truncated or unsupported
+    """
+    file.seek(0)
+    head = file.read(24)
+    try:
+        if head.startswith(PNG_SIGNATURE):
+            if len(head) < 24:
+                raise ImageHeaderError('PNG terpotong')
+            if head[12:16] != b'IHDR':
+                raise ImageHeaderError('PNG tanpa header IHDR')
+            width, height = struct.unpack('>II', head[16:24])
+            return 'PNG', width, height
+
+        if head.startswith(b'\xff\xd8'):
+            return _sniff_jpeg(file)
+    finally:
+        file.seek(0)
+
+    raise ImageHeaderError('Format file tidak didukung')
+
+
+def _sniff_jpeg(file):
+    """Walk JPEG segments until the first start-of-frame marker"""
+    file.seek(2)
+    for _ in range(JPEG_MAX_SEGMENTS):
+        byte = file.read(1)
+        if byte != b'\xff':
+            raise ImageHeaderError('Struktur JPEG tidak valid')
+        marker = 0xFF
+        while marker == 0xFF:  # Markers may be padded with fill bytes
+            byte = file.read(1)
+            if not byte:
+                raise ImageHeaderError('JPEG terpotong')
+            marker = byte[0]
+
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):  # End of image / start of scan before any frame
+            break
+
+        raw_length = file.read(2)
+        if len(raw_length) != 2:
+            raise ImageHeaderError('JPEG terpotong')
+        length = struct.unpack('>H', raw_length)[0]
+
+        if marker in JPEG_SOF_MARKERS:
+            frame = file.read(5)
+            if len(frame) != 5:
+                raise ImageHeaderError('JPEG terpotong')
+            height, width = struct.unpack('>HH', frame[1:5])
+            return 'JPEG', width, height
+
+        file.seek(length - 2, io.SEEK_CUR)
+
+    raise ImageHeaderError('JPEG tanpa informasi dimensi')
+
+
+ALPHA_MODES = {'RGBA', 'LA', 'PA', 'RGBa', 'La'}
+
+
+def read_image_metadata(file):
+    """
+    Dimensions, DPI, colour mode and alpha of an image, from its header
+
+    Pillow's open() parses headers and stops at the pixel data (IDAT for
+    PNG, start of scan for JPEG), so this is cheap even for large files and
+    works on the first few kilobytes of a remote object.
+
+    Args:
+        file: Seekable file object positioned anywhere
+
+    Returns:
+        Dict with image_width, image_height, image_dpi (None when the file
+        declares none), image_mode and image_has_alpha, named like the
+        Design columns they are stored in
+
+    Raises:
+        ImageHeaderError: If Pillow cannot read the header
+    """
+    from PIL import Image
+
+    file.seek(0)
+    try:
+        with Image.open(file) as img:
+            width, height = img.size
+            mode = img.mode
+            dpi = img.info.get('dpi')
+            transparency = 'transparency' in img.info
+    except Exception as e:
+        raise ImageHeaderError(f'Header gambar tidak terbaca: {type(e).__name__}') from e
+    finally:
+        file.seek(0)
+
+    try:
+        # Both axes almost always match; the lower one is what limits print quality
+        dpi = round(min(float(dpi[0]), float(dpi[1]))) if dpi else None
+    except (TypeError, ValueError, IndexError):
+        dpi = None
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_dpi': dpi or None,
+        'image_mode': mode,
+        'image_has_alpha': mode in ALPHA_MODES or transparency,
+    }
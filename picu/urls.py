@@ -5,12 +5,20 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from picu.metrics import metrics_view
+from designs.views import catalog_designs, design_image, sku_lookup
+from payouts.views import order_events
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('accounts/', include('allauth.urls')),
     path('profile/', include('accounts.urls')),
     path('designs/', include('designs.urls')),
+    path('img/<uuid:pk>/<int:width>.<str:fmt>', design_image, name='design_image'),
+    path('api/orders/events', order_events, name='order_events'),
+    path('api/skus', sku_lookup, name='sku_lookup'),
+    path('api/v1/catalog/designs', catalog_designs, name='catalog_designs'),
     path('', include('dashboard.urls')),
 ]
 